@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+转换结果登记表（Web 界面的 /download/<ID> 使用，不依赖 Flask）
+
+原先下载时遍历系统临时目录，返回第一个文件名以请求名称结尾的文件：
+临时目录文件很多时每次下载都要列目录，而且不同用户的同名结果可能互相下载到。改为登记表：
+- 转换完成后 register(结果路径) 登记，返回不透明的随机 ID（uuid4，不可猜测），下载链接只包含该 ID
+- 每个 ID 一个记录文件 ARTIFACTS_DIR/<ID>.json（结果路径、下载文件名、大小、过期时间），
+  先写临时文件再 os.replace，任意 Web 进程（gunicorn 多 worker）都能按 ID 直接打开，不列目录
+- resolve(ID) 校验过期时间与文件大小：已过期的记录连同结果文件一并删除；
+  每次登记时顺带清理已过期的记录（同一进程内最多每 PURGE_INTERVAL 秒一次）
+- 记录中的路径会被发送给下载者、过期时被删除：登记表目录必须是当前用户私有的目录
+  （private_dir.is_private，检查不通过时不登记也不读取），并且只接受解析符号链接后
+  位于转换结果目录 OUTPUT_DIR 之内的路径，其余记录视为无效，不发送也不删除其指向的文件
+
+配置（环境变量）：
+- XMIND_ARTIFACTS_DIR   登记表目录，默认 <临时目录>/xmind_artifacts-<uid>（须为当前用户私有）
+- XMIND_ARTIFACT_TTL    转换结果的下载有效期（秒），默认 3600
+"""
+
+import json
+import os
+import re
+import tempfile
+import time
+import uuid
+from typing import Optional
+
+import private_dir
+
+ARTIFACTS_DIR = os.environ.get("XMIND_ARTIFACTS_DIR") or private_dir.default_dir("xmind_artifacts")
+# 转换结果所在目录（converter 与 Web 界面均输出到系统临时目录）
+OUTPUT_DIR = tempfile.gettempdir()
+ARTIFACT_TTL = float(os.environ.get("XMIND_ARTIFACT_TTL", "3600"))
+
+# 登记时清理过期记录的最小间隔（秒）
+PURGE_INTERVAL = 60.0
+
+_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+_RECORD_SUFFIX = ".json"
+
+_last_purge = 0.0
+
+
+def _record_path(artifact_id: str) -> Optional[str]:
+    """记录文件路径；ID 格式不合法时返回 None（防止路径穿越）"""
+    if not _ID_PATTERN.match(artifact_id or ""):
+        return None
+    return os.path.join(ARTIFACTS_DIR, artifact_id + _RECORD_SUFFIX)
+
+
+def register(path: str, download_name: Optional[str] = None, ttl: Optional[float] = None) -> str:
+    """
+    登记转换结果文件，返回下载 ID。
+    download_name 为下载时的文件名（默认取结果文件名），ttl 为有效期（秒，默认 ARTIFACT_TTL）；
+    过期后结果文件由登记表删除。
+    结果文件不在 OUTPUT_DIR 之内时抛出 ValueError，登记表目录不是当前用户私有的目录时抛出 PermissionError。
+    """
+    if not private_dir.contains(OUTPUT_DIR, path):
+        raise ValueError(f"转换结果不在输出目录 {OUTPUT_DIR} 之内：{path}")
+    if not _private(create=True):
+        raise PermissionError(f"转换结果登记表目录 {ARTIFACTS_DIR} 不是当前用户私有的目录")
+    _maybe_purge()
+    artifact_id = uuid.uuid4().hex
+    record = {
+        "id": artifact_id,
+        "path": os.path.realpath(path),
+        "download_name": download_name or os.path.basename(path),
+        "size": os.path.getsize(path),
+        "expires_at": time.time() + (ARTIFACT_TTL if ttl is None else ttl),
+    }
+    record_path = _record_path(artifact_id)
+    tmp_path = f"{record_path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(record, f, ensure_ascii=False)
+    os.replace(tmp_path, record_path)
+    return artifact_id
+
+
+def _private(create: bool = False) -> bool:
+    return private_dir.is_private(ARTIFACTS_DIR, create, "转换结果登记表目录")
+
+
+def _discard(record_path: str, record: Optional[dict]):
+    """删除记录及其结果文件（结果文件不在 OUTPUT_DIR 之内时只删除记录）"""
+    paths = [record_path]
+    if record and private_dir.contains(OUTPUT_DIR, record.get("path")):
+        paths.append(record["path"])
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def resolve(artifact_id: str) -> Optional[dict]:
+    """
+    按 ID 查找转换结果，返回记录 {id, path, download_name, size, expires_at}；
+    ID 不存在、已过期、结果文件已被删除/改动或不在 OUTPUT_DIR 之内时返回 None（过期与失效的记录随即删除）；
+    返回的 path 为解析符号链接后的真实路径
+    """
+    record_path = _record_path(artifact_id)
+    if record_path is None or not _private():
+        return None
+    try:
+        with open(record_path, "r", encoding="utf-8") as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if record["expires_at"] <= time.time():
+        _discard(record_path, record)
+        return None
+    if not private_dir.contains(OUTPUT_DIR, record.get("path")):
+        _discard(record_path, None)
+        return None
+    record["path"] = os.path.realpath(record["path"])
+    try:
+        valid = os.path.getsize(record["path"]) == record["size"]
+    except OSError:
+        valid = False
+    if not valid:
+        _discard(record_path, None)
+        return None
+    return record
+
+
+def purge_expired():
+    """删除全部已过期的记录及其结果文件"""
+    if not _private():
+        return
+    now = time.time()
+    try:
+        names = os.listdir(ARTIFACTS_DIR)
+    except OSError:
+        return
+    for name in names:
+        if not name.endswith(_RECORD_SUFFIX):
+            continue
+        record_path = os.path.join(ARTIFACTS_DIR, name)
+        try:
+            with open(record_path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if record.get("expires_at", 0) <= now:
+            _discard(record_path, record)
+
+
+def _maybe_purge():
+    global _last_purge
+    now = time.time()
+    if now - _last_purge >= PURGE_INTERVAL:
+        _last_purge = now
+        purge_expired()
@@ -0,0 +1,435 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+性能基准脚本
+
+示例：
+# 使用合成的大型导图对比 json 解析与 xmind.load
+python benchmark.py parsers --modules 200 --cases 50 --steps 5
+
+# 使用真实文件（需为 XMind Zen/2020+ 格式，旧版文件 json 解析会回退到 xmind.load）
+python benchmark.py parsers --file input.xmind
+
+# 查看 auto 模式的预扫描结果、决策与各分支耗时
+python benchmark.py auto --file input.xmind
+
+# 文本清洗单字符串耗时：原 re.sub 实现 vs text_normalize
+python benchmark.py normalize --file input.xmind
+
+# 引号清理吞吐量：10 万步骤的模块化导出（原 5 轮循环 vs 单遍实现）
+python benchmark.py quotes --steps 100000
+
+# 优先级归一化与主题优先级提取：原实现 vs priority（表驱动 + 记忆化）
+python benchmark.py priority --file input.xmind
+
+# 行构建阶段：20 万用例，原逐用例实现 vs 按列批量构建（两种 CSV 模板）
+python benchmark.py rows --cases 200000
+
+# XLSX 与 CSV 导出对比：10 万行的写出耗时、峰值内存与文件大小
+python benchmark.py xlsx --rows 100000
+
+# 流式 CSV 响应：首个字节块耗时 vs 先写临时文件再发送（解析缓存关闭）
+python benchmark.py stream --file input.xmind
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from xml.sax.saxutils import escape
+
+import converter
+import module_converter_final
+import parse_cache
+import priority
+import text_normalize
+import xlsx_writer
+import xmind_reader
+from test_priority import _legacy_extract_priority_from_topic, _legacy_normalize_priority
+from test_row_builders import _legacy_iter_module_csv_rows, _legacy_iter_rows
+from test_text_normalize import (_legacy_remove_quotes, _legacy_sanitize_module,
+                                 _legacy_sanitize_multiline_text, _legacy_sanitize_text)
+
+
+def make_synthetic_xmind(path: str, modules: int = 100, cases: int = 40, steps: int = 5) -> str:
+    """
+    生成合成 XMind 文件：同一棵主题树同时写入 content.json 与 content.xml，
+    xmind.load 读取 content.xml，json 解析器读取 content.json，两者数据完全一致。
+    结构：中心主题 / 模块 / 子模块 / 用例 / 步骤 / 预期结果
+    """
+    def topic(title, children=(), notes=None, marker=None):
+        return {"title": title, "children": list(children), "notes": notes, "marker": marker}
+
+    root = topic("基准测试产品", [
+        topic(f"模块{m}", [
+            topic(f"子模块{m}-{s}", [
+                topic(f"用例{m}-{s}-{c}", [
+                    topic(f"步骤{k}：点击“按钮{k}”", [topic(f"预期{k}：显示【结果】")])
+                    for k in range(steps)
+                ], notes="前置：已登录", marker=f"priority-{c % 5 + 1}")
+                for c in range(cases // 2)
+            ])
+            for s in range(2)
+        ])
+        for m in range(modules)
+    ])
+
+    def to_json(t):
+        data = {"id": "t", "title": t["title"]}
+        if t["notes"]:
+            data["notes"] = {"plain": {"content": t["notes"]}}
+        if t["marker"]:
+            data["markers"] = [{"markerId": t["marker"]}]
+        if t["children"]:
+            data["children"] = {"attached": [to_json(c) for c in t["children"]]}
+        return data
+
+    def to_xml(t, out):
+        out.append(f"<topic id=\"t\"><title>{escape(t['title'])}</title>")
+        if t["notes"]:
+            out.append(f"<notes><plain>{escape(t['notes'])}</plain></notes>")
+        if t["marker"]:
+            out.append(f"<marker-refs><marker-ref marker-id=\"{t['marker']}\"/></marker-refs>")
+        if t["children"]:
+            out.append("<children><topics type=\"attached\">")
+            for c in t["children"]:
+                to_xml(c, out)
+            out.append("</topics></children>")
+        out.append("</topic>")
+
+    xml_parts = ['<?xml version="1.0" encoding="UTF-8" standalone="no"?>'
+                 '<xmap-content xmlns="urn:xmind:xmap:xmlns:content:2.0" version="2.0">'
+                 '<sheet id="s">']
+    to_xml(root, xml_parts)
+    xml_parts.append("<title>Sheet 1</title></sheet></xmap-content>")
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("content.json", json.dumps(
+            [{"id": "s", "class": "sheet", "title": "Sheet 1", "rootTopic": to_json(root)}],
+            ensure_ascii=False))
+        zf.writestr("content.xml", "".join(xml_parts))
+    return path
+
+
+def _timeit(func, *args, repeat: int = 3):
+    """返回 (最快耗时秒数, 最后一次结果)"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def bench_parsers(xmind_file: str, repeat: int = 3):
+    """对比 xmind.load（xmindlib/xmind）与 content.json 直接解析（json）"""
+    pairs = [
+        ("converter xmindlib", converter._group_from_xmindlib),
+        ("converter json", converter._group_from_json),
+        ("module xmind", module_converter_final._parse_module_cases_from_xmind),
+        ("module json", module_converter_final._parse_module_cases_from_json),
+    ]
+    print(f"文件: {xmind_file} ({os.path.getsize(xmind_file) / 1024:.1f} KB)")
+    print(f"{'解析器':<22}{'耗时(s)':>10}{'用例数':>10}")
+    for name, func in pairs:
+        elapsed, cases = _timeit(func, xmind_file, repeat=repeat)
+        print(f"{name:<22}{elapsed:>10.3f}{len(cases):>10}")
+
+
+def bench_auto(xmind_file: str, repeat: int = 3):
+    """运行 auto 选择并打印每次的决策报告"""
+    print(f"文件: {xmind_file} ({os.path.getsize(xmind_file) / 1024:.1f} KB)")
+    for _ in range(repeat):
+        converter._groups_auto(xmind_file)
+        print(converter.format_auto_report(converter.last_auto_report))
+
+
+def _collect_strings(xmind_file: str) -> list:
+    """收集导图中的全部标题与备注，另补充含零宽字符、连续空白、中文括号的样例"""
+    strings = []
+    for sheet in xmind_reader.load_sheets(xmind_file):
+        strings.extend(t for t in sheet.tree.titles if t)
+        strings.extend(n for n in sheet.tree.notes if n)
+    strings.extend([
+        "\u200b登录\u200d  模块\ufeff",
+        "  步骤1：输入\t账号  \n\n  点击（登录）  \n",
+        "支付（微信）/退款（部分）",
+    ] * max(1, len(strings) // 100))
+    return strings
+
+
+def bench_normalize(xmind_file: str, repeat: int = 3):
+    """对比原 re.sub 清洗与 text_normalize 的单字符串耗时，并校验输出一致"""
+    strings = _collect_strings(xmind_file)
+    print(f"文件: {xmind_file}，样本字符串 {len(strings)} 个")
+    print(f"{'函数':<26}{'原实现(ns)':>12}{'新实现(ns)':>12}{'加速比':>8}{'一致':>6}")
+    pairs = [
+        ("sanitize_text", _legacy_sanitize_text, text_normalize.sanitize_text),
+        ("sanitize_multiline_text", _legacy_sanitize_multiline_text, text_normalize.sanitize_multiline_text),
+        ("sanitize_module", _legacy_sanitize_module, text_normalize.sanitize_module),
+    ]
+    for name, legacy, current in pairs:
+        old_time, old_out = _timeit(lambda: [legacy(t) for t in strings], repeat=repeat)
+        new_time, new_out = _timeit(lambda: [current(t) for t in strings], repeat=repeat)
+        per_old = old_time / len(strings) * 1e9
+        per_new = new_time / len(strings) * 1e9
+        same = "是" if old_out == new_out else "否"
+        print(f"{name:<26}{per_old:>12.0f}{per_new:>12.0f}{per_old / per_new:>7.1f}x{same:>6}")
+
+
+def _synthetic_steps(count: int, seed: int = 7) -> list:
+    """生成步骤文本：混合中英文、各类引号、已有编号与无编号的行"""
+    rng = random.Random(seed)
+    quotes = ['"', "'", "“", "”", "《", "》", "【", "】", "「", "」"]
+    words = ["点击", "输入", "选择", "提交订单", "登录", "页面", "显示", "按钮", "confirm", "submit"]
+    steps = []
+    for i in range(count):
+        text = "".join(rng.choice(words) for _ in range(rng.randint(2, 6)))
+        if rng.random() < 0.5:
+            q = rng.choice(quotes)
+            text = f"{text}{q}{rng.choice(words)}{q}"
+        if rng.random() < 0.3:
+            text = f"{i % 9 + 1}. {text}"
+        steps.append(text)
+    return steps
+
+
+def bench_quotes(steps: int = 100000, per_case: int = 5, repeat: int = 3):
+    """
+    对比原 5 轮引号清理与 text_normalize.remove_quotes：
+    - remove_quotes 单字符串耗时
+    - build_module_csv_rows 整体导出吞吐量（每个用例 per_case 个步骤，步骤/预期都经过 _format_step_text）
+    """
+    texts = _synthetic_steps(steps)
+    cases = [{
+        "module": "基准", "custom_module": f"模块{i % 50}/子模块{i % 7}", "title": f"用例{i}",
+        "priority": "P2", "preconditions": "“已登录”",
+        "steps": [(texts[k], texts[-k - 1]) for k in range(i, min(i + per_case, len(texts)))],
+    } for i in range(0, len(texts), per_case)]
+
+    print(f"步骤数: {len(texts)}，用例数: {len(cases)}")
+    old_time, old_out = _timeit(lambda: [_legacy_remove_quotes(t) for t in texts], repeat=repeat)
+    new_time, new_out = _timeit(lambda: [text_normalize.remove_quotes(t) for t in texts], repeat=repeat)
+    print(f"remove_quotes 单字符串: 原实现 {old_time / len(texts) * 1e6:.2f}us，"
+          f"新实现 {new_time / len(texts) * 1e6:.2f}us，加速 {old_time / new_time:.1f}x，"
+          f"输出{'一致' if old_out == new_out else '不一致'}")
+
+    saved = module_converter_final._completely_remove_quotes
+    module_converter_final._completely_remove_quotes = _legacy_remove_quotes
+    try:
+        old_time, old_rows = _timeit(module_converter_final.build_module_csv_rows, cases, repeat=repeat)
+    finally:
+        module_converter_final._completely_remove_quotes = saved
+    new_time, new_rows = _timeit(module_converter_final.build_module_csv_rows, cases, repeat=repeat)
+    print(f"模块化导出 build_module_csv_rows: 原实现 {old_time:.3f}s（{len(texts) / old_time:,.0f} 步骤/秒），"
+          f"新实现 {new_time:.3f}s（{len(texts) / new_time:,.0f} 步骤/秒），加速 {old_time / new_time:.1f}x，"
+          f"输出{'一致' if old_rows == new_rows else '不一致'}")
+
+
+def bench_priority(xmind_file: str, repeat: int = 3):
+    """对比原 _normalize_priority / _extract_priority_from_topic 与 priority 模块，并校验输出一致"""
+    trees = [sheet.tree for sheet in xmind_reader.load_sheets(xmind_file)]
+    topics = [(tree, i) for tree in trees for i in range(len(tree.titles))]
+    values = [priority.from_topic(tree, i) for tree, i in topics[::3]]
+    values += ["1", 3, "P1", "p3", "高", "中", "低", "High", "Minor", "优先级：2", None, ""] * max(1, len(values) // 12)
+    print(f"文件: {xmind_file}，主题 {len(topics)} 个，优先级取值 {len(values)} 个")
+    print(f"{'函数':<26}{'原实现(ns)':>12}{'新实现(ns)':>12}{'加速比':>8}{'一致':>6}")
+    pairs = [
+        ("normalize_priority", values,
+         lambda: [_legacy_normalize_priority(v) for v in values],
+         lambda: [priority.normalize_priority(v) for v in values]),
+        ("from_topic", topics,
+         lambda: [_legacy_extract_priority_from_topic(t, i) for t, i in topics],
+         lambda: [priority.from_topic(t, i) for t, i in topics]),
+    ]
+    for name, items, legacy, current in pairs:
+        old_time, old_out = _timeit(legacy, repeat=repeat)
+        new_time, new_out = _timeit(current, repeat=repeat)
+        per_old = old_time / len(items) * 1e9
+        per_new = new_time / len(items) * 1e9
+        same = "是" if old_out == new_out else "否"
+        print(f"{name:<26}{per_old:>12.0f}{per_new:>12.0f}{per_old / per_new:>7.1f}x{same:>6}")
+
+
+def _synthetic_cases(count: int, per_case: int = 5, seed: int = 7) -> list:
+    """合成解析结果：同时带有两种模板的字段，模块路径与预期结果按真实导图的重复程度取值"""
+    rng = random.Random(seed)
+    expected_pool = ["操作成功", "页面正确显示", "提示“保存成功”", "无", "弹出确认框"]
+    cases = []
+    for i in range(count):
+        module = f"模块{i % 40}/子模块{i % 9}/功能{i % 5}"
+        steps = [(f"{k + 1}. 点击“按钮{rng.randint(1, 500)}”，输入 {rng.randint(1, 10 ** 6)}",
+                  rng.choice(expected_pool)) for k in range(per_case)]
+        cases.append({
+            "title": f"用例{i}", "module": module, "custom_module": module, "prio": "P2", "priority": "P2",
+            "pre": "已登录", "preconditions": rng.choice(["无", "“已登录”", "已开通账户"]), "steps": steps,
+        })
+    return cases
+
+
+def bench_rows(count: int = 200000, per_case: int = 5, repeat: int = 3):
+    """对比原逐用例行构建与按列批量构建（iter_row_batches / iter_module_csv_row_batches），并校验输出一致"""
+    cases = _synthetic_cases(count, per_case)
+    print(f"用例数: {len(cases)}，每个用例 {per_case} 个步骤")
+    pairs = [
+        ("iter_rows", _legacy_iter_rows, converter.iter_rows),
+        ("iter_module_csv_rows", _legacy_iter_module_csv_rows, module_converter_final.iter_module_csv_rows),
+    ]
+    for name, legacy, current in pairs:
+        old_time, old_rows = _timeit(lambda: list(legacy(cases)), repeat=repeat)
+        new_time, new_rows = _timeit(lambda: list(current(cases)), repeat=repeat)
+        print(f"{name}: 原实现 {old_time:.3f}s（{len(cases) / old_time:,.0f} 用例/秒），"
+              f"新实现 {new_time:.3f}s（{len(cases) / new_time:,.0f} 用例/秒），加速 {old_time / new_time:.1f}x，"
+              f"输出{'一致' if old_rows == new_rows else '不一致'}")
+
+
+def _write_csv(path: str, cases: list) -> int:
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        return module_converter_final.write_module_csv_rows(csv.writer(f), cases)
+
+
+def _write_xlsx(path: str, cases: list) -> int:
+    return xlsx_writer.write_xlsx(path, module_converter_final.MODULE_CSV_HEADER,
+                                  module_converter_final.iter_module_csv_row_batches(cases),
+                                  column_widths=module_converter_final.MODULE_XLSX_COLUMN_WIDTHS)
+
+
+def bench_xlsx(count: int = 100000, per_case: int = 5, repeat: int = 3):
+    """
+    模块化用例导出：CSV（utf-8-sig）与流式 XLSX 的写出耗时、峰值内存（tracemalloc，单独一次运行）与文件大小。
+    峰值内存分别在 count/10 与 count 行上测量，流式写入时两者应接近。
+    """
+    cases = _synthetic_cases(count, per_case)
+    print(f"行数: {len(cases)}，每个用例 {per_case} 个步骤")
+    print(f"{'格式':<8}{'耗时(s)':>10}{'行/秒':>12}{'文件(MB)':>10}{'峰值内存(MB, 1/10 行数)':>26}{'峰值内存(MB)':>14}")
+    out_dir = tempfile.mkdtemp(prefix="xlsx_bench_")
+    for name, write in (("csv", _write_csv), ("xlsx", _write_xlsx)):
+        path = os.path.join(out_dir, f"bench.{name}")
+        elapsed, _ = _timeit(write, path, cases, repeat=repeat)
+        size = os.path.getsize(path) / 1024 / 1024
+        peaks = []
+        for subset in (cases[:max(1, len(cases) // 10)], cases):
+            tracemalloc.start()
+            write(path, subset)
+            peaks.append(tracemalloc.get_traced_memory()[1] / 1024 / 1024)
+            tracemalloc.stop()
+        os.remove(path)
+        print(f"{name:<8}{elapsed:>10.3f}{len(cases) / elapsed:>12,.0f}{size:>10.1f}{peaks[0]:>26.1f}{peaks[1]:>14.1f}")
+    os.rmdir(out_dir)
+
+
+def bench_stream(xmind_file: str, repeat: int = 3):
+    """对比先写临时文件（写完才能开始发送）与流式导出（首块即可发送）的首字节耗时与总耗时（CSV / NDJSON）"""
+    parse_cache.configure(max_bytes=0)
+    print(f"文件: {xmind_file} ({os.path.getsize(xmind_file) / 1024:.1f} KB)")
+    print(f"{'方式':<22}{'首字节(s)':>12}{'总耗时(s)':>12}{'字节数':>14}")
+    for name, export, convert in (
+            ("standard", converter.stream_csv, converter.convert_to_csv),
+            ("module", module_converter_final.stream_module_csv, module_converter_final.convert_to_module_csv),
+            ("ndjson", converter.stream_ndjson, converter.convert_to_ndjson)):
+        best_first = best_total = None
+        size = 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            chunks = export(xmind_file, parser="json")
+            size = len(next(chunks))
+            first = time.perf_counter() - start
+            size += sum(len(chunk) for chunk in chunks)
+            total = time.perf_counter() - start
+            best_first = first if best_first is None else min(best_first, first)
+            best_total = total if best_total is None else min(best_total, total)
+        print(f"{name + ' stream':<22}{best_first:>12.3f}{best_total:>12.3f}{size:>14,}")
+
+        elapsed, path = _timeit(convert, xmind_file, None, "json", repeat=repeat)
+        size = os.path.getsize(path)
+        os.remove(path)
+        print(f"{name + ' temp file':<22}{elapsed:>12.3f}{elapsed:>12.3f}{size:>14,}")
+
+
+def _synthetic_or_file(args) -> str:
+    if args.file:
+        return args.file
+    xmind_file = os.path.join(tempfile.gettempdir(), "xmind_benchmark.xmind")
+    make_synthetic_xmind(xmind_file, args.modules, args.cases, args.steps)
+    return xmind_file
+
+
+def _add_input_args(p):
+    p.add_argument("--file", default=None, help="XMind 文件路径（不提供则生成合成文件）")
+    p.add_argument("--modules", type=int, default=100)
+    p.add_argument("--cases", type=int, default=40)
+    p.add_argument("--steps", type=int, default=5)
+    p.add_argument("--repeat", type=int, default=3)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="XMind -> CSV 性能基准")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("parsers", help="对比 json 解析与 xmind.load 的解析耗时")
+    _add_input_args(p)
+
+    p = sub.add_parser("auto", help="auto 模式的预扫描、决策与各分支耗时")
+    _add_input_args(p)
+
+    p = sub.add_parser("normalize", help="文本清洗单字符串耗时（原 re.sub 实现 vs text_normalize）")
+    _add_input_args(p)
+
+    p = sub.add_parser("priority", help="优先级归一化与主题优先级提取耗时（原实现 vs priority）")
+    _add_input_args(p)
+
+    p = sub.add_parser("rows", help="行构建阶段耗时（原逐用例实现 vs 按列批量构建）")
+    p.add_argument("--cases", type=int, default=200000, help="用例数")
+    p.add_argument("--per-case", type=int, default=5, help="每个用例的步骤数")
+    p.add_argument("--repeat", type=int, default=3)
+
+    p = sub.add_parser("xlsx", help="模块化用例导出：CSV 与流式 XLSX 的耗时、峰值内存与文件大小")
+    p.add_argument("--rows", type=int, default=100000, help="数据行数（用例数）")
+    p.add_argument("--per-case", type=int, default=5, help="每个用例的步骤数")
+    p.add_argument("--repeat", type=int, default=3)
+
+    p = sub.add_parser("stream", help="流式 CSV / NDJSON 响应的首字节耗时（对比先写临时文件）")
+    _add_input_args(p)
+
+    p = sub.add_parser("quotes", help="引号清理吞吐量（原 5 轮循环 vs 单遍实现）")
+    p.add_argument("--steps", type=int, default=100000, help="步骤总数")
+    p.add_argument("--per-case", type=int, default=5, help="每个用例的步骤数")
+    p.add_argument("--repeat", type=int, default=3)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.command == "quotes":
+        bench_quotes(args.steps, args.per_case, repeat=args.repeat)
+        return
+    if args.command == "rows":
+        bench_rows(args.cases, args.per_case, repeat=args.repeat)
+        return
+    if args.command == "xlsx":
+        bench_xlsx(args.rows, args.per_case, repeat=args.repeat)
+        return
+
+    xmind_file = _synthetic_or_file(args)
+    if args.command == "parsers":
+        bench_parsers(xmind_file, repeat=args.repeat)
+    elif args.command == "auto":
+        bench_auto(xmind_file, repeat=args.repeat)
+    elif args.command == "normalize":
+        bench_normalize(xmind_file, repeat=args.repeat)
+    elif args.command == "priority":
+        bench_priority(xmind_file, repeat=args.repeat)
+    elif args.command == "stream":
+        bench_stream(xmind_file, repeat=args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+多文件打包导出：一次请求导出多个 XMind 文件的多种 CSV，边转换边以 ZIP 流式输出
+
+- 同一文件的标准 CSV 与禅道 CSV 共用一次解析，解析任务按 (文件, 用例类别) 去重
+- 多个解析任务在进程池中并发执行，子进程只负责解析并写入磁盘解析缓存（parse_cache），
+  按完成顺序由主进程从缓存流式生成 CSV 并写入 ZIP 条目，单个 CSV 与整个压缩包都不在内存中缓冲；
+  进程池在进程内复用（_get_pool），进程数默认不超过 BUNDLE_WORKERS_MAX
+- 磁盘解析缓存关闭、只有一个任务或只有一个 worker 时，在当前进程中按顺序边解析边写入
+- 单个文件转换失败时写入 “<条目名称>.error.txt”，其余文件照常导出
+
+ZIP 内的目录结构：<文件名>/<文件名>_标准CSV.csv、<文件名>/<文件名>_禅道CSV.csv、<文件名>/<模块名>_模块化用例.csv
+
+配置（环境变量）：
+- XMIND_BUNDLE_WORKERS  并发解析的进程数，默认 min(CPU 核数, 4)；1 表示串行
+  （Web 界面调用 configure(workers=1)：多个 gunicorn worker 各自再开 CPU 核数个进程会超额占用 CPU）
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import converter
+import export_stream
+import module_converter_final
+import parse_cache
+
+BUNDLE_WORKERS_MAX = 4
+# 并发解析的进程数，1 表示串行
+BUNDLE_WORKERS = int(os.environ.get("XMIND_BUNDLE_WORKERS", "0")) or min(os.cpu_count() or 1, BUNDLE_WORKERS_MAX)
+
+# 导出格式 -> (解析类别, 文件名后缀)；模块化用例的文件名以 XMind 一级主标题命名
+BUNDLE_FORMATS = {
+    "standard": ("structured", "标准CSV"),
+    "zentao": ("structured", "禅道CSV"),
+    "module": ("module", "模块化用例"),
+}
+
+# 两种转换器共有的解析器选项（其余选项的名称在两者之间不一致）
+BUNDLE_PARSERS = ("auto", "json")
+
+# 进程内共享的进程池：(pid, 进程数, ProcessPoolExecutor)
+_pool = None
+
+
+def configure(workers: Optional[int] = None):
+    """修改并发解析的进程数（1 表示串行）"""
+    global BUNDLE_WORKERS
+    if workers is not None:
+        BUNDLE_WORKERS = max(1, workers)
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """共享进程池（同一进程内多次打包导出复用，不再每次启动子进程）"""
+    global _pool
+    if _pool is None or _pool[:2] != (os.getpid(), workers):
+        if _pool is not None and _pool[0] == os.getpid():
+            _pool[2].shutdown(wait=False, cancel_futures=True)
+        _pool = (os.getpid(), workers, ProcessPoolExecutor(max_workers=workers))
+    return _pool[2]
+
+
+def _safe_name(name: str) -> str:
+    """ZIP 条目路径中的单个名称：去除路径分隔符"""
+    return (name or "").replace("/", "_").replace("\\", "_").strip() or "未命名"
+
+
+def _parse_task(xmind_file: str, kind: str, parser: str, all_sheets: bool) -> Optional[str]:
+    """
+    子进程：解析并写入磁盘解析缓存，主进程随后按缓存流式生成 CSV。
+    模块化用例同时返回模块名（用于文件名）。模块级函数，供进程池调用。
+    """
+    if kind == "module":
+        module_converter_final.get_module_cases(xmind_file, parser=parser, all_sheets=all_sheets)
+        return module_converter_final._extract_module_name(xmind_file)
+    converter.get_structured_cases(xmind_file, parser=parser, all_sheets=all_sheets)
+    return None
+
+
+def _iter_entries_for(xmind_file: str, stem: str, kind: str, formats: List[str], parser: str,
+                      all_sheets: bool, module_name: Optional[str] = None) -> Iterator[Tuple[str, Iterator[bytes]]]:
+    """单个解析任务对应的 ZIP 条目：(条目名称, CSV 字节块迭代器)"""
+    for fmt in formats:
+        if kind == "module":
+            if module_name is None:
+                module_name = module_converter_final._extract_module_name(xmind_file)
+            name = f"{stem}/{_safe_name(module_name)}_模块化用例.csv"
+            chunks = module_converter_final.stream_module_csv(xmind_file, parser=parser, all_sheets=all_sheets)
+        else:
+            name = f"{stem}/{stem}_{BUNDLE_FORMATS[fmt][1]}.csv"
+            chunks = converter.stream_csv(xmind_file, parser=parser, all_sheets=all_sheets)
+        yield name, chunks
+
+
+def _failed_entry(stem: str, kind: str, error: Exception) -> Tuple[str, Iterator[bytes]]:
+    """解析失败时的错误说明条目"""
+    label = "模块化用例" if kind == "module" else "CSV"
+    return f"{stem}/{stem}_{label}.error.txt", iter([f"导出失败: {error}".encode("utf-8")])
+
+
+def _plan(sources: Sequence[Tuple[str, str]], formats: Sequence[str]) -> Dict[Tuple[int, str], List[str]]:
+    """解析任务：(文件序号, 解析类别) -> 该任务要生成的导出格式（保持请求顺序）"""
+    tasks = {}
+    for index in range(len(sources)):
+        for fmt in formats:
+            tasks.setdefault((index, BUNDLE_FORMATS[fmt][0]), []).append(fmt)
+    return tasks
+
+
+def _stems(sources: Sequence[Tuple[str, str]]) -> List[str]:
+    """每个文件在 ZIP 中的目录名（去掉 .xmind 扩展名；重名时追加序号）"""
+    stems, seen = [], {}
+    for _, display_name in sources:
+        stem = _safe_name(os.path.splitext(display_name)[0])
+        count = seen.get(stem, 0) + 1
+        seen[stem] = count
+        stems.append(stem if count == 1 else f"{stem} ({count})")
+    return stems
+
+
+def _iter_bundle_entries(sources, formats, parser, all_sheets, workers) -> Iterator[Tuple[str, Iterator[bytes]]]:
+    global _pool
+    tasks = _plan(sources, formats)
+    stems = _stems(sources)
+
+    pool = None
+    if workers > 1 and len(tasks) > 1 and parse_cache.enabled():
+        try:
+            pool = _get_pool(workers)
+        except (OSError, NotImplementedError):
+            # 进程池无法创建（如受限环境）时退回串行
+            pool = None
+    if pool is None:
+        for (index, kind), task_formats in tasks.items():
+            yield from _iter_entries_for(sources[index][0], stems[index], kind, task_formats, parser, all_sheets)
+        return
+
+    futures = {
+        pool.submit(_parse_task, sources[index][0], kind, parser, all_sheets): (index, kind)
+        for index, kind in tasks
+    }
+    try:
+        for future in as_completed(futures):
+            index, kind = futures[future]
+            try:
+                module_name = future.result()
+            except BrokenProcessPool:
+                # 子进程异常退出：丢弃进程池，下次调用重新创建
+                _pool = None
+                raise
+            except Exception as e:
+                yield _failed_entry(stems[index], kind, e)
+                continue
+            yield from _iter_entries_for(sources[index][0], stems[index], kind, tasks[(index, kind)],
+                                         parser, all_sheets, module_name)
+    finally:
+        # 客户端中途断开时取消尚未开始的解析任务（进程池保留给后续请求）
+        for future in futures:
+            future.cancel()
+
+
+def iter_bundle_bytes(sources: Sequence[Tuple[str, str]], formats: Sequence[str], parser: str = "auto",
+                      all_sheets: bool = False, workers: Optional[int] = None) -> Iterator[bytes]:
+    """
+    将多个 XMind 文件的多种 CSV 打包为 ZIP，逐段产出压缩后的字节（可直接写入 HTTP 响应或文件）。
+    sources: [(XMind 文件路径, 显示名称), ...]，显示名称用于 ZIP 内的目录名与文件名
+    formats: BUNDLE_FORMATS 中的格式名称（standard / zentao / module），不合法时抛出 ValueError
+    parser: BUNDLE_PARSERS 之一
+    workers: 并发解析的进程数，默认 BUNDLE_WORKERS
+    """
+    unknown = [fmt for fmt in formats if fmt not in BUNDLE_FORMATS]
+    if unknown:
+        raise ValueError(f"不支持的导出格式: {', '.join(unknown)}（可选: {', '.join(BUNDLE_FORMATS)}）")
+    if parser not in BUNDLE_PARSERS:
+        raise ValueError(f"不支持的解析器: {parser}（可选: {', '.join(BUNDLE_PARSERS)}）")
+    if not sources or not formats:
+        raise ValueError("至少需要一个文件和一种导出格式")
+    formats = list(dict.fromkeys(formats))
+    workers = BUNDLE_WORKERS if workers is None else workers
+    return export_stream.iter_zip_bytes(_iter_bundle_entries(sources, formats, parser, all_sheets, workers))
+
+
+def write_bundle(output_path: str, sources: Sequence[Tuple[str, str]], formats: Sequence[str],
+                 parser: str = "auto", all_sheets: bool = False, workers: Optional[int] = None) -> str:
+    """iter_bundle_bytes 写入文件（命令行使用），失败时删除不完整的文件，返回绝对路径"""
+    zip_path = os.path.abspath(output_path)
+    os.makedirs(os.path.dirname(zip_path), exist_ok=True)
+    chunks = iter_bundle_bytes(sources, formats, parser=parser, all_sheets=all_sheets, workers=workers)
+    try:
+        with open(zip_path, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+    except Exception:
+        if os.path.exists(zip_path):
+            os.remove(zip_path)
+        raise
+    return zip_path
@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+列式导出（Apache Parquet，可选依赖 pyarrow）
+
+用于对大量已转换用例做统计分析（按模块的优先级分布、步骤数等），替代逐个加载 CSV：
+- 标准用例（converter）与模块化用例（module_converter_final）写入同一套表结构，由 kind 列区分
+- 步骤为嵌套列表列 steps: list<struct<step, expected>>，另有 step_count 便于直接聚合
+- source / kind / module / custom_module / priority 为字典编码列（重复值只存一次）
+- 用例从流式迭代器（iter_structured_cases / iter_module_cases，与 get_* 共用解析缓存）按行组批量写入
+- 数据集目录模式（append_to_dataset）：每个 XMind 文件写成目录下的一个分片文件，
+  分片名由用例类别与文件内容 SHA-256 决定，同一文件重复追加时替换原分片而不会重复；
+  整个目录可用 read_dataset(目录)、pyarrow.parquet.read_table(目录) 或 pandas.read_parquet(目录) 一次读入
+
+未安装 pyarrow 时 available() 返回 False，导出函数抛出 RuntimeError；核心功能不依赖 pyarrow。
+安装：pip install pyarrow
+"""
+
+import os
+import uuid
+from itertools import islice
+from typing import Iterable, Iterator, Optional, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # 可选依赖
+    pa = pq = None
+
+import converter
+import module_converter_final
+import parse_cache
+
+# 用例类别：structured（标准/禅道用例）、module（模块化用例）
+COLUMNAR_KINDS = ("structured", "module")
+
+# 每个行组的用例数（行组过小会降低压缩率与扫描效率）
+ROW_GROUP_SIZE = int(os.environ.get("XMIND_PARQUET_ROW_GROUP_SIZE", "20000"))
+
+PARQUET_COMPRESSION = os.environ.get("XMIND_PARQUET_COMPRESSION", "zstd")
+
+
+def available() -> bool:
+    """是否已安装 pyarrow"""
+    return pa is not None
+
+
+def _require():
+    if pa is None:
+        raise RuntimeError("列式导出需要安装 pyarrow：pip install pyarrow")
+
+
+def schema():
+    """数据集表结构（标准用例与模块化用例共用）"""
+    _require()
+    dict_string = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ("source", dict_string),
+        ("kind", dict_string),
+        ("module", dict_string),
+        ("custom_module", dict_string),
+        ("title", pa.string()),
+        ("priority", dict_string),
+        ("preconditions", pa.string()),
+        ("step_count", pa.int32()),
+        ("steps", pa.list_(pa.struct([("step", pa.string()), ("expected", pa.string())]))),
+    ])
+
+
+def _dictionary(values, size: int = None):
+    """字典编码列；values 为单个字符串时重复 size 次"""
+    if isinstance(values, str):
+        values = pa.repeat(pa.scalar(values, pa.string()), size)
+    else:
+        values = pa.array(values, pa.string())
+    return values.dictionary_encode()
+
+
+def _steps_column(step_lists):
+    """嵌套步骤列：展平的 step / expected 两列 + 偏移量（不为每个步骤构建字典）"""
+    offsets = [0]
+    actions = []
+    expecteds = []
+    for steps in step_lists:
+        for action, expected in steps:
+            actions.append(action)
+            expecteds.append(expected)
+        offsets.append(len(actions))
+    items = pa.StructArray.from_arrays([pa.array(actions, pa.string()), pa.array(expecteds, pa.string())],
+                                       names=["step", "expected"])
+    return pa.ListArray.from_arrays(pa.array(offsets, pa.int32()), items)
+
+
+def iter_record_batches(cases: Iterable[dict], kind: str, source: str,
+                        batch_size: int = None) -> Iterator["pa.RecordBatch"]:
+    """
+    按列批量构建记录批次（每批最多 batch_size 个用例，默认 ROW_GROUP_SIZE）。
+    kind: "structured" 时 cases 为 converter 结构化用例，"module" 时为 module_converter_final 模块化用例
+    """
+    _require()
+    batch_size = batch_size or ROW_GROUP_SIZE
+    table_schema = schema()
+    # 两种用例字典的优先级、前置条件字段名不同
+    priority_key, pre_key = ("priority", "preconditions") if kind == "module" else ("prio", "pre")
+    case_iter = iter(cases)
+    while True:
+        batch = list(islice(case_iter, batch_size))
+        if not batch:
+            return
+        size = len(batch)
+        step_lists = [case.get("steps", []) for case in batch]
+        if kind == "module":
+            custom_module = _dictionary([case.get("custom_module") or None for case in batch])
+        else:
+            custom_module = pa.nulls(size, pa.string()).dictionary_encode()
+        yield pa.RecordBatch.from_arrays([
+            _dictionary(source, size),
+            _dictionary(kind, size),
+            _dictionary([case.get("module", "") for case in batch]),
+            custom_module,
+            pa.array([case.get("title", "") for case in batch], pa.string()),
+            _dictionary([case.get(priority_key, "P2") for case in batch]),
+            pa.array([case.get(pre_key, "") for case in batch], pa.string()),
+            pa.array([len(steps) for steps in step_lists], pa.int32()),
+            _steps_column(step_lists),
+        ], schema=table_schema)
+
+
+def _iter_cases(xmind_file: str, kind: str, parser: str, all_sheets: bool) -> Iterator[dict]:
+    if kind not in COLUMNAR_KINDS:
+        raise ValueError(f"不支持的用例类别: {kind}（可选: {', '.join(COLUMNAR_KINDS)}）")
+    if kind == "module":
+        return module_converter_final.iter_module_cases(xmind_file, parser=parser, all_sheets=all_sheets)
+    return converter.iter_structured_cases(xmind_file, parser=parser, all_sheets=all_sheets)
+
+
+def write_parquet(xmind_file: str, output_path: str, kind: str = "structured", parser: str = "auto",
+                  all_sheets: bool = False, source: Optional[str] = None) -> Tuple[str, int]:
+    """
+    将单个 XMind 文件的用例写入 Parquet 文件，返回 (绝对路径, 用例数)。
+    source: 写入 source 列的名称，默认为 XMind 文件名；parser、all_sheets 参见 converter.build_rows_from_xmind
+    """
+    _require()
+    parquet_path = os.path.abspath(output_path)
+    os.makedirs(os.path.dirname(parquet_path), exist_ok=True)
+    source = source or os.path.basename(xmind_file)
+    cases = _iter_cases(xmind_file, kind, parser, all_sheets)
+    count = 0
+    try:
+        with pq.ParquetWriter(parquet_path, schema(), compression=PARQUET_COMPRESSION) as writer:
+            for batch in iter_record_batches(cases, kind, source):
+                writer.write_batch(batch)
+                count += batch.num_rows
+    except Exception:
+        # 解析中途失败时不留下不完整的文件
+        if os.path.exists(parquet_path):
+            os.remove(parquet_path)
+        raise
+    return parquet_path, count
+
+
+def append_to_dataset(dataset_dir: str, xmind_file: str, kind: str = "structured", parser: str = "auto",
+                      all_sheets: bool = False, source: Optional[str] = None) -> Tuple[str, int]:
+    """
+    将单个 XMind 文件追加到 Parquet 数据集目录，返回 (分片文件路径, 用例数)。
+    分片名为 “<用例类别>-<文件内容 SHA-256 前 16 位>.parquet”：同一文件重复追加时原子替换原分片，
+    写入过程中读取数据集的进程不会读到不完整的分片。
+    """
+    _require()
+    dataset_dir = os.path.abspath(dataset_dir)
+    os.makedirs(dataset_dir, exist_ok=True)
+    part_kind = f"{kind}_all_sheets" if all_sheets else kind
+    part_path = os.path.join(dataset_dir, f"{part_kind}-{parse_cache.file_digest(xmind_file)[:16]}.parquet")
+    # 临时文件以 “.” 开头，pyarrow 读取数据集时会忽略
+    tmp_path = os.path.join(dataset_dir, f".{uuid.uuid4().hex}.parquet.tmp")
+    _, count = write_parquet(xmind_file, tmp_path, kind=kind, parser=parser, all_sheets=all_sheets, source=source)
+    os.replace(tmp_path, part_path)
+    return part_path, count
+
+
+def read_dataset(dataset_dir: str, columns=None) -> "pa.Table":
+    """
+    读取整个数据集目录（或单个 Parquet 文件）为 Arrow 表。
+    各分片的字典各自独立，读取后统一为同一字典，可直接 group_by / 过滤。
+    """
+    _require()
+    return pq.read_table(dataset_dir, columns=columns).unify_dictionaries()
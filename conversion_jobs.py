@@ -0,0 +1,365 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+异步转换任务队列（供 Web 界面使用，不依赖 Flask）
+
+同步 worker（gunicorn sync）中直接转换大文件会长时间占用 worker，甚至触发 worker 超时。
+提交任务后立即返回任务 ID，转换在后台执行，客户端轮询任务状态，完成后下载结果：
+- 每个 Web 进程一个有界队列：最多 JOB_WORKERS 个转换同时执行，排队任务超过 JOB_MAX_QUEUE 时拒绝提交
+- 每个任务在独立子进程中转换，超过 JOB_TIMEOUT 秒时终止子进程并标记为超时失败
+- 任务状态写入 JOBS_DIR/<任务ID>/job.json（原子替换），任意 Web 进程都可查询；
+  结果文件保存在同一目录，超过 JOB_RETENTION 秒的已结束任务在提交新任务时清理
+- 状态查询（get_job）只读取状态文件、立即返回，不在请求中等待任务结束（同步 worker 不会被轮询请求占住）；
+  客户端按 POLL_INTERVAL 秒间隔轮询
+- 转换子进程边写出结果边统计用例数与步骤数（export_stream.count_cases），只解析一次，不保留完整用例列表
+- 团队文件（提交时给出 file_id）与 /api/export 共用导出结果缓存（export_cache）：提交时先查缓存，
+  命中则直接以硬链接生成结果、任务立即完成，不进入队列；排队期间其他请求已写入缓存时，执行前再查一次；
+  未命中时转换结果连同统计字段存入缓存
+- 状态包含排队等待、转换耗时等时间信息；queue_stats() 汇总各状态任务数（队列深度），
+  最近任务不包含任务 ID（持有任务 ID 即可下载结果，ID 只返回给提交者）
+- 任务目录保存上传文件与转换结果，必须是当前用户私有的目录（private_dir.is_private），
+  检查不通过时不提交也不读取任务；结果文件名必须是任务目录下的文件名，不接受路径
+- 所属 Web 进程已退出（如 gunicorn 回收 worker）而仍未结束的任务，在查询时标记为失败
+
+任务状态：queued（排队）-> running（转换中）-> done（完成）/ failed（失败）
+
+配置（环境变量）：
+- XMIND_JOBS_DIR          任务目录，默认 <临时目录>/xmind_jobs-<uid>（须为当前用户私有）
+- XMIND_JOB_WORKERS       每个 Web 进程同时执行的转换数，默认 2
+- XMIND_JOB_MAX_QUEUE     每个 Web 进程最多排队的任务数，默认 50
+- XMIND_JOB_TIMEOUT       单个任务的转换超时（秒），默认 600
+- XMIND_JOB_RETENTION     已结束任务（含结果文件）的保留时间（秒），默认 3600
+"""
+
+import json
+import multiprocessing
+import os
+import queue
+import shutil
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import converter
+import export_cache
+import module_converter_final
+import private_dir
+
+JOBS_DIR = os.environ.get("XMIND_JOBS_DIR") or private_dir.default_dir("xmind_jobs")
+JOB_WORKERS = int(os.environ.get("XMIND_JOB_WORKERS", "2"))
+JOB_MAX_QUEUE = int(os.environ.get("XMIND_JOB_MAX_QUEUE", "50"))
+JOB_TIMEOUT = float(os.environ.get("XMIND_JOB_TIMEOUT", "600"))
+JOB_RETENTION = float(os.environ.get("XMIND_JOB_RETENTION", "3600"))
+
+# 建议客户端轮询任务状态的间隔（秒），随任务状态返回（poll_interval）
+POLL_INTERVAL = 1.0
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+FINISHED_STATES = (JOB_DONE, JOB_FAILED)
+
+_STATE_FILE = "job.json"
+_INPUT_FILE = "input.xmind"
+
+# 导出类型 -> (转换函数, 用例类别, 下载文件名后缀)；模块化用例的文件名由 get_module_export_filename 生成
+JOB_EXPORTS = {
+    "standard": (converter.convert_to_csv, "structured", "_标准CSV.csv"),
+    "zentao": (converter.convert_to_csv, "structured", "_禅道CSV.csv"),
+    "xlsx": (converter.convert_to_xlsx, "structured", "_标准用例.xlsx"),
+    "ndjson": (converter.convert_to_ndjson, "structured", "_用例.ndjson"),
+    "module": (module_converter_final.convert_to_module_csv, "module", None),
+    "module_xlsx": (module_converter_final.convert_to_module_xlsx, "module", None),
+}
+
+
+# 结果文件扩展名 -> MIME 类型（写入导出缓存的元数据，与 /api/export 一致）
+_MIMETYPES = {
+    ".csv": "text/csv",
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ".ndjson": "application/x-ndjson",
+}
+# 随结果写入导出缓存的统计字段
+_STATS_FIELDS = ("case_count", "step_count")
+
+
+class QueueFullError(RuntimeError):
+    """排队任务数已达上限"""
+
+
+def _job_dir(job_id: str) -> str:
+    return os.path.join(JOBS_DIR, job_id)
+
+
+def _private(create: bool = False) -> bool:
+    return private_dir.is_private(JOBS_DIR, create, "转换任务目录")
+
+
+def _is_file_name(name) -> bool:
+    """name 是否为单个文件名（不含目录部分，不是 . 或 ..）"""
+    return (isinstance(name, str) and bool(name) and os.path.basename(name) == name
+            and name not in (os.curdir, os.pardir))
+
+
+def _write_state(state: dict):
+    """原子替换任务状态文件（读取方不会读到写了一半的 JSON）"""
+    path = os.path.join(_job_dir(state["id"]), _STATE_FILE)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _read_state(job_id: str) -> Optional[dict]:
+    try:
+        with open(os.path.join(_job_dir(job_id), _STATE_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _update_state(job_id: str, **changes) -> Optional[dict]:
+    state = _read_state(job_id)
+    if state is None:
+        return None
+    state.update(changes)
+    _write_state(state)
+    return state
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _result_from_cache(job_id: str, file_id: Optional[str], export_type: str) -> bool:
+    """导出缓存命中时以硬链接生成任务结果并标记完成，返回是否命中"""
+    entry = export_cache.lookup_entry(file_id, export_type, "auto") if file_id else None
+    if entry is None:
+        return False
+    output_path = os.path.join(_job_dir(job_id), "result" + os.path.splitext(entry["download_name"])[1])
+    try:
+        export_cache.link_or_copy(entry["path"], output_path)
+    except OSError:
+        # 条目刚好被淘汰：按未命中处理
+        return False
+    stats = {field: entry[field] for field in _STATS_FIELDS if field in entry}
+    now = time.time()
+    _update_state(job_id, status=JOB_DONE, started_at=now, finished_at=now, cached=True,
+                  result_file=os.path.basename(output_path), download_name=entry["download_name"],
+                  size=os.path.getsize(output_path), **stats)
+    return True
+
+
+def _run_job(job_id: str, xmind_file: str, export_type: str, source_name: str, file_id: Optional[str] = None):
+    """子进程：执行转换并写入结果状态（模块级函数，供 multiprocessing 调用）"""
+    convert, kind, suffix = JOB_EXPORTS[export_type]
+    try:
+        if _result_from_cache(job_id, file_id, export_type):
+            return
+        if kind == "module":
+            ext = "xlsx" if export_type == "module_xlsx" else "csv"
+            download_name = module_converter_final.get_module_export_filename(xmind_file, ext=ext)
+        else:
+            download_name = f"{os.path.splitext(source_name)[0]}{suffix}"
+        output_path = os.path.join(_job_dir(job_id), "result" + os.path.splitext(download_name)[1])
+        # 用例数与步骤数在写出的同时统计，不再为统计单独解析
+        stats = {}
+        convert(xmind_file, output_path, parser="auto", stats=stats)
+        if file_id:
+            mimetype = _MIMETYPES.get(os.path.splitext(output_path)[1], "application/octet-stream")
+            export_cache.store_file(file_id, export_type, "auto", output_path, download_name, mimetype,
+                                    extra=stats, keep=True)
+        _update_state(job_id, status=JOB_DONE, finished_at=time.time(),
+                      result_file=os.path.basename(output_path), download_name=download_name,
+                      size=os.path.getsize(output_path), **stats)
+    except Exception as e:
+        _update_state(job_id, status=JOB_FAILED, finished_at=time.time(), error=str(e))
+
+
+class JobQueue:
+    """
+    每个 Web 进程一个任务队列：JOB_WORKERS 个调度线程从队列取任务，每个任务启动一个转换子进程并等待其结束。
+    调度线程在首次提交时启动（gunicorn preload_app 时 fork 之后才启动，fork 后的进程重新启动自己的线程）。
+    """
+
+    def __init__(self, workers: int = None, max_queue: int = None, timeout: float = None):
+        self.workers = workers or JOB_WORKERS
+        self.max_queue = JOB_MAX_QUEUE if max_queue is None else max_queue
+        self.timeout = JOB_TIMEOUT if timeout is None else timeout
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._queue = queue.Queue()
+            for _ in range(self.workers):
+                threading.Thread(target=self._dispatch, daemon=True).start()
+
+    def _dispatch(self):
+        while True:
+            job_id, xmind_file, export_type, source_name, file_id = self._queue.get()
+            try:
+                self._execute(job_id, xmind_file, export_type, source_name, file_id)
+            except Exception as e:
+                _update_state(job_id, status=JOB_FAILED, finished_at=time.time(), error=str(e))
+            finally:
+                self._queue.task_done()
+
+    def _execute(self, job_id: str, xmind_file: str, export_type: str, source_name: str, file_id: Optional[str]):
+        _update_state(job_id, status=JOB_RUNNING, started_at=time.time())
+        process = multiprocessing.Process(target=_run_job,
+                                          args=(job_id, xmind_file, export_type, source_name, file_id), daemon=True)
+        process.start()
+        process.join(self.timeout)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+            _update_state(job_id, status=JOB_FAILED, finished_at=time.time(),
+                          error=f"转换超时（超过 {self.timeout:g} 秒）")
+            return
+        state = _read_state(job_id)
+        if state is not None and state.get("status") not in FINISHED_STATES:
+            _update_state(job_id, status=JOB_FAILED, finished_at=time.time(),
+                          error=f"转换进程异常退出（exitcode={process.exitcode}）")
+
+    def depth(self) -> int:
+        """当前进程中排队（尚未开始）的任务数"""
+        return self._queue.qsize() if self._pid == os.getpid() else 0
+
+    def submit(self, xmind_file: str, export_type: str, source_name: str, move: bool = False,
+               file_id: Optional[str] = None) -> dict:
+        """
+        提交转换任务，立即返回任务状态（status=queued；导出缓存命中时为 done）。
+        xmind_file 复制到任务目录（move=True 时移动，用于已保存的上传文件），转换期间源文件被删除也不受影响。
+        file_id 为团队文件 ID 时读写导出缓存（export_cache）。
+        导出类型不支持时抛出 ValueError，排队任务已满时抛出 QueueFullError，
+        任务目录不是当前用户私有的目录时抛出 PermissionError。
+        """
+        if export_type not in JOB_EXPORTS:
+            raise ValueError(f"不支持的导出类型: {export_type}（可选: {', '.join(JOB_EXPORTS)}）")
+        if not _private(create=True):
+            raise PermissionError(f"转换任务目录 {JOBS_DIR} 不是当前用户私有的目录")
+        self._ensure_started()
+        purge_expired()
+
+        job_id = uuid.uuid4().hex
+        os.makedirs(_job_dir(job_id))
+        state = {
+            "id": job_id,
+            "export_type": export_type,
+            "source_name": source_name,
+            "status": JOB_QUEUED,
+            "owner_pid": os.getpid(),
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+        }
+        _write_state(state)
+        if _result_from_cache(job_id, file_id, export_type):
+            if move:
+                os.remove(xmind_file)
+            return get_job(job_id)
+        if self._queue.qsize() >= self.max_queue:
+            shutil.rmtree(_job_dir(job_id), ignore_errors=True)
+            raise QueueFullError(f"转换队列已满（{self.max_queue} 个任务排队中），请稍后重试")
+
+        input_path = os.path.join(_job_dir(job_id), _INPUT_FILE)
+        if move:
+            shutil.move(xmind_file, input_path)
+        else:
+            shutil.copyfile(xmind_file, input_path)
+        self._queue.put((job_id, input_path, export_type, source_name, file_id))
+        state["position"] = self._queue.qsize()
+        return state
+
+
+def _with_timings(state: dict) -> dict:
+    """补充耗时字段：queue_seconds（排队等待）、run_seconds（转换耗时，进行中为已用时间）"""
+    now = time.time()
+    submitted, started, finished = state.get("submitted_at"), state.get("started_at"), state.get("finished_at")
+    state["queue_seconds"] = round((started or finished or now) - submitted, 3) if submitted else None
+    state["run_seconds"] = round((finished or now) - started, 3) if started else None
+    return state
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    """读取任务状态（含耗时）；所属进程已退出的未结束任务标记为失败。任务不存在时返回 None"""
+    if not _is_file_name(job_id) or not _private():
+        return None
+    state = _read_state(job_id)
+    if state is None:
+        return None
+    if state.get("status") not in FINISHED_STATES and not _pid_alive(state.get("owner_pid", 0)):
+        state = _update_state(job_id, status=JOB_FAILED, finished_at=time.time(),
+                              error="服务进程已重启，任务中断，请重新提交") or state
+    return _with_timings(state)
+
+
+def result_path(state: dict) -> Optional[str]:
+    """已完成任务的结果文件路径（result_file 不是单个文件名时视为无结果，不会指向任务目录之外）"""
+    if state.get("status") != JOB_DONE or not _is_file_name(state.get("result_file")):
+        return None
+    if not _is_file_name(state.get("id")):
+        return None
+    path = os.path.join(_job_dir(state["id"]), state["result_file"])
+    return path if os.path.exists(path) else None
+
+
+def list_jobs() -> List[dict]:
+    """全部任务（各 Web 进程提交的），按提交时间倒序"""
+    if not os.path.isdir(JOBS_DIR) or not _private():
+        return []
+    jobs = [get_job(job_id) for job_id in os.listdir(JOBS_DIR)]
+    return sorted((job for job in jobs if job), key=lambda job: job.get("submitted_at") or 0, reverse=True)
+
+
+def queue_stats(recent: int = 20) -> Dict:
+    """队列深度（各状态任务数）与最近任务的耗时（不含任务 ID）"""
+    jobs = list_jobs()
+    counts = {status: 0 for status in (JOB_QUEUED, JOB_RUNNING, JOB_DONE, JOB_FAILED)}
+    for job in jobs:
+        counts[job["status"]] = counts.get(job["status"], 0) + 1
+    finished = [job["run_seconds"] for job in jobs if job["status"] == JOB_DONE and job["run_seconds"] is not None]
+    return {
+        "counts": counts,
+        "workers_per_process": default_queue.workers,
+        "avg_run_seconds": round(sum(finished) / len(finished), 3) if finished else None,
+        "recent": [{key: job.get(key) for key in ("export_type", "source_name", "status",
+                                                   "queue_seconds", "run_seconds", "error")}
+                   for job in jobs[:recent]],
+    }
+
+
+def purge_expired(retention: float = None):
+    """删除结束时间超过 retention 秒的任务目录（含结果文件）"""
+    retention = JOB_RETENTION if retention is None else retention
+    if not os.path.isdir(JOBS_DIR) or not _private():
+        return
+    now = time.time()
+    for job_id in os.listdir(JOBS_DIR):
+        state = _read_state(job_id)
+        if state and state.get("finished_at") and now - state["finished_at"] > retention:
+            shutil.rmtree(_job_dir(job_id), ignore_errors=True)
+
+
+default_queue = JobQueue()
+
+
+def submit(xmind_file: str, export_type: str, source_name: str, move: bool = False,
+           file_id: Optional[str] = None) -> dict:
+    """向当前进程的默认队列提交任务，参见 JobQueue.submit"""
+    return default_queue.submit(xmind_file, export_type, source_name, move=move, file_id=file_id)
@@ -8,7 +8,9 @@ XMind -> CSV 新模板转换库（增强版）
 - 保持原有业务逻辑：沿用 xmind2testcase 的用例字段与优先级体系
 - 仅重构导出模板结构与多步骤合并规则
 - 新增"解析器自动择优"：若 xmind2testcase 结果明显不全，则优先采用 xmind 库递归解析结果
-  - 也可通过参数强制指定解析器：xmind2 或 xmindlib
+  - 也可通过参数强制指定解析器：xmind2、xmindlib 或 json（直接读取 content.json）
+  - 所有解析器读取同一数据源：文件含 content.json（XMind Zen/2020+）时一律读取 content.json，
+    否则读取 content.xml；xmind / xmind2testcase 库只用于不含 content.json 的文件
 
 必填字段（列顺序严格如下）：
 1) [用例名称]
@@ -24,116 +26,53 @@ import csv
 import os
 import re
 import tempfile
+import time
 import uuid
-from typing import Dict, List, Tuple
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Tuple
 
 import xmind  # 新版 xmind 库
 from xmind2testcase.utils import get_xmind_testcase_list
 
-# 优先级映射：严格沿用原体系（importance -> Priority）
-PRIORITY_MAP = {
-    1: "P0", 2: "P1", 3: "P2", 4: "P3", 5: "P4",
-    "1": "P0", "2": "P1", "3": "P2", "4": "P3", "5": "P4",
-}
+import export_stream
+import parse_cache
+import priority
+import text_normalize
+import xlsx_writer
+import xmind_reader
 
 # 固定用例类型
 CASE_TYPE = "功能测试"
 
-def _normalize_priority(value) -> str:
-    """
-    将多种优先级表示统一为P0-P4；缺失或非法时为P2。
-    支持以下格式：
-    - 1-5, '1'-'5'
-    - P0-P4, p0-p4
-    - 优先级1-5
-    - 高、中、低
-    - High, Medium, Low
-    - Critical, Major, Minor, Trivial
-    """
-    if value is None:
-        return "P2"
-    
-    v = str(value).strip().upper()
-    
-    # 直接是 P0-4
-    if re.fullmatch(r"P[0-4]", v):
-        return v
-    
-    # 纯数字 1-5
-    if re.fullmatch(r"[1-5]", v):
-        return PRIORITY_MAP.get(v, "P2")
-    
-    # 可能是整数
-    try:
-        iv = int(v)
-        if 1 <= iv <= 5:
-            return PRIORITY_MAP.get(iv, "P2")
-    except Exception:
-        pass
-    
-    # 处理"优先级X"格式
-    priority_match = re.search(r'优先级[：:\s]*([1-5])', v)
-    if priority_match:
-        return PRIORITY_MAP.get(priority_match.group(1), "P2")
-    
-    # 处理中文描述
-    if "高" in v or "严重" in v or "紧急" in v:
-        return "P0"
-    if "较高" in v or "重要" in v:
-        return "P1"
-    if "中" in v or "普通" in v:
-        return "P2"
-    if "较低" in v or "次要" in v:
-        return "P3"
-    if "低" in v or "微小" in v or "提示" in v:
-        return "P4"
-    
-    # 处理英文描述
-    if "CRITICAL" in v or "HIGH" in v:
-        return "P0"
-    if "MAJOR" in v:
-        return "P1"
-    if "MEDIUM" in v or "NORMAL" in v:
-        return "P2"
-    if "MINOR" in v:
-        return "P3"
-    if "LOW" in v or "TRIVIAL" in v:
-        return "P4"
-    
-    # 默认返回P2
-    return "P2"
-
-
-def _sanitize_text(text: str) -> str:
-    """基础清洗：去除 None、零宽字符、所有空白符合并为一个空格。适用于单行文本。"""
-    if not text:
-        return ""
-    text = re.sub(r"[\u200B-\u200D\uFEFF]", "", str(text))
-    text = re.sub(r"\s+", " ", text.strip())
-    return text
-
-
-def _sanitize_multiline_text(text: str) -> str:
-    """多行文本清洗：保留换行符，但清理每行的多余空白。"""
-    if not text:
-        return ""
-    text = str(text)
-    # 移除零宽字符
-    text = re.sub(r"[\u200B-\u200D\uFEFF]", "", text)
-    # 对每一行进行处理
-    lines = text.split('\n')
-    processed_lines = [re.sub(r'[ \t]+', ' ', line).strip() for line in lines]
-    # 过滤掉完全是空内容的行
-    processed_lines = [line for line in processed_lines if line]
-    return "\n".join(processed_lines)
-
-
-def _sanitize_module(module: str) -> str:
-    """模块清洗：统一中文括号为英文括号，并进行通用清洗。"""
-    if not module:
-        return "/"
-    module = re.sub(r"[（）]", lambda m: {"（": "(", "）": ")"}.get(m.group(), m.group()), module)
-    return _sanitize_text(module)
+# CSV 表头（新模板）
+CSV_HEADER = ("用例名称", "所属模块", "Priority等级", "用例类型", "前置条件", "用例步骤", "预期结果")
+
+# 行构建批大小：每批用例按列构建后一次性交给 csv.writer.writerows
+ROW_BATCH_SIZE = 2000
+
+# XLSX 导出的列宽（字符数，与 CSV_HEADER 对应）
+XLSX_COLUMN_WIDTHS = (40, 20, 12, 12, 30, 60, 60)
+
+# 用例识别阈值：简单子节点（步骤）占比超过该值时，节点被视为测试用例
+TESTCASE_SIMPLE_RATIO = 0.7
+
+# 转换器版本：解析结果的格式或规则变化时递增，使磁盘解析缓存中的旧结果失效
+CONVERTER_VERSION = "2"
+
+# 设置该环境变量后，每次 auto 选择都打印决策与各分支耗时
+AUTO_REPORT = bool(os.environ.get("XMIND_AUTO_REPORT"))
+
+# 最近一次 auto 选择的决策与各分支耗时（调参用），结构见 _groups_auto
+last_auto_report = {}
+
+# 优先级归一化统一由 priority 提供（预编译正则 + 记忆化，各转换器共用）
+_normalize_priority = priority.normalize_priority
+
+
+# 文本清洗统一由 text_normalize 提供（预编译正则 + 快速路径，各转换器共用）
+_sanitize_text = text_normalize.sanitize_text
+_sanitize_multiline_text = text_normalize.sanitize_multiline_text
+_sanitize_module = text_normalize.sanitize_module
 
 
 # _number_steps_if_needed function is removed as per user's request to remove auto-numbering.
@@ -143,9 +82,26 @@ def _group_from_xmind2testcase(xmind_file: str) -> List[dict]:
     """
     直接将 xmind2testcase 的解析结果转换为列表，不进行去重或合并。
     每个测试用例（即使标题重复）都成为独立条目。
+    含 content.json 的文件与其他解析器一致读取 content.json（xmind_reader 按 xmind2testcase 规则提取），
+    只有 XML 格式的文件才交给 xmind2testcase 库。
     """
-    testcases = get_xmind_testcase_list(xmind_file)
-    all_cases = []
+    return list(_iter_group_from_xmind2testcase(xmind_file))
+
+
+def _iter_group_from_xmind2testcase(xmind_file: str) -> Iterator[dict]:
+    sheets = xmind_reader.load_json_sheets(xmind_file)
+    if sheets is not None:
+        return _iter_cases_from_testcase_list(xmind_reader.iter_testcase_list(sheets))
+    return _iter_cases_from_testcase_list(get_xmind_testcase_list(xmind_file))
+
+
+def _cases_from_testcase_list(testcases: Iterable[dict]) -> List[dict]:
+    """将 xmind2testcase 格式的用例字典列表清洗为内部用例结构。"""
+    return list(_iter_cases_from_testcase_list(testcases))
+
+
+def _iter_cases_from_testcase_list(testcases: Iterable[dict]) -> Iterator[dict]:
+    """_cases_from_testcase_list 的生成器版本"""
     for tc in testcases:
         steps = []
         for step in (tc.get("steps", []) or []):
@@ -155,293 +111,498 @@ def _group_from_xmind2testcase(xmind_file: str) -> List[dict]:
                 steps.append((action, expected))
 
         # 即使没有步骤，也应作为一个用例存在
-        all_cases.append({
+        yield {
             "title": _sanitize_text(tc.get("name", "") or ""),
             "module": _sanitize_module(tc.get("suite", "") or "/"),
             "pre": _sanitize_multiline_text(tc.get("preconditions", "") or "") or "无", # Ensure "无" for empty preconditions
             "prio": _normalize_priority(tc.get("importance")),
             "steps": steps
-        })
-    return all_cases
-
-
-def _extract_priority_from_topic(topic) -> str:
-    """
-    从XMind主题中提取优先级信息。
-    优先级可能存在于：
-    1. 标题中的P0-P4标记
-    2. 标签(markers)中的优先级标识
-    3. 备注(notes)中的优先级信息
-    """
-    # 1. 检查标题中的优先级标记
-    title = topic.getTitle() or ""
-    priority_match = re.search(r'\b(P[0-4]|[1-5])\b', title)
-    if priority_match:
-        return _normalize_priority(priority_match.group(1))
-    
-    # 2. 检查标签(markers)中的优先级
-    markers = topic.getMarkers() or []
-    for marker in markers:
-        marker_id = marker.getMarkerId() if hasattr(marker, 'getMarkerId') else str(marker)
-        # 标签ID通常包含priority或importance字样
-        if 'priority' in marker_id.lower() or 'importance' in marker_id.lower():
-            # 从标签ID中提取数字
-            num_match = re.search(r'(\d+)', marker_id)
-            if num_match:
-                return _normalize_priority(num_match.group(1))
-    
-    # 3. 检查备注中的优先级信息
-    notes = topic.getNotes() or ""
-    priority_in_notes = re.search(r'\b(P[0-4]|优先级[：:]\s*([1-5]))\b', str(notes))
-    if priority_in_notes:
-        if priority_in_notes.group(1).startswith('P'):
-            return _normalize_priority(priority_in_notes.group(1))
-        else:
-            return _normalize_priority(priority_in_notes.group(2))
-    
-    # 默认返回P2
-    return "P2"
+        }
+
+
+_extract_priority_from_topic = priority.from_topic
+
 
 def _group_from_xmindlib(xmind_file: str) -> List[dict]:
     """
     使用新版 xmind 库递归遍历主题，将识别出的每个测试用例（即使标题重复）添加为独立条目。
     增强了优先级提取功能。
+    含 content.json 的文件与其他解析器一致读取 content.json，只有 XML 格式的文件才交给 xmind 库。
     """
+    return list(_iter_group_from_xmindlib(xmind_file))
+
+
+def _iter_group_from_xmindlib(xmind_file: str) -> Iterator[dict]:
+    # 只转换主画布：只构建第一个画布的主题树
+    if xmind_reader.has_content_json(xmind_file):
+        sheet = xmind_reader.first_sheet(xmind_file)
+        return _iter_cases_from_topic_tree(sheet.tree) if sheet else iter(())
     workbook = xmind.load(xmind_file)
     sheet = workbook.getPrimarySheet()
-    root = sheet.getRootTopic()
+    return _iter_cases_from_topic_tree(xmind_reader.tree_from_topic(sheet.getRootTopic()))
 
-    all_cases = []
 
-    def extract(topic, module_path_list: List[str]):
-        if not topic:
-            return
-        raw_title = topic.getTitle() or ""
-        title = _sanitize_text(raw_title)
-        if not title:
-            return
+def _cases_from_topic_tree(tree, threshold: float = None, shape=None) -> List[dict]:
+    """从主题树提取用例列表，规则见 _iter_cases_from_topic_tree"""
+    return list(_iter_cases_from_topic_tree(tree, threshold, shape))
+
 
-        sub_topics = topic.getSubTopics() or []
+def _iter_cases_from_topic_tree(tree, threshold: float = None, shape=None) -> Iterator[dict]:
+    """
+    从主题树（xmind_reader.TopicTree）逐个产出用例（随遍历生成，不积累列表）。
+    使用 xmind_reader.walk_testcases 显式栈遍历，任意深度都不会触发 RecursionError；
+    模块路径通过 PathTable 共享前缀，不再逐层复制路径列表。
+    threshold: 用例识别阈值，默认 TESTCASE_SIMPLE_RATIO
+    shape: 已计算的 xmind_reader.SubtreeShape（可选），避免重复计算
+    """
+    if threshold is None:
+        threshold = TESTCASE_SIMPLE_RATIO
+    titles = tree.titles
+    paths = xmind_reader.PathTable()
+
+    # Heuristic for identifying a test case:
+    # A topic is likely a test case if its children primarily look like steps
+    # (i.e., they are not complex module structures themselves).
+    # We assume a test case's direct children are steps, and steps' children are expected results.
+    # A simple child (step) has a title and no grandchildren, or only leaf grandchildren (expected results);
+    # the counts are precomputed bottom-up by SubtreeShape, so this is a constant-time lookup.
+    # If a high percentage of children are simple, it's likely a test case.
+    # Topics that are not test cases are modules: their titles form the module path of the cases below them.
+    # Traversal starts from root topic's children (root topic is usually project name).
+    for topic, title, path in xmind_reader.walk_testcases(tree, _sanitize_text, threshold, paths, shape):
+        current_module = paths.join(path) or "/"
         
-        # Heuristic for identifying a test case:
-        # A topic is likely a test case if its children primarily look like steps
-        # (i.e., they are not complex module structures themselves).
-        # We assume a test case's direct children are steps, and steps' children are expected results.
-        is_testcase_candidate = False
-        if sub_topics:
-            # Check if children are simple (steps) rather than complex (modules)
-            # A simple child (step) would typically have no grandchildren, or only leaf grandchildren (expected results)
-            simple_children_count = 0
-            for st in sub_topics:
-                if st and st.getTitle(): # Child has a title (potential action)
-                    grandchildren = st.getSubTopics() or []
-                    if not grandchildren or all(not gc.getSubTopics() for gc in grandchildren):
-                        simple_children_count += 1
-            
-            # If a high percentage of children are simple, it's likely a test case
-            if len(sub_topics) > 0 and simple_children_count / len(sub_topics) > 0.7: # Increased threshold
-                is_testcase_candidate = True
+        case_title = title
+        preconditions = ""
+        steps_data = [] # List of (action, expected) tuples
+
+        # Extract preconditions from notes of the test case topic itself (common place)
+        topic_notes = tree.notes[topic]
+        if topic_notes:
+            preconditions = _sanitize_multiline_text(topic_notes)
         
-        # Removed the title_keywords check for robustness, as it might cause false positives for modules.
-
-        if is_testcase_candidate:
-            current_module = "/".join(module_path_list) if module_path_list else "/"
-            
-            case_title = title
-            preconditions = ""
-            steps_data = [] # List of (action, expected) tuples
-
-            # Extract preconditions from notes of the test case topic itself (common place)
-            topic_notes = topic.getNotes()
-            if topic_notes:
-                preconditions = _sanitize_multiline_text(topic_notes)
+        # Iterate through children to find preconditions, steps, and expected results
+        for child_topic in tree.children(topic):
+            child_title = _sanitize_multiline_text(titles[child_topic] or "")
             
-            # Iterate through children to find preconditions, steps, and expected results
-            for child_topic in sub_topics:
-                child_title = _sanitize_multiline_text(child_topic.getTitle() or "")
+            # Special handling for "前置条件" as a child topic
+            if child_title.lower().strip() in ["前置条件", "preconditions"]:
+                # If preconditions already found in notes, append this
+                if preconditions:
+                    preconditions += "\n" + _sanitize_multiline_text(tree.notes[child_topic] or "")
+                else:
+                    preconditions = _sanitize_multiline_text(tree.notes[child_topic] or "")
                 
-                # Special handling for "前置条件" as a child topic
-                if child_title.lower().strip() in ["前置条件", "preconditions"]:
-                    # If preconditions already found in notes, append this
-                    if preconditions:
-                        preconditions += "\n" + _sanitize_multiline_text(child_topic.getNotes() or "")
-                    else:
-                        preconditions = _sanitize_multiline_text(child_topic.getNotes() or "")
-                    
-                    if not preconditions and child_topic.getSubTopics():
-                        # If notes are empty, check first grandchild
-                        first_grandchild = child_topic.getSubTopics()[0]
-                        if first_grandchild:
-                            preconditions = _sanitize_multiline_text(first_grandchild.getTitle() or "")
-                    continue # Skip this child topic, as it's processed as precondition
-
-                # Otherwise, treat as a step
-                action = child_title
-                expected_results_for_step = []
-                # Collect all leaf grandchildren as expected results for this step
-                for gc in (child_topic.getSubTopics() or []):
-                    if gc and not gc.getSubTopics(): # Only collect leaf nodes
-                        expected_results_for_step.append(_sanitize_multiline_text(gc.getTitle() or ""))
-                expected = "\n".join(expected_results_for_step)
-                
-                if action or expected: # Only add if there's actual content
-                    steps_data.append((action, expected))
-            
-            # 提取优先级
-            priority = _extract_priority_from_topic(topic)
+                if not preconditions and not tree.is_leaf(child_topic):
+                    # If notes are empty, check first grandchild
+                    first_grandchild = child_topic + 1
+                    preconditions = _sanitize_multiline_text(titles[first_grandchild] or "")
+                continue # Skip this child topic, as it's processed as precondition
+
+            # Otherwise, treat as a step
+            action = child_title
+            expected_results_for_step = []
+            # Collect all leaf grandchildren as expected results for this step
+            for gc in tree.children(child_topic):
+                if tree.is_leaf(gc): # Only collect leaf nodes
+                    expected_results_for_step.append(_sanitize_multiline_text(titles[gc] or ""))
+            expected = "\n".join(expected_results_for_step)
             
-            all_cases.append({
-                "title": case_title,
-                "module": _sanitize_module(current_module),
-                "pre": preconditions if preconditions else "无", # Ensure "无" for empty preconditions
-                "prio": priority, # 使用提取的优先级
-                "steps": steps_data
-            })
-        else:
-            # Not a test case, continue recursive traversal for modules
-            new_module_path_list = module_path_list + [title]
-            for st in sub_topics:
-                extract(st, new_module_path_list)
+            if action or expected: # Only add if there's actual content
+                steps_data.append((action, expected))
+        
+        # 提取优先级
+        priority = _extract_priority_from_topic(tree, topic)
+        
+        yield {
+            "title": case_title,
+            "module": _sanitize_module(current_module),
+            "pre": preconditions if preconditions else "无", # Ensure "无" for empty preconditions
+            "prio": priority, # 使用提取的优先级
+            "steps": steps_data
+        }
+
+
+def _group_from_json(xmind_file: str) -> List[dict]:
+    """
+    直接读取 XMind Zen/2020+ 的 content.json（标准库 json），按 xmindlib 规则递归提取用例，
+    避免构建 xmind 库的 DOM 对象。旧版 XML 格式文件回退到 _group_from_xmindlib。
+    """
+    return list(_iter_group_from_json(xmind_file))
+
+
+def _iter_group_from_json(xmind_file: str) -> Iterator[dict]:
+    if not xmind_reader.has_content_json(xmind_file):
+        return _iter_group_from_xmindlib(xmind_file)
+    sheet = xmind_reader.first_sheet(xmind_file)
+    return _iter_cases_from_topic_tree(sheet.tree) if sheet else iter(())
+
+
+def _score(cases: Iterable[dict]) -> tuple:
+    """auto 评分：(用例数, 平均步骤数)；逐个消费，可直接作用于生成器"""
+    case_count = 0
+    total_steps = 0
+    for case in cases:
+        case_count += 1
+        total_steps += len(case.get("steps", []))
+    if not case_count:
+        return (0, 0.0)
+    return (case_count, total_steps / case_count)
+
+
+def _count_diff_ratio(n1: int, n2: int) -> float:
+    return abs(n1 - n2) / max(n1, n2, 1)
 
-    # Start traversal from root topic's children (root topic is usually project name)
-    for t in (root.getSubTopics() or []):
-        extract(t, [])
 
-    return all_cases
+def _iter_auto_branch(name: str, sheets, shape=None) -> Iterator[dict]:
+    """auto 模式的一个解析分支：xmind2（全部画布）或 xmindlib（主画布）"""
+    if name == "xmind2":
+        return _iter_cases_from_testcase_list(xmind_reader.iter_testcase_list(sheets))
+    return _iter_cases_from_topic_tree(sheets[0].tree, shape=shape) if sheets else iter(())
+
+
+def _auto_branch_score(name: str, sheets, shape=None) -> tuple:
+    """流式计算一个分支的评分（不保留用例），返回 (评分, 耗时秒数)"""
+    start = time.perf_counter()
+    if name == "xmind2":
+        score = _score(_iter_auto_branch(name, sheets))
+    else:
+        try:
+            score = _score(_iter_auto_branch(name, sheets, shape))
+        except Exception:
+            score = (0, 0.0)
+    return score, time.perf_counter() - start
+
+
+def _score_branches_sequential(sheets, names, report: dict, shape=None) -> Dict[str, tuple]:
+    scores = {}
+    for name in names:
+        score, elapsed = _auto_branch_score(name, sheets, shape)
+        scores[name] = score
+        report["branches"][name] = {"status": "done", "time": elapsed}
+    return scores
 
 
 def _groups_auto(xmind_file: str) -> List[dict]:
     """
-    自动选择解析结果更优的转换器。
+    自动选择解析结果更优的转换器（主画布），选择规则见 _auto_decide。
+    文件只读取解析一次，两种解析策略共享同一棵主题树。
+    """
+    return list(_iter_groups_auto(xmind_file))
+
+
+def _iter_groups_auto(xmind_file: str) -> Iterator[dict]:
+    start = time.perf_counter()
+    return _iter_auto_select(xmind_reader.load_sheets(xmind_file), xmind_file, start)
+
+
+def _auto_select(sheets, source: str = "", start: float = None) -> List[dict]:
+    """在已读取的画布上自动选择解析结果更优的转换器，返回用例列表"""
+    return list(_iter_auto_select(sheets, source, start))
+
+
+def _iter_auto_select(sheets, source: str = "", start: float = None) -> Iterator[dict]:
+    """先决定胜出分支（_auto_decide），再流式产出该分支的用例"""
+    decision, shape = _auto_decide(sheets, source, start)
+    return _iter_auto_branch(decision, sheets, shape)
+
+
+def _auto_decide(sheets, source: str = "", start: float = None) -> tuple:
+    """
+    在已读取的画布上决定采用哪个转换器，返回 (分支名称, SubtreeShape 或 None)。
     评分标准：优先选择用例总数更多的，如果总数接近，则选择平均每组步骤数更大的。
+    xmind2testcase 规则作用于全部 sheets，xmindlib 启发式作用于 sheets[0]。
+
+    选择流程：
+    1. 结构预扫描：按两种规则只计数不构建用例（xmind2testcase 规则 / xmindlib 启发式），
+       用例数即评分中的用例数；相差 10% 及以上时结果已确定，落败的解析器完全跳过
+    2. 用例数接近时需要比较平均步骤数，两个分支依次流式评分（只统计、不保留用例，
+       xmindlib 分支复用预扫描的 SubtreeShape）。不使用进程池：主题树需序列化到子进程，
+       而且已开始执行的任务无法取消，截止时间无从保证
+    随后由调用方流式产出胜出分支的用例。
+    决策与各分支耗时记录在 last_auto_report（设置 XMIND_AUTO_REPORT 环境变量时同时打印）：
+      {"file", "topics", "prescan": {"xmind2", "xmindlib", "time"}, "mode",
+       "branches": {名称: {"status", "time", "cases", "avg_steps"}}, "decision", "total_time"}
+    total_time 为读取文件到做出决策的耗时，不含胜出分支的用例产出。
     """
-    g1 = _group_from_xmind2testcase(xmind_file)
+    if start is None:
+        start = time.perf_counter()
+    report = {"file": source, "topics": len(sheets[0].tree) if sheets else 0, "branches": {}}
+
+    # 1. 结构预扫描
+    scan_start = time.perf_counter()
+    shape = None
+    n1 = xmind_reader.count_testcase_list(sheets)
     try:
-        g2 = _group_from_xmindlib(xmind_file)
+        if sheets:
+            shape = xmind_reader.SubtreeShape(sheets[0].tree)
+            n2 = xmind_reader.count_testcases(sheets[0].tree, _sanitize_text, TESTCASE_SIMPLE_RATIO, shape)
+        else:
+            n2 = 0
     except Exception:
-        g2 = []
-
-    def _score(cases: List[dict]) -> tuple:
-        if not cases:
-            return (0, 0.0)
-        case_count = len(cases)
-        total_steps = sum(len(case.get("steps", [])) for case in cases)
-        avg_steps = total_steps / max(case_count, 1)
-        return (case_count, avg_steps)
-
-    s1 = _score(g1)
-    s2 = _score(g2)
+        n2 = 0
+    report["prescan"] = {"xmind2": n1, "xmindlib": n2, "time": time.perf_counter() - scan_start}
 
     # 策略：用例数相差10%以内时，平均步骤数多的胜出；否则用例数多的胜出。
     # 这有助于在xmindlib解析不全时，仍优先选择用例数完整的xmind2testcase。
-    count_diff_ratio = abs(s1[0] - s2[0]) / max(s1[0], s2[0], 1)
-
-    if count_diff_ratio < 0.1:
-        # 如果用例数接近，则平均步骤数多的更好
-        return g2 if s2[1] > s1[1] else g1
+    if n1 == 0 and n2 == 0:
+        report["mode"] = "empty"
+        decision = "xmind2"
+    elif _count_diff_ratio(n1, n2) >= 0.1:
+        # 用例数差距已决定胜负，只执行胜出方
+        decision = "xmindlib" if n2 > n1 else "xmind2"
+        report["mode"] = "short-circuit"
     else:
-        # 否则，用例数多的更好
-        return g2 if s2[0] > s1[0] else g1
+        report["mode"] = "sequential"
+        scores = _score_branches_sequential(sheets, ["xmind2", "xmindlib"], report, shape)
+        s1 = scores["xmind2"]
+        s2 = scores["xmindlib"]
+        if _count_diff_ratio(s1[0], s2[0]) < 0.1:
+            # 如果用例数接近，则平均步骤数多的更好
+            decision = "xmindlib" if s2[1] > s1[1] else "xmind2"
+        else:
+            # 否则，用例数多的更好
+            decision = "xmindlib" if s2[0] > s1[0] else "xmind2"
+
+        for name, (count, avg_steps) in scores.items():
+            report["branches"][name].update({"cases": count, "avg_steps": avg_steps})
+
+    report["decision"] = decision
+    report["total_time"] = time.perf_counter() - start
+
+    global last_auto_report
+    last_auto_report = report
+    if AUTO_REPORT:
+        print(f"[auto] {format_auto_report(report)}")
+    return decision, shape
+
+
+def format_auto_report(report: dict) -> str:
+    """将 auto 选择报告格式化为单行文本"""
+    prescan = report.get("prescan", {})
+    parts = [
+        f"decision={report.get('decision')}",
+        f"mode={report.get('mode')}",
+        f"topics={report.get('topics')}",
+        f"prescan(xmind2={prescan.get('xmind2')}, xmindlib={prescan.get('xmindlib')}, "
+        f"{prescan.get('time', 0.0):.3f}s)",
+    ]
+    for name, branch in report.get("branches", {}).items():
+        elapsed = branch.get("time")
+        elapsed_text = f"{elapsed:.3f}s" if elapsed is not None else "-"
+        parts.append(f"{name}({branch.get('status')}, {elapsed_text}, cases={branch.get('cases', '-')})")
+    parts.append(f"total={report.get('total_time', 0.0):.3f}s")
+    return " ".join(parts)
+
+
+def build_rows_from_groups(cases: Iterable[dict]) -> List[List[str]]:
+    """根据用例列表构建带表头的 CSV 行，每个用例字典生成一行。"""
+    return list(iter_rows(cases))
 
 
-def build_rows_from_groups(cases: List[dict]) -> List[List[str]]:
-    """根据用例列表构建带表头的 CSV 行，每个用例字典生成一行。"""
-    headers = ["用例名称", "所属模块", "Priority等级", "用例类型", "前置条件", "用例步骤", "预期结果"]
-    rows = [headers]
+def iter_rows(cases: Iterable[dict]) -> Iterator[List[str]]:
+    """build_rows_from_groups 的生成器版本：先产出表头，再逐批产出数据行"""
+    yield list(CSV_HEADER)
+    for batch in iter_row_batches(cases):
+        yield from batch
+
+
+def _module_levels(module_path: str) -> Tuple[str, str]:
+    """所属模块取路径第一段（为空时为 "/"）；第二段（若存在）拼接到用例名称前，不存在时为 None"""
+    module_parts = module_path.split('/')
+    display_module = module_parts[0] or "/"
+    second_level = module_parts[1] if len(module_parts) > 1 else None
+    return display_module, second_level
+
+
+def iter_row_batches(cases: Iterable[dict], batch_size: int = ROW_BATCH_SIZE) -> Iterator[List[List[str]]]:
+    """
+    按列批量构建数据行（不含表头），每批最多 batch_size 行，可直接交给 csv.writer.writerows。
+    每批先把用例拆成列（名称、模块路径、步骤列表 ……），模块路径的一、二级在整个导出中
+    按不同路径只计算一次（同一模块下的用例共享同一路径）。
+    """
+    levels = {}
+    case_iter = iter(cases)
+    while True:
+        batch = list(islice(case_iter, batch_size))
+        if not batch:
+            return
 
+        module_paths = [case.get("module", "/") for case in batch]
+        for module_path in module_paths:
+            if module_path not in levels:
+                levels[module_path] = _module_levels(module_path)
+        step_lists = [case.get("steps", []) for case in batch]
+        # 撤销自动编号，保持原始文本；使用单换行符分隔步骤/预期结果，并确保字段非空
+        steps_texts = ["\n".join([f"{action}" for action, _ in steps if action]).strip() or "无"
+                       for steps in step_lists]
+        expected_texts = ["\n".join([f"{expected}" for _, expected in steps if expected]).strip() or "无"
+                          for steps in step_lists]
+
+        rows = []
+        append = rows.append
+        for case, module_path, steps_text, expected_text in zip(batch, module_paths, steps_texts, expected_texts):
+            display_module, second_level = levels[module_path]
+            title = case.get("title", "")
+            append([
+                title if second_level is None else f"{second_level}{title}",
+                display_module,
+                case.get("prio", "P2"),
+                CASE_TYPE,
+                case.get("pre", ""),
+                steps_text,
+                expected_text,
+            ])
+        yield rows
+
+
+def write_rows(writer, cases: Iterable[dict]) -> int:
+    """写入表头与全部数据行（按批 writerows），返回数据行数"""
+    writer.writerow(CSV_HEADER)
+    count = 0
+    for batch in iter_row_batches(cases):
+        writer.writerows(batch)
+        count += len(batch)
+    return count
+
+
+def iter_case_records(cases: Iterable[dict]) -> Iterator[dict]:
+    """
+    将结构化用例转换为 NDJSON 记录（保留结构，不做 CSV 的展示处理）：
+    - module: 模块路径各段组成的列表（根模块 "/" 为空列表），按不同路径只拆分一次
+    - steps: [{"step": 操作步骤, "expected": 预期结果}, ...]，与解析结果一一对应
+    - title / priority / preconditions 为解析结果原值（用例名称不拼接二级模块）
+    """
+    module_lists = {}
     for case in cases:
-        steps_lines = []
-        expected_lines = []
-
-        # 为每个步骤和预期结果添加换行
-        for action, expected in case.get("steps", []):
-            if action:
-                steps_lines.append(f"{action}")
-            if expected:
-                expected_lines.append(f"{expected}")
-
-        # 撤销自动编号，保持原始文本；并确保字段非空
-        # 确保每个步骤和预期结果之间有换行
-        steps_text = "\n".join(steps_lines).strip()  # 使用单换行符分隔步骤
-        expected_text = "\n".join(expected_lines).strip()  # 使用单换行符分隔预期结果
-        if not steps_text:
-            steps_text = "无"
-        if not expected_text:
-            expected_text = "无"
-
-        full_module_path = case.get("module", "/")
-        module_parts = full_module_path.split('/')
-        
-        display_module = module_parts[0] if module_parts else "/" # Take the first part for "所属模块"
+        module_path = case.get("module", "/")
+        module = module_lists.get(module_path)
+        if module is None:
+            module = module_lists[module_path] = [part for part in module_path.split('/') if part]
+        yield {
+            "title": case.get("title", ""),
+            "module": module,
+            "priority": case.get("prio", "P2"),
+            "type": CASE_TYPE,
+            "preconditions": case.get("pre", ""),
+            "steps": [{"step": action, "expected": expected} for action, expected in case.get("steps", [])],
+        }
+
+
+def _sheet_label(sheet, index: int) -> str:
+    """画布名称（清洗后），为空时使用“画布N”"""
+    return _sanitize_text(sheet.title or "") or f"画布{index + 1}"
+
+
+def _sheet_structured_cases(sheet, index: int, parser: str) -> List[dict]:
+    """
+    提取单个画布的用例，所属模块以画布名称为前缀。
+    模块级函数，供 xmind_reader.map_sheets 在子进程中调用。
+    """
+    if parser == "xmind2":
+        cases = _cases_from_testcase_list(xmind_reader.get_testcase_list([sheet]))
+    elif parser in ("xmindlib", "json"):
+        cases = _cases_from_topic_tree(sheet.tree)
+    else:
+        cases = _auto_select([sheet])
+    label = _sheet_label(sheet, index)
+    for case in cases:
+        module = case["module"]
+        case["module"] = _sanitize_module(label if module in ("", "/") else f"{label}/{module.lstrip('/')}")
+    return cases
 
-        display_title = case.get("title", "")
-        if len(module_parts) > 1:
-            # Prepend the second part of the module path to the title
-            display_title = f"{module_parts[1]}{display_title}"
-        
-        # Ensure display_module is not empty if module_parts was empty
-        if not display_module:
-            display_module = "/"
 
-        rows.append([
-            display_title, # Modified title
-            display_module, # Modified module
-            case.get("prio", "P2"),
-            CASE_TYPE,
-            case.get("pre", ""),
-            steps_text,
-            expected_text,
-        ])
-    return rows
+def _group_all_sheets(xmind_file: str, parser: str) -> List[dict]:
+    return list(_iter_group_all_sheets(xmind_file, parser))
 
 
-def build_rows_from_xmind(xmind_file: str, parser: str = "auto") -> List[List[str]]:
+def _iter_group_all_sheets(xmind_file: str, parser: str) -> Iterator[dict]:
+    """
+    多画布模式：逐个读取画布并在进程池中并行提取（xmind_reader.map_sheets），按画布顺序产出。
+    各画布均基于 xmind_reader 主题树解析（xmindlib 与 json 等价），auto 模式按画布分别择优。
+    """
+    for sheet_cases in xmind_reader.map_sheets(_sheet_structured_cases, xmind_reader.iter_sheets(xmind_file), parser):
+        yield from sheet_cases
+
+
+def build_rows_from_xmind(xmind_file: str, parser: str = "auto", all_sheets: bool = False) -> List[List[str]]:
     """
     将 XMind 文件按新模板规则转换为 CSV 行（含表头）。
     parser:
       - "auto": 自动选择更全面的解析结果（默认）
       - "xmind2": 仅使用 xmind2testcase
       - "xmindlib": 仅使用 xmind 库递归解析
+      - "json": 直接解析 content.json（旧版 XML 文件回退到 xmindlib）
+    all_sheets: 为真时转换全部画布，所属模块以画布名称为前缀（默认仅主画布）
     """
+    return build_rows_from_groups(get_structured_cases(xmind_file, parser=parser, all_sheets=all_sheets))
+
+
+def _parse_structured_cases(xmind_file: str, parser: str, all_sheets: bool = False) -> List[dict]:
+    """按解析器选择执行解析（不经过缓存）"""
+    return list(_iter_parse_structured_cases(xmind_file, parser, all_sheets))
+
+
+def _iter_parse_structured_cases(xmind_file: str, parser: str, all_sheets: bool = False) -> Iterator[dict]:
+    if all_sheets:
+        return _iter_group_all_sheets(xmind_file, parser)
     if parser == "xmind2":
-        cases = _group_from_xmind2testcase(xmind_file)
+        return _iter_group_from_xmind2testcase(xmind_file)
     elif parser == "xmindlib":
-        cases = _group_from_xmindlib(xmind_file)
-    else:
-        cases = _groups_auto(xmind_file)
-
-    return build_rows_from_groups(cases)
+        return _iter_group_from_xmindlib(xmind_file)
+    elif parser == "json":
+        return _iter_group_from_json(xmind_file)
+    return _iter_groups_auto(xmind_file)
 
 
-def get_structured_cases(xmind_file: str, parser: str = "auto") -> List[dict]:
+def get_structured_cases(xmind_file: str, parser: str = "auto", all_sheets: bool = False) -> List[dict]:
     """
     将 XMind 文件解析为结构化的测试用例列表。
     每个用例是一个字典，包含 'title', 'module', 'prio', 'pre', 'steps' 等字段。
     'steps' 是一个列表，每个元素是 (action, expected) 元组。
+    结果按文件内容 SHA-256 + 解析器 + CONVERTER_VERSION（含优先级词汇表标识）写入磁盘缓存
+    （见 parse_cache），同一文件重复导出时跳过解析。
     parser:
       - "auto": 自动选择更全面的解析结果（默认）
       - "xmind2": 仅使用 xmind2testcase
       - "xmindlib": 仅使用 xmind 库递归解析
+      - "json": 直接解析 content.json（旧版 XML 文件回退到 xmindlib）
+    all_sheets: 为真时转换全部画布，所属模块以画布名称为前缀（默认仅主画布）
     """
-    if parser == "xmind2":
-        cases = _group_from_xmind2testcase(xmind_file)
-    elif parser == "xmindlib":
-        cases = _group_from_xmindlib(xmind_file)
-    else:
-        cases = _groups_auto(xmind_file)
-    return cases
+    kind = "structured_all_sheets" if all_sheets else "structured"
+    return parse_cache.cached(xmind_file, kind, parser, CONVERTER_VERSION + priority.vocabulary_tag(),
+                              lambda: _parse_structured_cases(xmind_file, parser, all_sheets))
+
+
+def iter_structured_cases(xmind_file: str, parser: str = "auto", all_sheets: bool = False) -> Iterator[dict]:
+    """
+    get_structured_cases 的生成器版本：随主题树遍历逐个产出用例，不构建完整列表。
+    auto 模式先完成预扫描/评分决策，再流式产出胜出解析器的用例。
+    磁盘缓存命中时逐个产出缓存结果；未命中时边产出边收集，用例数不超过
+    parse_cache.STREAM_CACHE_MAX_ITEMS 时写入缓存。
+    parser、all_sheets 参见 get_structured_cases。
+    """
+    kind = "structured_all_sheets" if all_sheets else "structured"
+    return parse_cache.cached_iter(xmind_file, kind, parser, CONVERTER_VERSION + priority.vocabulary_tag(),
+                                   lambda: _iter_parse_structured_cases(xmind_file, parser, all_sheets))
+
 
+def _counted(cases: Iterator[dict], stats: dict = None) -> Iterator[dict]:
+    """stats 为字典时边产出边统计用例数与步骤数（写出文件的同时统计，不再单独解析）"""
+    return cases if stats is None else export_stream.count_cases(cases, stats)
 
-def convert_to_csv(xmind_file: str, output_path: str = None, parser: str = "auto") -> str:
+
+def convert_to_csv(xmind_file: str, output_path: str = None, parser: str = "auto",
+                   all_sheets: bool = False, stats: dict = None) -> str:
     """
     将 XMind 转换为符合新模板的 CSV 文件。
     - 使用 UTF-8 BOM 编码（utf-8-sig）
     - 默认写入临时目录，可指定 output_path
-    - parser 参见 build_rows_from_xmind
+    - parser、all_sheets 参见 build_rows_from_xmind
+    - 用例边解析边按批写入（iter_structured_cases -> iter_row_batches），内存占用不随用例数增长
+    - stats 传入字典时，写出的同时统计 case_count / step_count（export_stream.count_cases）
     返回：生成的 CSV 文件绝对路径。
     """
-    rows = build_rows_from_groups(get_structured_cases(xmind_file, parser=parser))
-
     if output_path:
         csv_path = os.path.abspath(output_path)
         os.makedirs(os.path.dirname(csv_path), exist_ok=True)
@@ -450,8 +611,115 @@ def convert_to_csv(xmind_file: str, output_path: str = None, parser: str = "auto
         csv_filename = f"{uuid.uuid4()}_new_template.csv"
         csv_path = os.path.join(temp_dir, csv_filename)
 
-    with open(csv_path, "w", encoding="utf-8-sig", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerows(rows)
+    cases = _counted(iter_structured_cases(xmind_file, parser=parser, all_sheets=all_sheets), stats)
+    try:
+        with open(csv_path, "w", encoding="utf-8-sig", newline="") as f:
+            write_rows(csv.writer(f), cases)
+    except Exception:
+        # 解析中途失败时不留下不完整的 CSV
+        if os.path.exists(csv_path):
+            os.remove(csv_path)
+        raise
+
+    return csv_path
+
+
+def convert_to_csv_parts(xmind_file: str, output_path: str = None, parser: str = "auto", all_sheets: bool = False,
+                         max_rows: int = None, max_bytes: int = None) -> List[str]:
+    """
+    convert_to_csv 的分片模式：超过 max_rows 行或 max_bytes 字节（含 BOM 与表头）时切换到下一个分片文件，
+    每个分片重复表头，可分别导入有大小限制的目标（如禅道）。
+    - 分片命名：output_path（默认临时目录下的 {uuid}_new_template.csv）去掉扩展名后追加 _part001、_part002 ……
+    - 用例边解析边写入当前分片，写满即切换（export_stream.write_csv_parts），失败时删除已写出的分片
+    - parser、all_sheets 参见 build_rows_from_xmind
+    返回：各分片文件绝对路径（按顺序）。
+    """
+    if output_path:
+        csv_path = os.path.abspath(output_path)
+        os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+    else:
+        csv_path = os.path.join(tempfile.gettempdir(), f"{uuid.uuid4()}_new_template.csv")
+
+    cases = iter_structured_cases(xmind_file, parser=parser, all_sheets=all_sheets)
+    return export_stream.write_csv_parts(export_stream.numbered_part_path(csv_path), CSV_HEADER,
+                                         iter_row_batches(cases), max_rows=max_rows, max_bytes=max_bytes)
+
+
+def stream_csv(xmind_file: str, parser: str = "auto", all_sheets: bool = False) -> Iterator[bytes]:
+    """
+    convert_to_csv 的流式版本：不写文件，按批产出 UTF-8 BOM CSV 字节块（内容与 convert_to_csv 写出的文件一致），
+    供 Web 接口直接写入 HTTP 响应。首块包含表头与第一批数据行，解析错误在取首块时抛出。
+    parser、all_sheets 参见 build_rows_from_xmind。
+    """
+    cases = iter_structured_cases(xmind_file, parser=parser, all_sheets=all_sheets)
+    return export_stream.iter_csv_bytes(CSV_HEADER, iter_row_batches(cases))
+
+
+def stream_ndjson(xmind_file: str, parser: str = "auto", all_sheets: bool = False) -> Iterator[bytes]:
+    """
+    将 XMind 按 NDJSON（JSON Lines）流式导出：每行一个用例（字段见 iter_case_records），
+    随用例解析定期产出字节块（export_stream.iter_ndjson_bytes），供下游流水线逐行读取。
+    parser、all_sheets 参见 build_rows_from_xmind。
+    """
+    cases = iter_structured_cases(xmind_file, parser=parser, all_sheets=all_sheets)
+    return export_stream.iter_ndjson_bytes(iter_case_records(cases))
+
+
+def convert_to_ndjson(xmind_file: str, output_path: str = None, parser: str = "auto",
+                      all_sheets: bool = False, stats: dict = None) -> str:
+    """
+    将 XMind 转换为 NDJSON 文件（UTF-8，无 BOM）。
+    - 每产出一个字节块即 flush，其他进程可在转换完成前开始读取（如 tail -f）
+    - 默认写入临时目录，可指定 output_path
+    - parser、all_sheets 参见 build_rows_from_xmind
+    - stats 传入字典时，写出的同时统计 case_count / step_count（export_stream.count_cases）
+    返回：生成的 NDJSON 文件绝对路径。
+    """
+    if output_path:
+        ndjson_path = os.path.abspath(output_path)
+        os.makedirs(os.path.dirname(ndjson_path), exist_ok=True)
+    else:
+        ndjson_path = os.path.join(tempfile.gettempdir(), f"{uuid.uuid4()}_new_template.ndjson")
+
+    cases = _counted(iter_structured_cases(xmind_file, parser=parser, all_sheets=all_sheets), stats)
+    try:
+        with open(ndjson_path, "wb") as f:
+            for chunk in export_stream.iter_ndjson_bytes(iter_case_records(cases)):
+                f.write(chunk)
+                f.flush()
+    except Exception:
+        # 解析中途失败时不留下不完整的文件
+        if os.path.exists(ndjson_path):
+            os.remove(ndjson_path)
+        raise
+
+    return ndjson_path
+
+
+def convert_to_xlsx(xmind_file: str, output_path: str = None, parser: str = "auto",
+                    all_sheets: bool = False, stats: dict = None) -> str:
+    """
+    将 XMind 转换为新模板的 XLSX 文件（表头、列与 convert_to_csv 相同）。
+    - 流式写入（xlsx_writer），内存占用不随用例数增长；多行步骤/预期结果为自动换行单元格
+    - 默认写入临时目录，可指定 output_path
+    - parser、all_sheets 参见 build_rows_from_xmind
+    - stats 传入字典时，写出的同时统计 case_count / step_count（export_stream.count_cases）
+    返回：生成的 XLSX 文件绝对路径。
+    """
+    if output_path:
+        xlsx_path = os.path.abspath(output_path)
+        os.makedirs(os.path.dirname(xlsx_path), exist_ok=True)
+    else:
+        xlsx_path = os.path.join(tempfile.gettempdir(), f"{uuid.uuid4()}_new_template.xlsx")
+
+    cases = _counted(iter_structured_cases(xmind_file, parser=parser, all_sheets=all_sheets), stats)
+    try:
+        xlsx_writer.write_xlsx(xlsx_path, CSV_HEADER, iter_row_batches(cases),
+                               sheet_name="测试用例", column_widths=XLSX_COLUMN_WIDTHS)
+    except Exception:
+        # 解析中途失败时不留下不完整的文件
+        if os.path.exists(xlsx_path):
+            os.remove(xlsx_path)
+        raise
 
-    return csv_path
\ No newline at end of file
+    return xlsx_path
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+增量导出：对比同一导图的新旧两个版本，只导出新增、修改、删除的用例
+
+- 每个用例计算两个稳定指纹（blake2b，与进程、Python 版本无关）：
+  - 标识指纹：模块路径 + 用例名称（同一模块下同名用例按出现顺序区分）
+  - 内容指纹：步骤与预期结果、优先级、前置条件
+- 旧版本的用例按标识指纹建立哈希表，新版本的用例流式逐个查表，整体为 O(旧用例数 + 新用例数)：
+  - 标识指纹只在新版本中出现 -> 新增；两者都有但内容指纹不同 -> 修改；只在旧版本中出现 -> 删除
+- 用例名称或模块路径变化视为删除旧用例 + 新增新用例
+- 导出的 CSV 与完整导出的表头、列一致，末尾追加“变更类型”列（新增 / 修改 / 删除）；
+  删除的用例按旧版本内容输出，排在最后
+
+用例类别：structured（标准/禅道 CSV）与 module（模块化用例 CSV）。
+"""
+
+import hashlib
+import os
+import tempfile
+import uuid
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import converter
+import export_stream
+import module_converter_final
+
+DELTA_ADDED = "新增"
+DELTA_CHANGED = "修改"
+DELTA_REMOVED = "删除"
+
+DELTA_COLUMN = "变更类型"
+
+# 用例类别 -> (模块路径字段, 优先级字段, 前置条件字段)
+_CASE_FIELDS = {
+    "structured": ("module", "prio", "pre"),
+    "module": ("custom_module", "priority", "preconditions"),
+}
+DELTA_KINDS = tuple(_CASE_FIELDS)
+
+# 字段分隔符（不会出现在清洗后的用例文本中）
+_UNIT_SEP = "\x1f"
+_RECORD_SEP = "\x1e"
+
+
+def _digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def iter_fingerprints(cases: Iterable[dict], kind: str = "structured") -> Iterator[Tuple[bytes, bytes, dict]]:
+    """逐个产出 (标识指纹, 内容指纹, 用例)；同一模块路径下重名的用例以出现序号区分"""
+    module_key, priority_key, pre_key = _CASE_FIELDS[kind]
+    occurrences = {}
+    for case in cases:
+        name = f"{case.get(module_key) or ''}{_UNIT_SEP}{case.get('title', '')}"
+        seen = occurrences.get(name, 0)
+        occurrences[name] = seen + 1
+        identity = _digest(f"{name}{_UNIT_SEP}{seen}" if seen else name)
+        steps = _RECORD_SEP.join([f"{action}{_UNIT_SEP}{expected}" for action, expected in case.get("steps", [])])
+        content = _digest(f"{case.get(priority_key, '')}{_UNIT_SEP}{case.get(pre_key, '')}{_UNIT_SEP}{steps}")
+        yield identity, content, case
+
+
+def iter_case_delta(old_cases: Iterable[dict], new_cases: Iterable[dict],
+                    kind: str = "structured") -> Iterator[Tuple[str, dict]]:
+    """
+    对比新旧两组用例，产出 (变更类型, 用例)：先按新版本顺序产出新增 / 修改，最后按旧版本顺序产出删除。
+    旧版本只保留指纹与用例的哈希表，新版本流式处理。
+    """
+    _check_kind(kind)
+    old = {identity: (content, case) for identity, content, case in iter_fingerprints(old_cases, kind)}
+    for identity, content, case in iter_fingerprints(new_cases, kind):
+        previous = old.pop(identity, None)
+        if previous is None:
+            yield DELTA_ADDED, case
+        elif previous[0] != content:
+            yield DELTA_CHANGED, case
+    for _, case in old.values():
+        yield DELTA_REMOVED, case
+
+
+def delta_header(kind: str = "structured") -> Tuple[str, ...]:
+    """增量 CSV 表头：完整导出的表头 + 变更类型"""
+    header = module_converter_final.MODULE_CSV_HEADER if kind == "module" else converter.CSV_HEADER
+    return tuple(header) + (DELTA_COLUMN,)
+
+
+def iter_delta_row_batches(changes: Iterable[Tuple[str, dict]], kind: str = "structured",
+                           batch_size: int = converter.ROW_BATCH_SIZE) -> Iterator[List[List[str]]]:
+    """按批构建增量 CSV 数据行：复用完整导出的行构建（converter / module_converter_final），末尾追加变更类型"""
+    build = module_converter_final.iter_module_csv_row_batches if kind == "module" else converter.iter_row_batches
+    change_iter = iter(changes)
+    while True:
+        batch = list(islice(change_iter, batch_size))
+        if not batch:
+            return
+        tags = [tag for tag, _ in batch]
+        rows = next(build([case for _, case in batch], batch_size=len(batch)))
+        for row, tag in zip(rows, tags):
+            row.append(tag)
+        yield rows
+
+
+def _check_kind(kind: str):
+    if kind not in _CASE_FIELDS:
+        raise ValueError(f"不支持的用例类别: {kind}（可选: {', '.join(DELTA_KINDS)}）")
+
+
+def _iter_cases(xmind_file: str, kind: str, parser: str, all_sheets: bool) -> Iterator[dict]:
+    if kind == "module":
+        return module_converter_final.iter_module_cases(xmind_file, parser=parser, all_sheets=all_sheets)
+    return converter.iter_structured_cases(xmind_file, parser=parser, all_sheets=all_sheets)
+
+
+def _iter_file_delta(old_file: str, new_file: str, kind: str, parser: str, all_sheets: bool):
+    _check_kind(kind)
+    return iter_case_delta(_iter_cases(old_file, kind, parser, all_sheets),
+                           _iter_cases(new_file, kind, parser, all_sheets), kind)
+
+
+def stream_delta_csv(old_file: str, new_file: str, kind: str = "structured", parser: str = "auto",
+                     all_sheets: bool = False) -> Iterator[bytes]:
+    """
+    增量 CSV 的流式版本：产出 UTF-8 BOM CSV 字节块，供 Web 接口直接写入 HTTP 响应。
+    旧版本在取首块时完成解析，解析错误在取首块时抛出。
+    parser、all_sheets 参见 converter.build_rows_from_xmind。
+    """
+    changes = _iter_file_delta(old_file, new_file, kind, parser, all_sheets)
+    return export_stream.iter_csv_bytes(delta_header(kind), iter_delta_row_batches(changes, kind))
+
+
+def convert_delta_to_csv(old_file: str, new_file: str, output_path: str = None, kind: str = "structured",
+                         parser: str = "auto", all_sheets: bool = False) -> Tuple[str, Dict[str, int]]:
+    """
+    将新旧两个版本的差异写入 CSV 文件（UTF-8 BOM），默认写入临时目录。
+    返回：(CSV 文件绝对路径, {变更类型: 用例数})
+    """
+    if output_path:
+        csv_path = os.path.abspath(output_path)
+        os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+    else:
+        csv_path = os.path.join(tempfile.gettempdir(), f"{uuid.uuid4()}_delta.csv")
+
+    counts = {DELTA_ADDED: 0, DELTA_CHANGED: 0, DELTA_REMOVED: 0}
+
+    def count(changes):
+        for tag, case in changes:
+            counts[tag] += 1
+            yield tag, case
+
+    changes = count(_iter_file_delta(old_file, new_file, kind, parser, all_sheets))
+    try:
+        with open(csv_path, "wb") as f:
+            for chunk in export_stream.iter_csv_bytes(delta_header(kind), iter_delta_row_batches(changes, kind)):
+                f.write(chunk)
+    except Exception:
+        # 解析中途失败时不留下不完整的 CSV
+        if os.path.exists(csv_path):
+            os.remove(csv_path)
+        raise
+    return csv_path, counts
@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+团队文件导出结果缓存（Web 导出接口使用）
+
+团队文件上传后内容不再变化，同一文件、同一导出类型的结果可以直接复用：
+- 键：团队文件 ID + 导出类型 + 解析器 + 版本（导出格式版本、两个转换器的 CONVERTER_VERSION、优先级词汇表标识）
+- 值：导出的文件原样保存（<文件ID>/<键>.dat），下载文件名与 MIME 类型保存在同名 .json 中；
+  命中时由 Web 框架直接发送文件，不再转换
+- 未命中时流式导出的同时写入缓存（tee）：客户端中途断开或转换失败时丢弃不完整的临时文件；
+  后台转换任务（conversion_jobs）生成的结果以硬链接存入（store_file(keep=True)），与 /api/export 共用缓存
+- 元数据可附带统计字段（如 case_count / step_count），lookup_entry 命中时一并返回
+- 容量：总大小上限 + LRU 淘汰（命中时刷新 mtime，写入后按 mtime 从旧到新删除超限条目）
+- 删除团队文件时调用 invalidate(文件ID) 删除该文件的全部缓存
+- 写入先落临时文件再 os.replace，多进程（gunicorn 多 worker）并发读写安全
+- 目录安全：命中的条目直接作为团队文件的导出结果发送，缓存目录必须是当前用户私有的目录
+  （private_dir.is_private：默认目录按用户区分，以 0700 权限创建），检查不通过时不读写缓存
+
+配置（环境变量，也可调用 configure() 覆盖）：
+- XMIND_EXPORT_CACHE_DIR     缓存目录，默认 <临时目录>/xmind_export_cache-<uid>（须为当前用户私有）
+- XMIND_EXPORT_CACHE_MAX_MB  总大小上限（MB），默认 512；设为 0 关闭缓存
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from typing import Iterable, Iterator, Optional, Tuple
+
+import converter
+import module_converter_final
+import priority
+import private_dir
+
+CACHE_DIR = os.environ.get("XMIND_EXPORT_CACHE_DIR") or private_dir.default_dir("xmind_export_cache")
+CACHE_MAX_BYTES = int(float(os.environ.get("XMIND_EXPORT_CACHE_MAX_MB", "512")) * 1024 * 1024)
+
+# 导出文件格式（表头、编码、XLSX 样式等）变化时递增，使旧缓存失效
+EXPORT_CACHE_VERSION = "1"
+
+_DATA_SUFFIX = ".dat"
+_META_SUFFIX = ".json"
+_TMP_SUFFIX = ".tmp"
+# 超过该时间（秒）仍未完成的临时文件视为进程异常退出的残留，淘汰时删除
+_STALE_TMP_SECONDS = 3600
+
+
+def configure(directory: Optional[str] = None, max_bytes: Optional[int] = None):
+    """修改缓存目录或容量上限（max_bytes=0 关闭缓存）"""
+    global CACHE_DIR, CACHE_MAX_BYTES
+    if directory is not None:
+        CACHE_DIR = directory
+    if max_bytes is not None:
+        CACHE_MAX_BYTES = max_bytes
+
+
+def enabled() -> bool:
+    return CACHE_MAX_BYTES > 0
+
+
+def export_version() -> str:
+    """导出结果版本：导出格式版本 + 两个转换器的版本 + 优先级词汇表标识"""
+    return (f"{EXPORT_CACHE_VERSION}.{converter.CONVERTER_VERSION}.{module_converter_final.CONVERTER_VERSION}"
+            f"{priority.vocabulary_tag()}")
+
+
+def _private(create: bool = False) -> bool:
+    return private_dir.is_private(CACHE_DIR, create, "导出缓存目录")
+
+
+def _file_dir(file_id: str) -> Optional[str]:
+    """单个团队文件的缓存目录；file_id 不是合法的目录名时返回 None"""
+    if not file_id or os.path.basename(file_id) != file_id or file_id.startswith("."):
+        return None
+    return os.path.join(CACHE_DIR, file_id)
+
+
+def _entry_paths(file_id: str, export_type: str, parser: str) -> Optional[Tuple[str, str]]:
+    """(数据文件路径, 元数据文件路径)"""
+    file_dir = _file_dir(file_id)
+    if file_dir is None:
+        return None
+    key = hashlib.sha256(f"{export_type}|{parser}|{export_version()}".encode("utf-8")).hexdigest()[:32]
+    return os.path.join(file_dir, key + _DATA_SUFFIX), os.path.join(file_dir, key + _META_SUFFIX)
+
+
+def lookup(file_id: str, export_type: str, parser: str) -> Optional[Tuple[str, str, str]]:
+    """
+    查找缓存，命中时返回 (数据文件路径, 下载文件名, MIME 类型) 并刷新 mtime 作为 LRU 时间戳；
+    未命中、缓存关闭或读取失败返回 None
+    """
+    entry = lookup_entry(file_id, export_type, parser)
+    return None if entry is None else (entry["path"], entry["download_name"], entry["mimetype"])
+
+
+def lookup_entry(file_id: str, export_type: str, parser: str) -> Optional[dict]:
+    """lookup 的完整版本：命中时返回元数据字典（path、download_name、mimetype 及写入时附带的字段）"""
+    if not enabled() or not _private():
+        return None
+    paths = _entry_paths(file_id, export_type, parser)
+    if paths is None:
+        return None
+    data_path, meta_path = paths
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        os.utime(data_path, None)
+    except (OSError, ValueError):
+        return None
+    meta["path"] = data_path
+    return meta
+
+
+def _commit(file_id: str, export_type: str, parser: str, tmp_path: str,
+            download_name: str, mimetype: str, extra: Optional[dict] = None) -> Optional[str]:
+    """临时文件转为缓存条目（先写元数据，再替换数据文件），返回数据文件路径；失败时删除临时文件并返回 None"""
+    paths = _entry_paths(file_id, export_type, parser)
+    try:
+        if paths is None:
+            raise OSError("invalid file id")
+        data_path, meta_path = paths
+        meta_tmp = f"{meta_path}.{uuid.uuid4().hex}{_TMP_SUFFIX}"
+        with open(meta_tmp, "w", encoding="utf-8") as f:
+            json.dump(dict(extra or {}, download_name=download_name, mimetype=mimetype), f, ensure_ascii=False)
+        os.replace(meta_tmp, meta_path)
+        os.replace(tmp_path, data_path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+    evict()
+    return data_path
+
+
+def _tmp_path(file_id: str) -> Optional[str]:
+    """条目的临时文件路径；file_id 不合法或缓存目录不安全时返回 None"""
+    file_dir = _file_dir(file_id)
+    if file_dir is None or not _private(create=True):
+        return None
+    os.makedirs(file_dir, mode=0o700, exist_ok=True)
+    return os.path.join(file_dir, f".{uuid.uuid4().hex}{_TMP_SUFFIX}")
+
+
+def tee(file_id: str, export_type: str, parser: str, chunks: Iterable[bytes],
+        download_name: str, mimetype: str) -> Iterator[bytes]:
+    """
+    原样产出 chunks，同时写入缓存：全部产出后才成为缓存条目；
+    中途异常或生成器被关闭（客户端断开）时删除临时文件。缓存关闭或写入失败时只转发不缓存。
+    """
+    if not enabled():
+        yield from chunks
+        return
+    try:
+        tmp_path = _tmp_path(file_id)
+        f = open(tmp_path, "wb") if tmp_path else None
+    except OSError:
+        f = None
+    if f is None:
+        yield from chunks
+        return
+    try:
+        with f:
+            for chunk in chunks:
+                f.write(chunk)
+                yield chunk
+    except BaseException:
+        # 包含 GeneratorExit（客户端断开时 Web 框架关闭生成器）
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _commit(file_id, export_type, parser, tmp_path, download_name, mimetype)
+
+
+def store_file(file_id: str, export_type: str, parser: str, path: str,
+               download_name: str, mimetype: str, extra: Optional[dict] = None, keep: bool = False) -> str:
+    """
+    将已生成的导出文件移入缓存，返回应发送的文件路径（缓存条目路径；缓存关闭或写入失败时为原路径）。
+    keep=True 时保留原文件（硬链接，跨文件系统时复制）；extra 为附带写入元数据的字段
+    """
+    if not enabled():
+        return path
+    try:
+        tmp_path = _tmp_path(file_id)
+        if tmp_path is None:
+            return path
+        if keep:
+            link_or_copy(path, tmp_path)
+        else:
+            shutil.move(path, tmp_path)
+    except OSError:
+        return path
+    return _commit(file_id, export_type, parser, tmp_path, download_name, mimetype, extra) or path
+
+
+def link_or_copy(src: str, dst: str):
+    """硬链接 src 到 dst（不复制内容）；跨文件系统或不支持硬链接时复制"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def invalidate(file_id: str):
+    """删除团队文件的全部导出缓存"""
+    file_dir = _file_dir(file_id)
+    if file_dir is not None and _private():
+        shutil.rmtree(file_dir, ignore_errors=True)
+
+
+def evict(max_bytes: Optional[int] = None):
+    """按数据文件 mtime 从旧到新删除条目（连同元数据），直到总大小不超过上限；同时清理残留的临时文件"""
+    if not _private():
+        return
+    limit = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    entries = []
+    total = 0
+    stale_before = time.time() - _STALE_TMP_SECONDS
+    try:
+        with os.scandir(CACHE_DIR) as file_dirs:
+            for file_dir in file_dirs:
+                if not file_dir.is_dir():
+                    continue
+                try:
+                    with os.scandir(file_dir.path) as it:
+                        for entry in it:
+                            is_tmp = entry.name.endswith(_TMP_SUFFIX)
+                            if not is_tmp and not entry.name.endswith(_DATA_SUFFIX):
+                                continue
+                            try:
+                                st = entry.stat()
+                                if is_tmp:
+                                    if st.st_mtime < stale_before:
+                                        os.remove(entry.path)
+                                    continue
+                            except OSError:
+                                continue
+                            entries.append((st.st_mtime, st.st_size, entry.path))
+                            total += st.st_size
+                except OSError:
+                    # 扫描期间该文件的缓存被 invalidate 删除：跳过，继续统计其余目录
+                    continue
+    except OSError:
+        return
+    if total <= limit:
+        return
+    entries.sort()
+    for _, size, path in entries:
+        for entry_path in (path[:-len(_DATA_SUFFIX)] + _META_SUFFIX, path):
+            try:
+                os.remove(entry_path)
+            except OSError:
+                pass
+        total -= size
+        if total <= limit:
+            break
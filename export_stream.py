@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+导出内容的流式编码（供 Web 接口直接写入 HTTP 响应）
+
+行数据按批（converter.iter_row_batches / module_converter_final.iter_module_csv_row_batches）
+编码为 UTF-8 字节块逐块产出：不落临时文件，也不在内存中拼接完整内容，
+首个字节块在第一批用例解析完成后即可发送。
+
+多个导出文件可边生成边打包为 ZIP（iter_zip_bytes）：zipfile 写入不可 seek 的输出时使用数据描述符，
+每个条目的内容按块压缩后立即产出，单个 CSV 与整个压缩包都不在内存中缓冲。
+
+CSV 也可按行数或字节数分片写入多个文件（write_csv_parts），每个分片重复表头，写满即落盘，
+用于有导入大小限制的目标（如禅道导入）。
+
+结构化记录可编码为 NDJSON（iter_ndjson_bytes）：每行一个 JSON 对象，按行数或时间间隔定期产出，
+下游在转换完成前即可开始逐行读取。
+
+写出文件的同时统计用例数与步骤数（count_cases），无需为统计再解析一遍或保留完整用例列表。
+
+配置（环境变量）：
+- XMIND_NDJSON_FLUSH_LINES    NDJSON 每累计多少行产出一次（默认 200）
+- XMIND_NDJSON_FLUSH_SECONDS  距上次产出超过该秒数时，下一行写入后立即产出（默认 1）
+"""
+
+import csv
+import io
+import json
+import os
+import time
+import zipfile
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+UTF8_BOM = "\ufeff"
+
+NDJSON_FLUSH_LINES = int(os.environ.get("XMIND_NDJSON_FLUSH_LINES", "200"))
+NDJSON_FLUSH_SECONDS = float(os.environ.get("XMIND_NDJSON_FLUSH_SECONDS", "1"))
+
+# 紧凑输出，中文不转义为 \uXXXX（JSON 字符串中的换行等控制字符仍会转义，每条记录保持单行）
+_NDJSON_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def iter_csv_bytes(header: Sequence[str], row_batches: Iterable[List[Sequence]],
+                   bom: bool = True) -> Iterator[bytes]:
+    """
+    将表头与按批产出的数据行编码为 CSV 字节块（与 utf-8-sig 写文件的结果逐字节一致）。
+    首块包含 BOM、表头与第一批数据行，因此解析错误会在取首块时抛出，调用方可据此返回错误响应。
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if bom:
+        buffer.write(UTF8_BOM)
+    writer.writerow(header)
+    for batch in row_batches:
+        if not batch:
+            continue
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    # 没有数据行，或最后一批之后仍有未发送内容（仅表头）
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def numbered_part_path(path: str) -> Callable[[int], str]:
+    """分片命名：out.csv -> out_part001.csv、out_part002.csv ……"""
+    root, ext = os.path.splitext(path)
+    return lambda index: f"{root}_part{index:03d}{ext}"
+
+
+def write_csv_parts(part_path: Callable[[int], str], header: Sequence[str], row_batches: Iterable[List[Sequence]],
+                    max_rows: Optional[int] = None, max_bytes: Optional[int] = None, bom: bool = True) -> List[str]:
+    """
+    将 CSV 分片写入多个文件（UTF-8 BOM，每个分片都以表头开头），返回各分片路径。
+    part_path: 分片序号（从 1 开始）-> 文件路径
+    max_rows: 每个分片最多的数据行数；max_bytes: 每个分片最多的字节数（含 BOM 与表头）
+    数据行不会被拆开：单行超过 max_bytes 时单独成为一个分片。没有数据行时只写一个仅含表头的分片。
+    行按批到达即写入当前分片，分片写满后关闭并开始下一个，不等待整个导出完成。
+    写入失败时删除已写出的全部分片。
+    """
+    if max_rows is not None and max_rows < 1:
+        raise ValueError("max_rows 必须大于 0")
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def encode_row(row) -> bytes:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(row)
+        return buffer.getvalue().encode("utf-8")
+
+    header_bytes = (UTF8_BOM.encode("utf-8") if bom else b"") + encode_row(header)
+    if max_bytes is not None and max_bytes <= len(header_bytes):
+        raise ValueError(f"max_bytes 必须大于表头长度（{len(header_bytes)} 字节）")
+
+    paths = []
+    f = None
+    part_rows = part_bytes = 0
+
+    def open_part():
+        nonlocal f, part_rows, part_bytes
+        if f is not None:
+            f.close()
+        path = part_path(len(paths) + 1)
+        paths.append(path)
+        f = open(path, "wb")
+        f.write(header_bytes)
+        part_rows, part_bytes = 0, len(header_bytes)
+
+    try:
+        open_part()
+        for batch in row_batches:
+            pending = []
+            for row in batch:
+                data = encode_row(row)
+                if part_rows and ((max_rows is not None and part_rows >= max_rows) or
+                                  (max_bytes is not None and part_bytes + len(data) > max_bytes)):
+                    f.write(b"".join(pending))
+                    pending.clear()
+                    open_part()
+                pending.append(data)
+                part_rows += 1
+                part_bytes += len(data)
+            f.write(b"".join(pending))
+        f.close()
+    except Exception:
+        if f is not None:
+            f.close()
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+    return paths
+
+
+def iter_ndjson_bytes(records: Iterable[dict], flush_lines: int = None,
+                      flush_seconds: float = None) -> Iterator[bytes]:
+    """
+    将记录编码为 NDJSON（UTF-8，无 BOM，每行一个 JSON 对象）并定期产出字节块。
+    第一条记录单独产出（解析错误在取首块时抛出，下游也能尽早开始读取），之后每累计 flush_lines 行，
+    或距上次产出超过 flush_seconds 秒时产出一次。没有记录时不产出任何内容。
+    """
+    flush_lines = NDJSON_FLUSH_LINES if flush_lines is None else flush_lines
+    flush_seconds = NDJSON_FLUSH_SECONDS if flush_seconds is None else flush_seconds
+    encode = _NDJSON_ENCODER.encode
+    lines = []
+    append = lines.append
+    last_flush = None
+    for record in records:
+        append(encode(record))
+        if last_flush is None or len(lines) >= flush_lines or time.monotonic() - last_flush >= flush_seconds:
+            append("")
+            yield "\n".join(lines).encode("utf-8")
+            lines.clear()
+            last_flush = time.monotonic()
+    if lines:
+        append("")
+        yield "\n".join(lines).encode("utf-8")
+
+
+def count_cases(cases: Iterable[dict], stats: dict) -> Iterator[dict]:
+    """原样产出用例，同时在 stats 中累计 case_count（用例数）与 step_count（步骤数）"""
+    stats["case_count"] = stats["step_count"] = 0
+    case_count = step_count = 0
+    try:
+        for case in cases:
+            case_count += 1
+            step_count += len(case.get("steps", ()))
+            yield case
+    finally:
+        stats["case_count"], stats["step_count"] = case_count, step_count
+
+
+def content_disposition(filename: str) -> str:
+    """附件下载头：ASCII 回退名 + RFC 5987 编码的 UTF-8 文件名（中文文件名）"""
+    filename = filename.replace("/", "_").replace("\\", "_")
+    ascii_name = filename.encode("ascii", "ignore").decode("ascii").replace('"', "").strip() or "export"
+    return f"attachment; filename=\"{ascii_name}\"; filename*=UTF-8''{quote(filename)}"
+
+
+class _ChunkSink:
+    """只写输出：收集 zipfile 写出的字节，由 iter_zip_bytes 逐段取走（不提供 tell/seek，zipfile 按流式格式写入）"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip_bytes(entries: Iterable[Tuple[str, Iterable[bytes]]]) -> Iterator[bytes]:
+    """
+    将 (条目名称, 字节块迭代器) 依次写入 ZIP 并逐段产出压缩后的字节。
+    条目按 entries 的产出顺序写入；某个条目生成失败时保留已写出的部分，
+    并追加 “<条目名称>.error.txt” 记录错误信息，压缩包其余部分不受影响。
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, chunks in entries:
+            error = None
+            with zf.open(name, "w") as entry:
+                try:
+                    for chunk in chunks:
+                        entry.write(chunk)
+                        data = sink.drain()
+                        if data:
+                            yield data
+                except Exception as e:
+                    error = e
+            if error is not None:
+                zf.writestr(f"{name}.error.txt", f"导出失败: {error}")
+            data = sink.drain()
+            if data:
+                yield data
+    yield sink.drain()
+
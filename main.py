@@ -10,30 +10,102 @@ python -m xmind2csv_new_template.main input.xmind -o output.csv
 
 # 脚本执行
 python xmind2csv_new_template/main.py input.xmind -o output.csv
+
+# 转换全部画布（所属模块以画布名称为前缀）
+python main.py input.xmind --all-sheets
+
+# 导出为 Excel（流式写入，多行步骤为自动换行单元格）
+python main.py input.xmind --format xlsx -o output.xlsx
+
+# 按 5000 行或 8MB 分片（output_part001.csv、output_part002.csv ……，每个分片都带表头，便于禅道分批导入）
+python main.py input.xmind -o output.csv --max-rows 5000 --max-mb 8
+
+# 只导出相对旧版本新增 / 修改 / 删除的用例（末列为变更类型）
+python main.py new.xmind --delta-from old.xmind -o delta.csv
+
+# 导出为 NDJSON（每行一个用例，-o - 写到标准输出，边转换边输出，便于管道处理）
+python main.py input.xmind --format ndjson -o - | jq .title
+
+# 追加到 Parquet 数据集目录（需安装 pyarrow；可一次传入多个文件，同一文件重复追加时替换原分片）
+python main.py a.xmind b.xmind --format parquet -o cases_dataset/ --case-kind module
+
+# 多个文件、多种格式打包为一个 ZIP（并发解析，边转换边写入）
+python main.py a.xmind b.xmind --bundle out.zip --formats standard,zentao,module
 """
 
 import argparse
 import os
 import sys
 
-from converter import convert_to_csv
+import bundle_export
+import columnar_export
+import delta_export
+from converter import convert_to_csv, convert_to_csv_parts, convert_to_ndjson, convert_to_xlsx, stream_ndjson
 
 
 def parse_args():
     parser = argparse.ArgumentParser(
         description="XMind -> CSV 新模板转换（保持原业务逻辑，重构导出模板，支持解析器自动择优）"
     )
-    parser.add_argument("xmind_file", help="输入的 .xmind 文件路径")
+    parser.add_argument("xmind_files", nargs="+", metavar="xmind_file",
+                        help="输入的 .xmind 文件路径（多个文件需配合 --bundle 或 --format parquet）")
     parser.add_argument(
         "-o", "--output",
-        help="输出 CSV 文件路径（可选，不提供则写入临时目录）",
+        help="输出文件路径（可选，不提供则写入临时目录）",
         default=None
     )
     parser.add_argument(
         "--parser",
-        choices=["auto", "xmind2", "xmindlib"],
+        choices=["auto", "xmind2", "xmindlib", "json"],
         default="auto",
-        help="选择解析器：auto(默认，自动择优) / xmind2(仅 xmind2testcase) / xmindlib(仅 xmind 库)"
+        help="选择解析器：auto(默认，自动择优) / xmind2(仅 xmind2testcase) / xmindlib(仅 xmind 库) / json(直接解析 content.json)"
+    )
+    parser.add_argument(
+        "--all-sheets",
+        action="store_true",
+        help="转换全部画布（默认仅主画布），各画布并行解析，所属模块以画布名称为前缀"
+    )
+    parser.add_argument(
+        "--format",
+        choices=["csv", "xlsx", "ndjson", "parquet"],
+        default="csv",
+        help="输出格式：csv(默认，UTF-8 BOM) / xlsx(Excel，流式写入) / ndjson(每行一个 JSON 用例，-o - 输出到标准输出)"
+             " / parquet(追加到 -o 指定的数据集目录，需安装 pyarrow)"
+    )
+    parser.add_argument(
+        "--max-rows",
+        type=int,
+        default=None,
+        help="CSV 分片：每个分片最多的数据行数，超过后写入下一个分片（每个分片都带表头）"
+    )
+    parser.add_argument(
+        "--max-mb",
+        type=float,
+        default=None,
+        help="CSV 分片：每个分片最大的文件大小（MB，含表头），可与 --max-rows 同时使用"
+    )
+    parser.add_argument(
+        "--delta-from",
+        metavar="OLD_XMIND",
+        default=None,
+        help="增量导出：只导出相对该旧版本新增 / 修改 / 删除的用例（CSV，末列为变更类型）"
+    )
+    parser.add_argument(
+        "--case-kind",
+        choices=list(columnar_export.COLUMNAR_KINDS),
+        default="structured",
+        help="parquet / 增量导出的用例类别：structured(默认，标准/禅道用例) / module(模块化用例)"
+    )
+    parser.add_argument(
+        "--bundle",
+        metavar="ZIP",
+        default=None,
+        help="将全部输入文件按 --formats 导出并打包为该 ZIP 文件（仅支持 auto / json 解析器）"
+    )
+    parser.add_argument(
+        "--formats",
+        default="standard",
+        help=f"打包导出的格式，逗号分隔：{' / '.join(bundle_export.BUNDLE_FORMATS)}（默认 standard）"
     )
     return parser.parse_args()
 
@@ -41,14 +113,96 @@ def parse_args():
 def main():
     args = parse_args()
 
-    xmind_file = os.path.abspath(args.xmind_file)
-    if not os.path.exists(xmind_file):
-        print(f"输入文件不存在：{xmind_file}")
+    xmind_files = [os.path.abspath(path) for path in args.xmind_files]
+    for xmind_file in xmind_files:
+        if not os.path.exists(xmind_file):
+            print(f"输入文件不存在：{xmind_file}")
+            sys.exit(1)
+
+    if args.bundle:
+        formats = [fmt.strip() for fmt in args.formats.split(",") if fmt.strip()]
+        sources = [(path, os.path.basename(path)) for path in xmind_files]
+        try:
+            zip_path = bundle_export.write_bundle(args.bundle, sources, formats,
+                                                  parser=args.parser, all_sheets=args.all_sheets)
+            print(f"已生成 ZIP：{zip_path}")
+        except Exception as e:
+            print(f"转换失败：{e}")
+            sys.exit(2)
+        return
+
+    if args.format == "parquet":
+        if not columnar_export.available():
+            print("parquet 导出需要安装 pyarrow：pip install pyarrow")
+            sys.exit(1)
+        if not args.output:
+            print("parquet 导出需要通过 -o 指定数据集目录")
+            sys.exit(1)
+        failed = False
+        for xmind_file in xmind_files:
+            try:
+                part_path, count = columnar_export.append_to_dataset(
+                    args.output, xmind_file, kind=args.case_kind, parser=args.parser, all_sheets=args.all_sheets)
+                print(f"已追加 {count} 条用例：{part_path}")
+            except Exception as e:
+                print(f"转换失败：{xmind_file}：{e}")
+                failed = True
+        if failed:
+            sys.exit(2)
+        return
+
+    if len(xmind_files) > 1:
+        print("多个输入文件需配合 --bundle 打包导出（parquet 格式可直接追加多个文件）")
         sys.exit(1)
+    xmind_file = xmind_files[0]
+
+    if args.format == "ndjson" and args.output == "-":
+        # 写到标准输出：每个字节块立即 flush，下游可边读边处理；提示信息写到标准错误
+        try:
+            out = sys.stdout.buffer
+            for chunk in stream_ndjson(xmind_file, parser=args.parser, all_sheets=args.all_sheets):
+                out.write(chunk)
+                out.flush()
+        except Exception as e:
+            print(f"转换失败：{e}", file=sys.stderr)
+            sys.exit(2)
+        return
+
+    if args.delta_from:
+        old_file = os.path.abspath(args.delta_from)
+        if not os.path.exists(old_file):
+            print(f"旧版本文件不存在：{old_file}")
+            sys.exit(1)
+        try:
+            output_path, counts = delta_export.convert_delta_to_csv(
+                old_file, xmind_file, args.output, kind=args.case_kind, parser=args.parser, all_sheets=args.all_sheets)
+            summary = "，".join(f"{tag} {count}" for tag, count in counts.items())
+            print(f"已生成增量 CSV（{summary}）：{output_path}")
+        except Exception as e:
+            print(f"转换失败：{e}")
+            sys.exit(2)
+        return
+
+    if args.max_rows or args.max_mb:
+        if args.format != "csv":
+            print("--max-rows / --max-mb 仅适用于 csv 格式")
+            sys.exit(1)
+        try:
+            max_bytes = int(args.max_mb * 1024 * 1024) if args.max_mb else None
+            part_paths = convert_to_csv_parts(xmind_file, args.output, parser=args.parser, all_sheets=args.all_sheets,
+                                              max_rows=args.max_rows, max_bytes=max_bytes)
+            print(f"已生成 {len(part_paths)} 个 CSV 分片：")
+            for part_path in part_paths:
+                print(f"  {part_path}")
+        except Exception as e:
+            print(f"转换失败：{e}")
+            sys.exit(2)
+        return
 
     try:
-        csv_path = convert_to_csv(xmind_file, args.output, parser=args.parser)
-        print(f"已生成 CSV：{csv_path}")
+        convert = {"xlsx": convert_to_xlsx, "ndjson": convert_to_ndjson}.get(args.format, convert_to_csv)
+        output_path = convert(xmind_file, args.output, parser=args.parser, all_sheets=args.all_sheets)
+        print(f"已生成 {args.format.upper()}：{output_path}")
     except Exception as e:
         print(f"转换失败：{e}")
         sys.exit(2)
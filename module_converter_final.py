@@ -25,114 +25,70 @@ import re
 import tempfile
 import uuid
 import datetime
-from typing import Dict, List, Tuple, Optional, Any
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Tuple, Optional, Any
 
 import xmind
 from xmind2testcase.utils import get_xmind_testcase_list
 
+import export_stream
+import parse_cache
+import priority
+import text_normalize
+import xlsx_writer
+import xmind_reader
 
-def _sanitize_text(text: str) -> str:
-    """基础清洗：去除 None、零宽字符、所有空白符合并为一个空格"""
-    if not text:
-        return ""
-    text = re.sub(r"[\u200B-\u200D\uFEFF]", "", str(text))
-    text = re.sub(r"\s+", " ", text.strip())
-    return text
+# 用例识别阈值：简单子节点（步骤）占比超过该值时，节点被视为测试用例
+TESTCASE_SIMPLE_RATIO = 0.6
 
+# 转换器版本：解析结果的格式或规则变化时递增，使磁盘解析缓存中的旧结果失效
+CONVERTER_VERSION = "2"
 
-def _sanitize_multiline_text(text: str) -> str:
-    """多行文本清洗：保留换行符，但清理每行的多余空白"""
-    if not text:
-        return ""
-    text = str(text)
-    text = re.sub(r"[\u200B-\u200D\uFEFF]", "", text)
-    lines = text.split('\n')
-    processed_lines = [re.sub(r'[ \t]+', ' ', line).strip() for line in lines]
-    processed_lines = [line for line in processed_lines if line]
-    return "\n".join(processed_lines)
+# CSV 表头
+MODULE_CSV_HEADER = ("模块", "自定义分级模块", "用例名称", "priority", "前置条件", "用例步骤", "预期结果")
 
+# XLSX 导出的列宽（字符数，与 MODULE_CSV_HEADER 对应）
+MODULE_XLSX_COLUMN_WIDTHS = (15, 20, 40, 10, 30, 60, 60)
 
-def _normalize_priority(value) -> str:
-    """
-    将多种优先级表示统一为P0-P4格式
-    支持：1-5, P0-P4, 高中低, High/Medium/Low等
-    """
-    if value is None:
-        return "P2"
-    
-    v = str(value).strip().upper()
-    
-    # 直接是 P0-4
-    if re.fullmatch(r"P[0-4]", v):
-        return v
-    
-    # 纯数字 1-5
-    if re.fullmatch(r"[1-5]", v):
-        priority_map = {"1": "P0", "2": "P1", "3": "P2", "4": "P3", "5": "P4"}
-        return priority_map.get(v, "P2")
-    
-    # 可能是整数
-    try:
-        iv = int(v)
-        if 1 <= iv <= 5:
-            priority_map = {1: "P0", 2: "P1", 3: "P2", 4: "P3", 5: "P4"}
-            return priority_map.get(iv, "P2")
-    except Exception:
-        pass
-    
-    # 处理"优先级X"格式
-    priority_match = re.search(r'优先级[：:\s]*([1-5])', v)
-    if priority_match:
-        priority_map = {"1": "P0", "2": "P1", "3": "P2", "4": "P3", "5": "P4"}
-        return priority_map.get(priority_match.group(1), "P2")
-    
-    # 处理中文描述
-    if "高" in v or "严重" in v or "紧急" in v:
-        return "P0"
-    if "较高" in v or "重要" in v:
-        return "P1"
-    if "中" in v or "普通" in v:
-        return "P2"
-    if "较低" in v or "次要" in v:
-        return "P3"
-    if "低" in v or "微小" in v or "提示" in v:
-        return "P4"
-    
-    # 处理英文描述
-    if "CRITICAL" in v or "HIGH" in v:
-        return "P0"
-    if "MAJOR" in v:
-        return "P1"
-    if "MEDIUM" in v or "NORMAL" in v:
-        return "P2"
-    if "MINOR" in v:
-        return "P3"
-    if "LOW" in v or "TRIVIAL" in v:
-        return "P4"
-    
-    return "P2"
+# 行构建批大小：每批用例按列构建后一次性交给 csv.writer.writerows
+ROW_BATCH_SIZE = 2000
+# 行构建时格式化结果的缓存条数上限（按不同文本计）
+_TEXT_MEMO_SIZE = 4096
 
 
-def _extract_module_name(xmind_file: str) -> str:
+# 文本清洗统一由 text_normalize 提供（预编译正则 + 快速路径，各转换器共用）
+_sanitize_text = text_normalize.sanitize_text
+_sanitize_multiline_text = text_normalize.sanitize_multiline_text
+
+
+# 优先级归一化统一由 priority 提供（预编译正则 + 记忆化，各转换器共用）
+_normalize_priority = priority.normalize_priority
+
+
+def _extract_module_name(xmind_file: str, tree=None) -> str:
     """
     规则1：模块字段提取
     优先使用XMind一级主标题，如果获取失败则使用文件名
+    tree: 已解析的主题树（xmind_reader.TopicTree，可选），提供时不再重复加载文件
     """
     try:
-        # 尝试从XMind文件中提取一级主标题
-        workbook = xmind.load(xmind_file)
-        sheet = workbook.getPrimarySheet()
-        if sheet:
-            root = sheet.getRootTopic()
-            if root:
-                root_title = root.getTitle()
-                if root_title and root_title.strip():
-                    return _sanitize_text(root_title.strip())
+        # 尝试从XMind文件中提取一级主标题（按文件内容缓存，重复导出时不再加载）
+        if tree is None:
+            root_title = parse_cache.cached(xmind_file, "root_title", "xmind_reader", CONVERTER_VERSION,
+                                            lambda: _read_root_title(xmind_file))
+        else:
+            root_title = tree.titles[0]
+        if root_title and root_title.strip():
+            return _sanitize_text(root_title.strip())
     except Exception:
         # 如果提取失败，使用文件名
         pass
     
-    # 备用方案：使用文件名（去掉UUID前缀和扩展名）
+    return _module_name_from_filename(xmind_file)
+
+
+def _module_name_from_filename(xmind_file: str) -> str:
+    """备用方案：使用文件名（去掉UUID前缀和扩展名）"""
     filename = os.path.basename(xmind_file)
     # 去掉UUID前缀（如果存在）
     if '_' in filename:
@@ -144,111 +100,28 @@ def _extract_module_name(xmind_file: str) -> str:
     return _sanitize_text(module_name)
 
 
-def _extract_priority_from_topic(topic) -> str:
-    """从XMind主题中提取优先级信息 - 修复版本"""
-    # 1. 检查标题中的优先级标记
-    title = topic.getTitle() or ""
-    priority_match = re.search(r'\b(P[0-4]|[1-5])\b', title)
-    if priority_match:
-        return _normalize_priority(priority_match.group(1))
-    
-    # 2. 检查标签(markers)中的优先级 - 修复类型错误
-    try:
-        markers = topic.getMarkers() or []
-        for marker in markers:
-            try:
-                # 安全获取marker ID
-                if hasattr(marker, 'getMarkerId'):
-                    marker_id = str(marker.getMarkerId())
-                else:
-                    marker_id = str(marker)
-                
-                # 检查优先级相关标记
-                if marker_id and ('priority' in marker_id.lower() or 'importance' in marker_id.lower()):
-                    num_match = re.search(r'(\d+)', marker_id)
-                    if num_match:
-                        return _normalize_priority(num_match.group(1))
-            except Exception:
-                # 忽略单个marker的错误，继续处理下一个
-                continue
-    except Exception:
-        # 忽略markers处理错误
-        pass
-    
-    # 3. 检查备注中的优先级信息
-    try:
-        notes = topic.getNotes() or ""
-        priority_in_notes = re.search(r'\b(P[0-4]|优先级[：:]\s*([1-5]))\b', str(notes))
-        if priority_in_notes:
-            if priority_in_notes.group(1).startswith('P'):
-                return _normalize_priority(priority_in_notes.group(1))
-            else:
-                return _normalize_priority(priority_in_notes.group(2))
-    except Exception:
-        pass
-    
-    return "P2"
+def _read_root_title(xmind_file: str) -> str:
+    """读取第一个画布的中心主题标题"""
+    sheet = xmind_reader.first_sheet(xmind_file)
+    return (sheet.tree.titles[0] or "") if sheet else ""
+
 
+_extract_priority_from_topic = priority.from_topic
 
-def _extract_custom_module_path(topic, path_list: List[str]) -> str:
+
+def _extract_custom_module_path(paths, path: int) -> str:
     """
     规则2：自定义分级模块提取
-    构建层级路径，用"/"分隔符连接
+    构建层级路径，用"/"分隔符连接（paths 为 xmind_reader.PathTable，顶层用例返回空字符串）
     """
-    if not path_list:
-        return ""
-    return "/".join(path_list)
+    return paths.join(path, "/")
 
 
-def _completely_remove_quotes(text: str) -> str:
-    """
-    完全去除文本中的所有引号 - 专门解决双引号问题
-    
-    包含所有可能的引号类型，进行多轮彻底清理
-    """
-    if not text:
-        return ""
-    
-    # 最全面的引号字符列表
-    all_quote_chars = [
-        # 基本引号
-        '"', "'", '`',
-        # 中文引号
-        '"', '"', ''', ''',
-        # 其他语言引号
-        '«', '»', '‹', '›', '„', '‚', '‛', '‟', '´', '‵',
-        # 角括号类
-        '〈', '〉', '《', '》', '「', '」', '『', '』',
-        # 方括号类（可选，根据需要）
-        '【', '】', '〔', '〕',
-        # 其他特殊引号
-        '⌈', '⌉', '⌊', '⌋', '❝', '❞', '❮', '❯'
-    ]
-    
-    # 进行5轮彻底清理，确保完全去除
-    for round_num in range(5):
-        text = text.strip()
-        
-        # 去除首尾引号（多轮处理嵌套引号）
-        changed = True
-        while changed:
-            changed = False
-            original_text = text
-            for quote in all_quote_chars:
-                if len(text) > 1 and text.startswith(quote) and text.endswith(quote):
-                    text = text[1:-1].strip()
-                    changed = True
-                    break
-            if text == original_text:
-                break
-        
-        # 去除文本中间的所有引号
-        for quote in all_quote_chars:
-            text = text.replace(quote, '')
-        
-        text = text.strip()
-    
-    return text
+# 引号清理：text_normalize.remove_quotes 为单遍线性实现，输出与原 5 轮循环版本一致
+_completely_remove_quotes = text_normalize.remove_quotes
+
+# 已有序号的步骤行（数字 + 点号/顿号开头）
+_NUMBERED_LINE = re.compile(r'^(\d+)[\.\、]\s*(.*)')
 
 
 def _format_step_text(text: str) -> str:
@@ -266,6 +139,9 @@ def _format_step_text(text: str) -> str:
     
     # 使用专门的引号清理函数
     text = _completely_remove_quotes(text)
+    # 第一次清理已删除全部引号字符；若结果也不含 ", "，其各行、各段及重新拼接的结果
+    # 再清理都只相当于 strip，此时跳过后续的重复清理（输出不变）
+    clean = _completely_remove_quotes if text_normalize.COMMA_SPACE in text else str.strip
     
     # 按换行符分割成多行
     lines = text.split('\n')
@@ -278,20 +154,20 @@ def _format_step_text(text: str) -> str:
             continue
         
         # 对每一行再次进行引号清理
-        line = _completely_remove_quotes(line)
+        line = clean(line)
         
         if not line:
             continue
         
         # 检查是否已经有序号（数字+点号开头）
-        existing_number_match = re.match(r'^(\d+)[\.\、]\s*(.*)', line)
+        existing_number_match = _NUMBERED_LINE.match(line)
         if existing_number_match:
             # 已有序号，保留原序号但确保格式统一
             num, content = existing_number_match.groups()
             content = content.strip()
             
             # 对内容再次清理引号
-            content = _completely_remove_quotes(content)
+            content = clean(content)
             
             if content:
                 formatted_lines.append(f"{num}.{content}")
@@ -303,7 +179,7 @@ def _format_step_text(text: str) -> str:
     
     # 最终结果再次清理
     result = '\n'.join(formatted_lines)
-    result = _completely_remove_quotes(result)
+    result = clean(result)
     
     return result
 
@@ -312,106 +188,136 @@ def _parse_module_cases_from_xmind(xmind_file: str) -> List[Dict[str, Any]]:
     """
     使用xmind库解析XMind文件，按照模块化用例规则提取数据
     """
+    return list(_iter_module_cases_from_xmind(xmind_file))
+
+
+def _iter_module_cases_from_xmind(xmind_file: str) -> Iterator[Dict[str, Any]]:
+    # 只在产出第一个用例之前吞掉错误（视为无用例，auto 模式随后改用 xmind2testcase）；
+    # 已产出部分用例后出错则向上抛出，调用方删除不完整的导出文件，解析缓存也不会写入部分结果
+    produced = False
     try:
+        # 含 content.json 的文件与其他解析器一致读取 content.json，只有 XML 格式的文件才交给 xmind 库
+        if xmind_reader.has_content_json(xmind_file):
+            for case in _iter_module_cases_from_json(xmind_file):
+                produced = True
+                yield case
+            return
         workbook = xmind.load(xmind_file)
         sheet = workbook.getPrimarySheet()
         if sheet is None:
-            return []
-        root = sheet.getRootTopic()
+            return
+        tree = xmind_reader.tree_from_topic(sheet.getRootTopic())
+        for case in _iter_module_cases_from_topic_tree(tree, _extract_module_name(xmind_file, tree)):
+            produced = True
+            yield case
         
-        module_name = _extract_module_name(xmind_file)
-        all_cases = []
+    except Exception as e:
+        if produced:
+            raise
+        print(f"解析XMind文件时出错: {str(e)}")
+
+
+def _parse_module_cases_from_json(xmind_file: str) -> List[Dict[str, Any]]:
+    """
+    直接读取 XMind Zen/2020+ 的 content.json（标准库 json）提取模块化用例，
+    不构建 xmind 库的 DOM 对象。旧版 XML 格式文件回退到 _parse_module_cases_from_xmind。
+    """
+    return list(_iter_module_cases_from_json(xmind_file))
+
+
+def _iter_module_cases_from_json(xmind_file: str) -> Iterator[Dict[str, Any]]:
+    # 错误处理同 _iter_module_cases_from_xmind：产出第一个用例之后的错误向上抛出
+    produced = False
+    try:
+        if not xmind_reader.has_content_json(xmind_file):
+            for case in _iter_module_cases_from_xmind(xmind_file):
+                produced = True
+                yield case
+            return
+        # 只转换主画布：只构建第一个画布的主题树
+        sheet = xmind_reader.first_sheet(xmind_file)
+        if sheet is None:
+            return
+        tree = sheet.tree
+        for case in _iter_module_cases_from_topic_tree(tree, _extract_module_name(xmind_file, tree)):
+            produced = True
+            yield case
         
-        def extract_cases(topic, module_path_list: List[str]):
-            if not topic:
-                return
-                
-            raw_title = topic.getTitle() or ""
-            title = _sanitize_text(raw_title)
-            if not title:
-                return
-            
-            sub_topics = topic.getSubTopics() or []
+    except Exception as e:
+        if produced:
+            raise
+        print(f"解析XMind文件时出错: {str(e)}")
+
+
+def _module_cases_from_topic_tree(tree, module_name: str, threshold: float = None) -> List[Dict[str, Any]]:
+    """从主题树提取模块化用例列表，规则见 _iter_module_cases_from_topic_tree"""
+    return list(_iter_module_cases_from_topic_tree(tree, module_name, threshold))
+
+
+def _iter_module_cases_from_topic_tree(tree, module_name: str, threshold: float = None) -> Iterator[Dict[str, Any]]:
+    """
+    从主题树（xmind_reader.TopicTree）逐个产出模块化用例（随遍历生成，不积累列表）。
+    使用 xmind_reader.walk_testcases 显式栈遍历，任意深度都不会触发 RecursionError；
+    模块路径通过 PathTable 共享前缀，不再逐层复制路径列表。
+    threshold: 用例识别阈值，默认 TESTCASE_SIMPLE_RATIO
+    """
+    if threshold is None:
+        threshold = TESTCASE_SIMPLE_RATIO
+    titles = tree.titles
+    paths = xmind_reader.PathTable()
+    
+    # 判断是否为测试用例节点
+    # 启发式规则：如果子节点主要是步骤类型（简单节点），则当前节点是测试用例
+    # 简单节点计数已由 SubtreeShape 自底向上预计算，此处为常数时间查询
+    # 非用例节点视为模块节点，其标题构成下层用例的自定义分级模块；从根节点的子节点开始遍历
+    for topic, title, path in xmind_reader.walk_testcases(tree, _sanitize_text, threshold, paths):
+        custom_module_path = _extract_custom_module_path(paths, path)
+        
+        # 提取前置条件
+        preconditions = ""
+        topic_notes = tree.notes[topic]
+        if topic_notes:
+            preconditions = _sanitize_multiline_text(topic_notes)
+        
+        # 提取步骤和预期结果
+        steps_data = []
+        for child_topic in tree.children(topic):
+            child_title = _sanitize_multiline_text(titles[child_topic] or "")
             
-            # 判断是否为测试用例节点
-            # 启发式规则：如果子节点主要是步骤类型（简单节点），则当前节点是测试用例
-            is_testcase = False
-            if sub_topics:
-                simple_children_count = 0
-                for st in sub_topics:
-                    if st and st.getTitle():
-                        grandchildren = st.getSubTopics() or []
-                        if not grandchildren or all(not gc.getSubTopics() for gc in grandchildren):
-                            simple_children_count += 1
+            # 特殊处理前置条件节点
+            if child_title.lower().strip() in ["前置条件", "preconditions", "前置"]:
+                if preconditions:
+                    preconditions += "\n" + _sanitize_multiline_text(tree.notes[child_topic] or "")
+                else:
+                    preconditions = _sanitize_multiline_text(tree.notes[child_topic] or "")
                 
-                if len(sub_topics) > 0 and simple_children_count / len(sub_topics) > 0.6:
-                    is_testcase = True
+                if not preconditions and not tree.is_leaf(child_topic):
+                    first_grandchild = child_topic + 1
+                    preconditions = _sanitize_multiline_text(titles[first_grandchild] or "")
+                continue
             
-            if is_testcase:
-                # 当前节点是测试用例
-                custom_module_path = _extract_custom_module_path(topic, module_path_list)
-                
-                # 提取前置条件
-                preconditions = ""
-                topic_notes = topic.getNotes()
-                if topic_notes:
-                    preconditions = _sanitize_multiline_text(topic_notes)
-                
-                # 提取步骤和预期结果
-                steps_data = []
-                for child_topic in sub_topics:
-                    child_title = _sanitize_multiline_text(child_topic.getTitle() or "")
-                    
-                    # 特殊处理前置条件节点
-                    if child_title.lower().strip() in ["前置条件", "preconditions", "前置"]:
-                        if preconditions:
-                            preconditions += "\n" + _sanitize_multiline_text(child_topic.getNotes() or "")
-                        else:
-                            preconditions = _sanitize_multiline_text(child_topic.getNotes() or "")
-                        
-                        if not preconditions and child_topic.getSubTopics():
-                            first_grandchild = child_topic.getSubTopics()[0]
-                            if first_grandchild:
-                                preconditions = _sanitize_multiline_text(first_grandchild.getTitle() or "")
-                        continue
-                    
-                    # 处理步骤节点
-                    action = child_title
-                    expected_results = []
-                    for gc in (child_topic.getSubTopics() or []):
-                        if gc and not gc.getSubTopics():
-                            expected_results.append(_sanitize_multiline_text(gc.getTitle() or ""))
-                    
-                    expected = "\n".join(expected_results)
-                    if action or expected:
-                        steps_data.append((action, expected))
-                
-                # 提取优先级
-                priority = _extract_priority_from_topic(topic)
-                
-                all_cases.append({
-                    "module": module_name,
-                    "custom_module": custom_module_path,
-                    "title": title,
-                    "priority": priority,
-                    "preconditions": preconditions if preconditions else "",
-                    "steps": steps_data
-                })
-            else:
-                # 当前节点是模块节点，继续递归
-                new_module_path = module_path_list + [title]
-                for st in sub_topics:
-                    extract_cases(st, new_module_path)
-        
-        # 从根节点的子节点开始遍历
-        for topic in (root.getSubTopics() or []):
-            extract_cases(topic, [])
+            # 处理步骤节点
+            action = child_title
+            expected_results = []
+            for gc in tree.children(child_topic):
+                if tree.is_leaf(gc):
+                    expected_results.append(_sanitize_multiline_text(titles[gc] or ""))
+            
+            expected = "\n".join(expected_results)
+            if action or expected:
+                steps_data.append((action, expected))
         
-        return all_cases
+        # 提取优先级
+        priority = _extract_priority_from_topic(tree, topic)
         
-    except Exception as e:
-        print(f"解析XMind文件时出错: {str(e)}")
-        return []
+        yield {
+            "module": module_name,
+            "custom_module": custom_module_path,
+            "title": title,
+            "priority": priority,
+            "preconditions": preconditions if preconditions else "",
+            "steps": steps_data
+        }
 
 
 def _parse_module_cases_from_xmind2testcase(xmind_file: str) -> List[Dict[str, Any]]:
@@ -419,173 +325,379 @@ def _parse_module_cases_from_xmind2testcase(xmind_file: str) -> List[Dict[str, A
     使用xmind2testcase解析，转换为模块化用例格式
     作为备用解析方案
     """
+    return list(_iter_module_cases_from_xmind2testcase(xmind_file))
+
+
+def _iter_module_cases_from_xmind2testcase(xmind_file: str) -> Iterator[Dict[str, Any]]:
+    # 错误处理同 _iter_module_cases_from_xmind：产出第一个用例之后的错误向上抛出
+    produced = False
     try:
-        testcases = get_xmind_testcase_list(xmind_file)
-        module_name = _extract_module_name(xmind_file)
-        all_cases = []
+        # 含 content.json 的文件与其他解析器一致读取 content.json（xmind_reader 按 xmind2testcase 规则提取）
+        sheets = xmind_reader.load_json_sheets(xmind_file)
+        if sheets is not None:
+            testcases = xmind_reader.iter_testcase_list(sheets)
+        else:
+            testcases = get_xmind_testcase_list(xmind_file)
+        for case in _iter_module_cases_from_testcase_list(testcases, _extract_module_name(xmind_file)):
+            produced = True
+            yield case
         
-        for tc in testcases:
-            steps = []
-            for step in (tc.get("steps", []) or []):
-                action = _sanitize_multiline_text(step.get("actions", "") or "")
-                expected = _sanitize_multiline_text(step.get("expectedresults", "") or "")
-                if action or expected:
-                    steps.append((action, expected))
-            
-            # 从suite字段提取自定义模块路径
-            suite = tc.get("suite", "") or ""
-            custom_module = _sanitize_text(suite) if suite != "/" else ""
-            
-            all_cases.append({
-                "module": module_name,
-                "custom_module": custom_module,
-                "title": _sanitize_text(tc.get("name", "") or ""),
-                "priority": _normalize_priority(tc.get("importance")),
-                "preconditions": _sanitize_multiline_text(tc.get("preconditions", "") or ""),
-                "steps": steps
-            })
+    except Exception as e:
+        if produced:
+            raise
+        print(f"使用xmind2testcase解析时出错: {str(e)}")
+
+
+def _module_cases_from_testcase_list(testcases: Iterable[dict], module_name: str) -> List[Dict[str, Any]]:
+    """将 xmind2testcase 格式的用例字典列表转换为模块化用例格式"""
+    return list(_iter_module_cases_from_testcase_list(testcases, module_name))
+
+
+def _iter_module_cases_from_testcase_list(testcases: Iterable[dict], module_name: str) -> Iterator[Dict[str, Any]]:
+    for tc in testcases:
+        steps = []
+        for step in (tc.get("steps", []) or []):
+            action = _sanitize_multiline_text(step.get("actions", "") or "")
+            expected = _sanitize_multiline_text(step.get("expectedresults", "") or "")
+            if action or expected:
+                steps.append((action, expected))
         
-        return all_cases
+        # 从suite字段提取自定义模块路径
+        suite = tc.get("suite", "") or ""
+        custom_module = _sanitize_text(suite) if suite != "/" else ""
         
+        yield {
+            "module": module_name,
+            "custom_module": custom_module,
+            "title": _sanitize_text(tc.get("name", "") or ""),
+            "priority": _normalize_priority(tc.get("importance")),
+            "preconditions": _sanitize_multiline_text(tc.get("preconditions", "") or ""),
+            "steps": steps
+        }
+
+
+def _sheet_module_cases(sheet, index: int, parser: str) -> List[Dict[str, Any]]:
+    """
+    提取单个画布的模块化用例，“模块”列为画布名称（为空时依次使用中心主题、“画布N”）。
+    模块级函数，供 xmind_reader.map_sheets 在子进程中调用。
+    """
+    module_name = (_sanitize_text(sheet.title or "") or _sanitize_text(sheet.tree.titles[0] or "")
+                   or f"画布{index + 1}")
+    if parser == "xmind2testcase":
+        return _module_cases_from_testcase_list(xmind_reader.get_testcase_list([sheet]), module_name)
+    cases = _module_cases_from_topic_tree(sheet.tree, module_name)
+    if not cases and parser == "auto":
+        cases = _module_cases_from_testcase_list(xmind_reader.get_testcase_list([sheet]), module_name)
+    return cases
+
+
+def _parse_module_cases_all_sheets(xmind_file: str, parser: str) -> List[Dict[str, Any]]:
+    return list(_iter_module_cases_all_sheets(xmind_file, parser))
+
+
+def _iter_module_cases_all_sheets(xmind_file: str, parser: str) -> Iterator[Dict[str, Any]]:
+    """
+    多画布模式：逐个读取画布并在进程池中并行提取（xmind_reader.map_sheets），按画布顺序产出。
+    各画布均基于 xmind_reader 主题树解析（xmind 与 json 等价）。
+    画布逐个读取，靠后的画布出错时前面的用例已经产出：此时错误向上抛出，不产出截断的结果。
+    """
+    produced = False
+    try:
+        for sheet_cases in xmind_reader.map_sheets(_sheet_module_cases, xmind_reader.iter_sheets(xmind_file), parser):
+            for case in sheet_cases:
+                produced = True
+                yield case
+
     except Exception as e:
-        print(f"使用xmind2testcase解析时出错: {str(e)}")
-        return []
+        if produced:
+            raise
+        print(f"解析XMind文件时出错: {str(e)}")
 
 
-def get_module_cases(xmind_file: str, parser: str = "auto") -> List[Dict[str, Any]]:
+def _cache_kind(xmind_file: str, all_sheets: bool) -> str:
     """
-    获取模块化用例数据
-    parser: "auto", "xmind", "xmind2testcase"
+    解析缓存的数据类别。单画布模式下中心主题为空时“模块”列取自文件名，
+    因此类别中包含文件名推导出的模块名，内容相同、文件名不同的文件不共用缓存结果
+    （多画布模式的“模块”列只取决于文件内容）
     """
-    if parser == "xmind":
-        return _parse_module_cases_from_xmind(xmind_file)
+    if all_sheets:
+        return "module_all_sheets"
+    return f"module|{_module_name_from_filename(xmind_file)}"
+
+
+def get_module_cases(xmind_file: str, parser: str = "auto", all_sheets: bool = False) -> List[Dict[str, Any]]:
+    """
+    获取模块化用例数据（按文件内容 + 解析器缓存，见 parse_cache）
+    parser: "auto", "xmind", "xmind2testcase", "json"
+    all_sheets: 为真时转换全部画布，“模块”列为各画布名称（默认仅主画布）
+    """
+    kind = _cache_kind(xmind_file, all_sheets)
+    return parse_cache.cached(xmind_file, kind, parser, CONVERTER_VERSION + priority.vocabulary_tag(),
+                              lambda: _parse_module_cases(xmind_file, parser, all_sheets))
+
+
+def iter_module_cases(xmind_file: str, parser: str = "auto", all_sheets: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    get_module_cases 的生成器版本：随主题树遍历逐个产出用例，不构建完整列表。
+    磁盘缓存命中时逐个产出缓存结果；未命中时边产出边收集，用例数不超过
+    parse_cache.STREAM_CACHE_MAX_ITEMS 时写入缓存。
+    """
+    kind = _cache_kind(xmind_file, all_sheets)
+    return parse_cache.cached_iter(xmind_file, kind, parser, CONVERTER_VERSION + priority.vocabulary_tag(),
+                                   lambda: _iter_module_cases(xmind_file, parser, all_sheets))
+
+
+def _parse_module_cases(xmind_file: str, parser: str, all_sheets: bool = False) -> List[Dict[str, Any]]:
+    """按解析器选择执行解析（不经过缓存）"""
+    return list(_iter_module_cases(xmind_file, parser, all_sheets))
+
+
+def _iter_module_cases(xmind_file: str, parser: str, all_sheets: bool = False) -> Iterator[Dict[str, Any]]:
+    if all_sheets:
+        yield from _iter_module_cases_all_sheets(xmind_file, parser)
+    elif parser == "xmind":
+        yield from _iter_module_cases_from_xmind(xmind_file)
+    elif parser == "json":
+        yield from _iter_module_cases_from_json(xmind_file)
     elif parser == "xmind2testcase":
-        return _parse_module_cases_from_xmind2testcase(xmind_file)
+        yield from _iter_module_cases_from_xmind2testcase(xmind_file)
     else:
-        # auto模式：优先使用xmind库，失败时使用xmind2testcase
-        cases = _parse_module_cases_from_xmind(xmind_file)
-        if not cases:
-            cases = _parse_module_cases_from_xmind2testcase(xmind_file)
-        return cases
+        # auto模式：优先使用xmind库，没有产出任何用例时使用xmind2testcase
+        produced = False
+        for case in _iter_module_cases_from_xmind(xmind_file):
+            produced = True
+            yield case
+        if not produced:
+            yield from _iter_module_cases_from_xmind2testcase(xmind_file)
 
 
-def build_module_csv_rows(cases: List[Dict[str, Any]]) -> List[List[str]]:
+def build_module_csv_rows(cases: Iterable[Dict[str, Any]]) -> List[List[str]]:
     """
     构建模块化用例CSV行数据
     表头：模块,自定义分级模块,用例名称,priority,前置条件,用例步骤,预期结果
     """
-    headers = ["模块", "自定义分级模块", "用例名称", "priority", "前置条件", "用例步骤", "预期结果"]
-    rows = [headers]
-    
-    for case in cases:
-        # 处理步骤和预期结果
-        steps_lines = []
-        expected_lines = []
-        
-        for action, expected in case.get("steps", []):
-            if action:
-                steps_lines.append(action)
-            if expected:
-                expected_lines.append(expected)
-        
-        # 用换行符连接多个步骤
-        steps_text = "\n".join(steps_lines).strip()
-        expected_text = "\n".join(expected_lines).strip()
-        
-        # 格式化步骤和预期结果文本 - 应用新的格式化规则
-        steps_text = _format_step_text(steps_text)
-        expected_text = _format_step_text(expected_text)
-        
-        # 确保字段非空
-        if not steps_text:
-            steps_text = ""
-        if not expected_text:
-            expected_text = ""
-        
-        # 处理CSV中的特殊字符
-        def escape_csv_field(text: str) -> str:
-            """处理CSV字段中的特殊字符"""
-            if not text:
-                return ""
-            # 如果包含逗号、换行符或双引号，需要用双引号包裹
-            if ',' in text or '\n' in text or '"' in text:
-                # 双引号转义为两个双引号
-                text = text.replace('"', '""')
-                return f'"{text}"'
-            return text
-        
-        # 计算前置条件与模块标题修正
-        preconditions = _completely_remove_quotes(str(case.get("preconditions", "") or "").strip())
-        custom_path = str(case.get("custom_module", "") or "").strip()
-        path_parts = [p for p in custom_path.split('/') if p]
-        first_level = path_parts[0] if path_parts else ""
-        title = str(case.get("title", "") or "").strip()
-        second_level = path_parts[1] if len(path_parts) > 1 else ""
-        if second_level:
-            # 直接拼接二级模块和原标题，不添加【】
-            title = f"{second_level}{title}"
-
-        row = [
-            case.get("module", ""),
-            first_level,
-            title,
-            case.get("priority", "P2"),
-            preconditions,
-            steps_text,
-            expected_text
-        ]
-        
-        rows.append(row)
+    return list(iter_module_csv_rows(cases))
+
+
+def iter_module_csv_rows(cases: Iterable[Dict[str, Any]]) -> Iterator[List[str]]:
+    """build_module_csv_rows 的生成器版本：先产出表头，再逐批产出数据行"""
+    yield list(MODULE_CSV_HEADER)
+    for batch in iter_module_csv_row_batches(cases):
+        yield from batch
+
+
+def _custom_module_levels(custom_module) -> Tuple[str, str]:
+    """自定义分级模块取路径第一段；第二段（若存在）直接拼接到用例名称前，不添加【】"""
+    path_parts = [p for p in str(custom_module or "").strip().split('/') if p]
+    first_level = path_parts[0] if path_parts else ""
+    second_level = path_parts[1] if len(path_parts) > 1 else ""
+    return first_level, second_level
+
+
+def _memo_apply(func, memo: dict, values: List[str]) -> List[str]:
+    """对一列文本逐个应用 func，相同文本只计算一次（memo 超过 _TEXT_MEMO_SIZE 条时清空）"""
+    results = []
+    append = results.append
+    for value in values:
+        result = memo.get(value)
+        if result is None:
+            result = func(value)
+            if len(memo) >= _TEXT_MEMO_SIZE:
+                memo.clear()
+            memo[value] = result
+        append(result)
+    return results
+
+
+def iter_module_csv_row_batches(cases: Iterable[Dict[str, Any]],
+                                batch_size: int = ROW_BATCH_SIZE) -> Iterator[List[List[str]]]:
+    """
+    按列批量构建模块化用例数据行（不含表头），每批最多 batch_size 行，可直接交给 csv.writer.writerows。
+    - 自定义分级模块的一、二级在整个导出中按不同路径只计算一次
+    - 前置条件、步骤与预期结果的格式化按不同文本只计算一次（“无”、“操作成功”等大量重复）
+    """
+    levels = {}
+    preconditions_memo = {}
+    format_memo = {}
+    case_iter = iter(cases)
+    while True:
+        batch = list(islice(case_iter, batch_size))
+        if not batch:
+            return
+
+        custom_modules = [case.get("custom_module", "") for case in batch]
+        for custom_module in custom_modules:
+            if custom_module not in levels:
+                levels[custom_module] = _custom_module_levels(custom_module)
+        step_lists = [case.get("steps", []) for case in batch]
+        # 用换行符连接多个步骤，再应用步骤格式化规则
+        steps_texts = _memo_apply(_format_step_text, format_memo,
+                                  ["\n".join([action for action, _ in steps if action]).strip()
+                                   for steps in step_lists])
+        expected_texts = _memo_apply(_format_step_text, format_memo,
+                                     ["\n".join([expected for _, expected in steps if expected]).strip()
+                                      for steps in step_lists])
+        preconditions = _memo_apply(_completely_remove_quotes, preconditions_memo,
+                                    [str(case.get("preconditions", "") or "").strip() for case in batch])
+
+        rows = []
+        append = rows.append
+        for case, custom_module, precondition, steps_text, expected_text in zip(
+                batch, custom_modules, preconditions, steps_texts, expected_texts):
+            first_level, second_level = levels[custom_module]
+            title = str(case.get("title", "") or "").strip()
+            append([
+                case.get("module", ""),
+                first_level,
+                f"{second_level}{title}" if second_level else title,
+                case.get("priority", "P2"),
+                precondition,
+                steps_text,
+                expected_text,
+            ])
+        yield rows
+
+
+def write_module_csv_rows(writer, cases: Iterable[Dict[str, Any]]) -> int:
+    """写入表头与全部数据行（按批 writerows），返回数据行数"""
+    writer.writerow(MODULE_CSV_HEADER)
+    count = 0
+    for batch in iter_module_csv_row_batches(cases):
+        writer.writerows(batch)
+        count += len(batch)
+    return count
+
+
+def _module_output_path(xmind_file: str, output_path: Optional[str], ext: str) -> str:
+    """输出路径：指定时使用 output_path，否则为临时目录下的 {模块名}_模块化用例.{ext}"""
+    if output_path:
+        path = os.path.abspath(output_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    temp_dir = tempfile.gettempdir()
+    module_name = _extract_module_name(xmind_file)
+    # 修复：使用简洁的文件名，不包含UUID前缀
+    path = os.path.join(temp_dir, f"{module_name}_模块化用例.{ext}")
     
-    return rows
+    # 如果文件已存在，添加时间戳避免冲突
+    if os.path.exists(path):
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(temp_dir, f"{module_name}_模块化用例_{timestamp}.{ext}")
+    return path
 
 
-def convert_to_module_csv(xmind_file: str, output_path: str = None, parser: str = "auto") -> str:
+def convert_to_module_csv(xmind_file: str, output_path: str = None, parser: str = "auto",
+                          all_sheets: bool = False, stats: dict = None) -> str:
     """
     将XMind文件转换为模块化用例CSV格式
     
     Args:
         xmind_file: XMind文件路径
         output_path: 输出CSV文件路径（可选）
-        parser: 解析器选择 ("auto", "xmind", "xmind2testcase")
+        parser: 解析器选择 ("auto", "xmind", "xmind2testcase", "json")
+        all_sheets: 是否转换全部画布（默认仅主画布）
+        stats: 传入字典时，写出的同时统计 case_count / step_count（export_stream.count_cases）
+    
+    用例边解析边按批写入（iter_module_cases -> iter_module_csv_row_batches），内存占用不随用例数增长
     
     Returns:
         生成的CSV文件绝对路径
     """
-    cases = get_module_cases(xmind_file, parser=parser)
-    rows = build_module_csv_rows(cases)
-    
-    if output_path:
-        csv_path = os.path.abspath(output_path)
-        os.makedirs(os.path.dirname(csv_path), exist_ok=True)
-    else:
-        temp_dir = tempfile.gettempdir()
-        module_name = _extract_module_name(xmind_file)
-        # 修复：使用简洁的文件名，不包含UUID前缀
-        csv_filename = f"{module_name}_模块化用例.csv"
-        csv_path = os.path.join(temp_dir, csv_filename)
-        
-        # 如果文件已存在，添加时间戳避免冲突
-        if os.path.exists(csv_path):
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            csv_filename = f"{module_name}_模块化用例_{timestamp}.csv"
-            csv_path = os.path.join(temp_dir, csv_filename)
+    csv_path = _module_output_path(xmind_file, output_path, "csv")
     
     # 使用UTF-8 BOM编码确保Excel正确显示中文
-    with open(csv_path, "w", encoding="utf-8-sig", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerows(rows)
+    cases = iter_module_cases(xmind_file, parser=parser, all_sheets=all_sheets)
+    if stats is not None:
+        cases = export_stream.count_cases(cases, stats)
+    try:
+        with open(csv_path, "w", encoding="utf-8-sig", newline="") as f:
+            write_module_csv_rows(csv.writer(f), cases)
+    except Exception:
+        # 解析中途失败时不留下不完整的 CSV
+        if os.path.exists(csv_path):
+            os.remove(csv_path)
+        raise
     
     return csv_path
 
 
-def get_module_export_filename(xmind_file: str) -> str:
+def convert_to_module_csv_parts(xmind_file: str, output_path: str = None, parser: str = "auto",
+                                all_sheets: bool = False, max_rows: int = None, max_bytes: int = None) -> List[str]:
+    """
+    convert_to_module_csv 的分片模式：每个分片最多 max_rows 行或 max_bytes 字节（含 BOM 与表头），
+    每个分片重复表头
+    
+    Args:
+        xmind_file: XMind文件路径
+        output_path: 输出CSV文件路径（可选），分片在其文件名后追加 _part001、_part002 ……
+        parser: 解析器选择 ("auto", "xmind", "xmind2testcase", "json")
+        all_sheets: 是否转换全部画布（默认仅主画布）
+        max_rows: 每个分片最多的数据行数
+        max_bytes: 每个分片最多的字节数
+    
+    用例边解析边写入当前分片，写满即切换到下一个（export_stream.write_csv_parts）
+    
+    Returns:
+        各分片文件绝对路径（按顺序）
+    """
+    csv_path = _module_output_path(xmind_file, output_path, "csv")
+    cases = iter_module_cases(xmind_file, parser=parser, all_sheets=all_sheets)
+    return export_stream.write_csv_parts(export_stream.numbered_part_path(csv_path), MODULE_CSV_HEADER,
+                                         iter_module_csv_row_batches(cases), max_rows=max_rows, max_bytes=max_bytes)
+
+
+def stream_module_csv(xmind_file: str, parser: str = "auto", all_sheets: bool = False) -> Iterator[bytes]:
+    """
+    convert_to_module_csv 的流式版本：不写文件，按批产出 UTF-8 BOM CSV 字节块（内容与
+    convert_to_module_csv 写出的文件一致），供 Web 接口直接写入 HTTP 响应。
+    首块包含表头与第一批数据行，解析错误在取首块时抛出。
+    """
+    cases = iter_module_cases(xmind_file, parser=parser, all_sheets=all_sheets)
+    return export_stream.iter_csv_bytes(MODULE_CSV_HEADER, iter_module_csv_row_batches(cases))
+
+
+def convert_to_module_xlsx(xmind_file: str, output_path: str = None, parser: str = "auto",
+                           all_sheets: bool = False, stats: dict = None) -> str:
+    """
+    将XMind文件转换为模块化用例XLSX格式（表头、列与 convert_to_module_csv 相同）
+    
+    Args:
+        xmind_file: XMind文件路径
+        output_path: 输出XLSX文件路径（可选）
+        parser: 解析器选择 ("auto", "xmind", "xmind2testcase", "json")
+        all_sheets: 是否转换全部画布（默认仅主画布）
+        stats: 传入字典时，写出的同时统计 case_count / step_count（export_stream.count_cases）
+    
+    流式写入（xlsx_writer），内存占用不随用例数增长；多行步骤/预期结果为自动换行单元格，
+    可直接导入 Excel，无需另存 CSV
+    
+    Returns:
+        生成的XLSX文件绝对路径
+    """
+    xlsx_path = _module_output_path(xmind_file, output_path, "xlsx")
+    cases = iter_module_cases(xmind_file, parser=parser, all_sheets=all_sheets)
+    if stats is not None:
+        cases = export_stream.count_cases(cases, stats)
+    try:
+        xlsx_writer.write_xlsx(xlsx_path, MODULE_CSV_HEADER, iter_module_csv_row_batches(cases),
+                               sheet_name="模块化用例", column_widths=MODULE_XLSX_COLUMN_WIDTHS)
+    except Exception:
+        # 解析中途失败时不留下不完整的文件
+        if os.path.exists(xlsx_path):
+            os.remove(xlsx_path)
+        raise
+    
+    return xlsx_path
+
+
+def get_module_export_filename(xmind_file: str, ext: str = "csv") -> str:
     """
     生成模块化用例导出文件名
-    格式：{原文件名}_模块化用例.csv
+    格式：{原文件名}_模块化用例.{ext}（ext 为 csv 或 xlsx）
     """
     module_name = _extract_module_name(xmind_file)
-    return f"{module_name}_模块化用例.csv"
+    return f"{module_name}_模块化用例.{ext}"
 
 
 if __name__ == "__main__":
@@ -25,87 +25,18 @@ from typing import Dict, List, Tuple, Optional, Any
 import xmind
 from xmind2testcase.utils import get_xmind_testcase_list
 
+import module_converter_final
+import priority
+import text_normalize
 
-def _sanitize_text(text: str) -> str:
-    """基础清洗：去除 None、零宽字符、所有空白符合并为一个空格"""
-    if not text:
-        return ""
-    text = re.sub(r"[\u200B-\u200D\uFEFF]", "", str(text))
-    text = re.sub(r"\s+", " ", text.strip())
-    return text
 
-
-def _sanitize_multiline_text(text: str) -> str:
-    """多行文本清洗：保留换行符，但清理每行的多余空白"""
-    if not text:
-        return ""
-    text = str(text)
-    text = re.sub(r"[\u200B-\u200D\uFEFF]", "", text)
-    lines = text.split('\n')
-    processed_lines = [re.sub(r'[ \t]+', ' ', line).strip() for line in lines]
-    processed_lines = [line for line in processed_lines if line]
-    return "\n".join(processed_lines)
+# 文本清洗统一由 text_normalize 提供（预编译正则 + 快速路径，各转换器共用）
+_sanitize_text = text_normalize.sanitize_text
+_sanitize_multiline_text = text_normalize.sanitize_multiline_text
 
 
-def _normalize_priority(value) -> str:
-    """
-    将多种优先级表示统一为P0-P4格式
-    支持：1-5, P0-P4, 高中低, High/Medium/Low等
-    """
-    if value is None:
-        return "P2"
-    
-    v = str(value).strip().upper()
-    
-    # 直接是 P0-4
-    if re.fullmatch(r"P[0-4]", v):
-        return v
-    
-    # 纯数字 1-5
-    if re.fullmatch(r"[1-5]", v):
-        priority_map = {"1": "P0", "2": "P1", "3": "P2", "4": "P3", "5": "P4"}
-        return priority_map.get(v, "P2")
-    
-    # 可能是整数
-    try:
-        iv = int(v)
-        if 1 <= iv <= 5:
-            priority_map = {1: "P0", 2: "P1", 3: "P2", 4: "P3", 5: "P4"}
-            return priority_map.get(iv, "P2")
-    except Exception:
-        pass
-    
-    # 处理"优先级X"格式
-    priority_match = re.search(r'优先级[：:\s]*([1-5])', v)
-    if priority_match:
-        priority_map = {"1": "P0", "2": "P1", "3": "P2", "4": "P3", "5": "P4"}
-        return priority_map.get(priority_match.group(1), "P2")
-    
-    # 处理中文描述
-    if "高" in v or "严重" in v or "紧急" in v:
-        return "P0"
-    if "较高" in v or "重要" in v:
-        return "P1"
-    if "中" in v or "普通" in v:
-        return "P2"
-    if "较低" in v or "次要" in v:
-        return "P3"
-    if "低" in v or "微小" in v or "提示" in v:
-        return "P4"
-    
-    # 处理英文描述
-    if "CRITICAL" in v or "HIGH" in v:
-        return "P0"
-    if "MAJOR" in v:
-        return "P1"
-    if "MEDIUM" in v or "NORMAL" in v:
-        return "P2"
-    if "MINOR" in v:
-        return "P3"
-    if "LOW" in v or "TRIVIAL" in v:
-        return "P4"
-    
-    return "P2"
+# 优先级归一化统一由 priority 提供（预编译正则 + 记忆化，各转换器共用）
+_normalize_priority = priority.normalize_priority
 
 
 def _extract_module_name(xmind_file: str) -> str:
@@ -139,62 +70,6 @@ def _extract_module_name(xmind_file: str) -> str:
     return _sanitize_text(module_name)
 
 
-def _extract_priority_from_topic(topic) -> str:
-    """从XMind主题中提取优先级信息 - 修复版本"""
-    # 1. 检查标题中的优先级标记
-    title = topic.getTitle() or ""
-    priority_match = re.search(r'\b(P[0-4]|[1-5])\b', title)
-    if priority_match:
-        return _normalize_priority(priority_match.group(1))
-    
-    # 2. 检查标签(markers)中的优先级 - 修复类型错误
-    try:
-        markers = topic.getMarkers() or []
-        for marker in markers:
-            try:
-                # 安全获取marker ID
-                if hasattr(marker, 'getMarkerId'):
-                    marker_id = str(marker.getMarkerId())
-                else:
-                    marker_id = str(marker)
-                
-                # 检查优先级相关标记
-                if marker_id and ('priority' in marker_id.lower() or 'importance' in marker_id.lower()):
-                    num_match = re.search(r'(\d+)', marker_id)
-                    if num_match:
-                        return _normalize_priority(num_match.group(1))
-            except Exception:
-                # 忽略单个marker的错误，继续处理下一个
-                continue
-    except Exception:
-        # 忽略markers处理错误
-        pass
-    
-    # 3. 检查备注中的优先级信息
-    try:
-        notes = topic.getNotes() or ""
-        priority_in_notes = re.search(r'\b(P[0-4]|优先级[：:]\s*([1-5]))\b', str(notes))
-        if priority_in_notes:
-            if priority_in_notes.group(1).startswith('P'):
-                return _normalize_priority(priority_in_notes.group(1))
-            else:
-                return _normalize_priority(priority_in_notes.group(2))
-    except Exception:
-        pass
-    
-    return "P2"
-
-
-def _extract_custom_module_path(topic, path_list: List[str]) -> str:
-    """
-    规则2：自定义分级模块提取
-    构建层级路径，用"/"分隔符连接
-    """
-    if not path_list:
-        return ""
-    return "/".join(path_list)
-
-
 def _format_step_text(text: str) -> str:
     """
     格式化步骤文本：去除前后引号，为每个标题添加序号（如果没有的话）
@@ -237,107 +112,9 @@ def _format_step_text(text: str) -> str:
 def _parse_module_cases_from_xmind(xmind_file: str) -> List[Dict[str, Any]]:
     """
     使用xmind库解析XMind文件，按照模块化用例规则提取数据
+    提取规则与 module_converter_final 完全一致，直接复用其显式栈遍历实现（深层导图不会触发 RecursionError）
     """
-    try:
-        workbook = xmind.load(xmind_file)
-        sheet = workbook.getPrimarySheet()
-        if sheet is None:
-            return []
-        root = sheet.getRootTopic()
-        
-        module_name = _extract_module_name(xmind_file)
-        all_cases = []
-        
-        def extract_cases(topic, module_path_list: List[str]):
-            if not topic:
-                return
-                
-            raw_title = topic.getTitle() or ""
-            title = _sanitize_text(raw_title)
-            if not title:
-                return
-            
-            sub_topics = topic.getSubTopics() or []
-            
-            # 判断是否为测试用例节点
-            # 启发式规则：如果子节点主要是步骤类型（简单节点），则当前节点是测试用例
-            is_testcase = False
-            if sub_topics:
-                simple_children_count = 0
-                for st in sub_topics:
-                    if st and st.getTitle():
-                        grandchildren = st.getSubTopics() or []
-                        if not grandchildren or all(not gc.getSubTopics() for gc in grandchildren):
-                            simple_children_count += 1
-                
-                if len(sub_topics) > 0 and simple_children_count / len(sub_topics) > 0.6:
-                    is_testcase = True
-            
-            if is_testcase:
-                # 当前节点是测试用例
-                custom_module_path = _extract_custom_module_path(topic, module_path_list)
-                
-                # 提取前置条件
-                preconditions = ""
-                topic_notes = topic.getNotes()
-                if topic_notes:
-                    preconditions = _sanitize_multiline_text(topic_notes)
-                
-                # 提取步骤和预期结果
-                steps_data = []
-                for child_topic in sub_topics:
-                    child_title = _sanitize_multiline_text(child_topic.getTitle() or "")
-                    
-                    # 特殊处理前置条件节点
-                    if child_title.lower().strip() in ["前置条件", "preconditions", "前置"]:
-                        if preconditions:
-                            preconditions += "\n" + _sanitize_multiline_text(child_topic.getNotes() or "")
-                        else:
-                            preconditions = _sanitize_multiline_text(child_topic.getNotes() or "")
-                        
-                        if not preconditions and child_topic.getSubTopics():
-                            first_grandchild = child_topic.getSubTopics()[0]
-                            if first_grandchild:
-                                preconditions = _sanitize_multiline_text(first_grandchild.getTitle() or "")
-                        continue
-                    
-                    # 处理步骤节点
-                    action = child_title
-                    expected_results = []
-                    for gc in (child_topic.getSubTopics() or []):
-                        if gc and not gc.getSubTopics():
-                            expected_results.append(_sanitize_multiline_text(gc.getTitle() or ""))
-                    
-                    expected = "\n".join(expected_results)
-                    if action or expected:
-                        steps_data.append((action, expected))
-                
-                # 提取优先级
-                priority = _extract_priority_from_topic(topic)
-                
-                all_cases.append({
-                    "module": module_name,
-                    "custom_module": custom_module_path,
-                    "title": title,
-                    "priority": priority,
-                    "preconditions": preconditions if preconditions else "",
-                    "steps": steps_data
-                })
-            else:
-                # 当前节点是模块节点，继续递归
-                new_module_path = module_path_list + [title]
-                for st in sub_topics:
-                    extract_cases(st, new_module_path)
-        
-        # 从根节点的子节点开始遍历
-        for topic in (root.getSubTopics() or []):
-            extract_cases(topic, [])
-        
-        return all_cases
-        
-    except Exception as e:
-        print(f"解析XMind文件时出错: {str(e)}")
-        return []
+    return module_converter_final._parse_module_cases_from_xmind(xmind_file)
 
 
 def _parse_module_cases_from_xmind2testcase(xmind_file: str) -> List[Dict[str, Any]]:
@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+XMind 解析结果磁盘缓存（内容寻址）
+
+- 键：文件内容 SHA-256 + 数据类别 + 解析器 + 转换器版本，同一份文件重复导出时直接命中，完全跳过解析
+- 值：pickle（最高协议）序列化的用例列表，读取开销远低于重新解压与解析 XMind
+- 容量：总大小上限 + LRU 淘汰（命中时刷新文件 mtime，写入后按 mtime 从旧到新删除超限条目）
+- 写入先落临时文件再 os.replace，多进程（gunicorn 多 worker）并发读写安全
+- 目录安全：pickle 反序列化可执行任意代码，缓存目录必须只有当前用户可写。默认目录按用户区分
+  （<临时目录>/xmind_parse_cache-<uid>），以 0700 权限创建；每次使用前检查目录不是符号链接、
+  属于当前用户且组和其他用户无任何权限，检查不通过（例如他人预先创建了同名目录）时不读写缓存（见 private_dir）
+
+配置（环境变量，也可调用 configure() 覆盖）：
+- XMIND_PARSE_CACHE_DIR      缓存目录，默认 <临时目录>/xmind_parse_cache-<uid>（须满足上述权限要求）
+- XMIND_PARSE_CACHE_MAX_MB   总大小上限（MB），默认 256；设为 0 关闭缓存
+- XMIND_PARSE_CACHE_STREAM_MAX_ITEMS  流式读取（cached_iter）时最多收集多少条结果写入缓存，默认 50000
+"""
+
+import hashlib
+import os
+import pickle
+import uuid
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+import private_dir
+
+CACHE_DIR = os.environ.get("XMIND_PARSE_CACHE_DIR") or private_dir.default_dir("xmind_parse_cache")
+CACHE_MAX_BYTES = int(float(os.environ.get("XMIND_PARSE_CACHE_MAX_MB", "256")) * 1024 * 1024)
+STREAM_CACHE_MAX_ITEMS = int(os.environ.get("XMIND_PARSE_CACHE_STREAM_MAX_ITEMS", "50000"))
+
+_SUFFIX = ".pkl"
+_CHUNK_SIZE = 1024 * 1024
+_DIGEST_MEMO_SIZE = 256
+
+# 进程内摘要缓存：(路径, 大小, mtime) -> SHA-256，同一次导出多次查询缓存时只读一遍文件
+_digest_memo = {}
+
+
+def configure(directory: Optional[str] = None, max_bytes: Optional[int] = None):
+    """修改缓存目录或容量上限（max_bytes=0 关闭缓存）"""
+    global CACHE_DIR, CACHE_MAX_BYTES
+    if directory is not None:
+        CACHE_DIR = directory
+    if max_bytes is not None:
+        CACHE_MAX_BYTES = max_bytes
+
+
+def enabled() -> bool:
+    return CACHE_MAX_BYTES > 0
+
+
+def file_digest(path: str) -> str:
+    """文件内容的 SHA-256（分块读取）"""
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    value = _digest_memo.get(memo_key)
+    if value is not None:
+        return value
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    value = digest.hexdigest()
+    if len(_digest_memo) >= _DIGEST_MEMO_SIZE:
+        _digest_memo.clear()
+    _digest_memo[memo_key] = value
+    return value
+
+
+def make_key(digest: str, kind: str, parser: str, version: str) -> str:
+    """组合缓存键（文件名安全）"""
+    return hashlib.sha256(f"{digest}|{kind}|{parser}|{version}".encode("utf-8")).hexdigest()
+
+
+def _entry_path(key: str) -> str:
+    return os.path.join(CACHE_DIR, key + _SUFFIX)
+
+
+def _secure_dir(create: bool = False) -> bool:
+    """缓存目录是否只有当前用户可访问（private_dir.is_private）；create 为真时目录不存在则以 0700 权限创建"""
+    return private_dir.is_private(CACHE_DIR, create, "解析缓存目录")
+
+
+def get(key: str) -> Any:
+    """读取缓存，未命中或读取失败返回 None；命中时刷新 mtime 作为 LRU 时间戳（目录不安全时不读取）"""
+    path = _entry_path(key)
+    if not _secure_dir():
+        return None
+    try:
+        with open(path, "rb") as f:
+            value = pickle.load(f)
+    except Exception:
+        return None
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+    return value
+
+
+def put(key: str, value: Any):
+    """写入缓存并按容量上限淘汰最久未使用的条目；失败或目录不安全时静默忽略"""
+    if not _secure_dir(create=True):
+        return
+    try:
+        tmp_path = os.path.join(CACHE_DIR, f".{key}.{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, _entry_path(key))
+    except Exception:
+        return
+    evict()
+
+
+def evict(max_bytes: Optional[int] = None):
+    """按 mtime 从旧到新删除条目，直到总大小不超过上限"""
+    limit = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    entries = []
+    total = 0
+    try:
+        with os.scandir(CACHE_DIR) as it:
+            for entry in it:
+                if not entry.name.endswith(_SUFFIX):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+    except OSError:
+        return
+    if total <= limit:
+        return
+    entries.sort()
+    for _, size, path in entries:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
+        if total <= limit:
+            break
+
+
+def cached(xmind_file: str, kind: str, parser: str, version: str, compute: Callable[[], Any]) -> Any:
+    """
+    带缓存执行解析：命中时直接返回反序列化结果，否则调用 compute() 并写入缓存。
+    空结果不写入（可能来自解析失败），缓存出错时退化为直接解析。
+    """
+    if not enabled():
+        return compute()
+    try:
+        key = make_key(file_digest(xmind_file), kind, parser, version)
+    except OSError:
+        return compute()
+    value = get(key)
+    if value is not None:
+        return value
+    value = compute()
+    if value:
+        put(key, value)
+    return value
+
+
+def cached_iter(xmind_file: str, kind: str, parser: str, version: str,
+                produce: Callable[[], Iterable[Any]]) -> Iterator[Any]:
+    """
+    cached 的流式版本：命中时逐个产出缓存的列表；未命中时边产出边收集，
+    完整产出且不超过 STREAM_CACHE_MAX_ITEMS 条时写入缓存。超出上限即停止收集，
+    超大导图的内存占用因此不随用例数增长（代价是这类文件不进入缓存）。
+    与 cached 使用相同的键，两者写入的结果可互相命中。
+    """
+    if not enabled():
+        yield from produce()
+        return
+    try:
+        key = make_key(file_digest(xmind_file), kind, parser, version)
+    except OSError:
+        yield from produce()
+        return
+    value = get(key)
+    if value is not None:
+        yield from value
+        return
+    collected = []
+    for item in produce():
+        if collected is not None:
+            collected.append(item)
+            if len(collected) > STREAM_CACHE_MAX_ITEMS:
+                collected = None
+        yield item
+    if collected:
+        put(key, collected)
@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+优先级归一化（所有转换器共用）
+
+原先每个转换器各有一份 _normalize_priority，每次调用最多执行 4 个正则与约 20 次子串查找，
+部分版本还在函数内重复构造映射字典；主题优先级提取每个主题执行 3 次正则。这里改为：
+- 映射表、关键词表在模块加载时构建一次，正则预编译
+- 原始取值种类很少（1-5、P0-P4、高/中/低 ……），按 str(value) 做有界记忆化，命中时只有一次字典查找
+- 主题优先级提取：备注为空或不含 "P"/"优先级" 时跳过备注正则
+- 可通过映射文件追加词汇，追加的关键词在内置关键词之前匹配；由于记忆化，词汇表变长不增加热路径开销
+
+映射文件为 JSON，键为 P0-P4，值为关键词列表（不区分大小写，按子串匹配，按文件中的顺序优先）：
+    {"P0": ["阻塞", "BLOCKER"], "P1": ["S1"], "P3": ["建议"]}
+通过环境变量 XMIND_PRIORITY_MAP 指定路径，或调用 configure() 加载。
+
+未配置映射文件时，输出与原实现逐字符一致。
+"""
+
+import hashlib
+import json
+import os
+import re
+from typing import Optional
+
+DEFAULT_PRIORITY = "P2"
+PRIORITY_LEVELS = ("P0", "P1", "P2", "P3", "P4")
+
+# 优先级映射：严格沿用原体系（importance -> Priority）
+NUMBER_TO_PRIORITY = {"1": "P0", "2": "P1", "3": "P2", "4": "P3", "5": "P4"}
+
+# 内置关键词表（按顺序匹配，与原 if 链一致；注意 "较高" 含 "高"，原实现即归为 P0）
+BUILTIN_KEYWORDS = (
+    (("高", "严重", "紧急"), "P0"),
+    (("较高", "重要"), "P1"),
+    (("中", "普通"), "P2"),
+    (("较低", "次要"), "P3"),
+    (("低", "微小", "提示"), "P4"),
+    (("CRITICAL", "HIGH"), "P0"),
+    (("MAJOR",), "P1"),
+    (("MEDIUM", "NORMAL"), "P2"),
+    (("MINOR",), "P3"),
+    (("LOW", "TRIVIAL"), "P4"),
+)
+
+_PRIORITY_PREFIX = re.compile(r'优先级[：:\s]*([1-5])')
+_TITLE_PRIORITY = re.compile(r'\b(P[0-4]|[1-5])\b')
+_NOTES_PRIORITY = re.compile(r'\b(P[0-4]|优先级[：:]\s*([1-5]))\b')
+_DIGITS = re.compile(r'(\d+)')
+
+_MEMO_SIZE = 4096
+
+# 关键词表 = 映射文件中的关键词 + 内置关键词，由 configure() 重建
+_keywords = BUILTIN_KEYWORDS
+_vocabulary_tag = ""
+_memo = {}
+
+
+def load_mapping(path: str) -> tuple:
+    """读取映射文件，返回 ((关键词元组, 优先级), ...)；格式不合法时抛出 ValueError"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f"优先级映射文件必须是 JSON 对象: {path}")
+    table = []
+    for level, words in data.items():
+        if level not in PRIORITY_LEVELS:
+            raise ValueError(f"优先级映射文件中的键必须是 P0-P4: {level!r}")
+        if isinstance(words, str):
+            words = [words]
+        if not isinstance(words, list) or not all(isinstance(w, str) for w in words):
+            raise ValueError(f"优先级映射文件中 {level} 的值必须是字符串列表")
+        words = tuple(w.strip().upper() for w in words if w.strip())
+        if words:
+            table.append((words, level))
+    return tuple(table)
+
+
+def configure(mapping_path: Optional[str] = None):
+    """
+    加载用户映射文件（None 恢复为仅内置词汇）并清空记忆化缓存。
+    同时写入环境变量 XMIND_PRIORITY_MAP，使之后启动的解析子进程使用同一份词汇。
+    """
+    global _keywords, _vocabulary_tag
+    if mapping_path:
+        custom = load_mapping(mapping_path)
+        canonical = json.dumps(custom, ensure_ascii=False)
+        _keywords = custom + BUILTIN_KEYWORDS
+        _vocabulary_tag = "+" + hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:12] if custom else ""
+        os.environ["XMIND_PRIORITY_MAP"] = mapping_path
+    else:
+        _keywords = BUILTIN_KEYWORDS
+        _vocabulary_tag = ""
+        os.environ.pop("XMIND_PRIORITY_MAP", None)
+    _memo.clear()
+
+
+def vocabulary_tag() -> str:
+    """当前词汇表的标识（仅内置词汇时为空串），用于区分磁盘解析缓存中的结果"""
+    return _vocabulary_tag
+
+
+def _resolve(raw: str) -> str:
+    v = raw.strip().upper()
+
+    # 直接是 P0-4 / 纯数字 1-5
+    if v in PRIORITY_LEVELS:
+        return v
+    level = NUMBER_TO_PRIORITY.get(v)
+    if level:
+        return level
+
+    # 可能是整数（如 "03"、"+3"、全角数字）
+    try:
+        iv = int(v)
+        if 1 <= iv <= 5:
+            return NUMBER_TO_PRIORITY[str(iv)]
+    except Exception:
+        pass
+
+    # 处理"优先级X"格式
+    priority_match = _PRIORITY_PREFIX.search(v)
+    if priority_match:
+        return NUMBER_TO_PRIORITY[priority_match.group(1)]
+
+    # 关键词（用户词汇 + 中英文描述）
+    for words, level in _keywords:
+        for word in words:
+            if word in v:
+                return level
+
+    return DEFAULT_PRIORITY
+
+
+def normalize_priority(value) -> str:
+    """
+    将多种优先级表示统一为P0-P4；缺失或非法时为P2。
+    支持以下格式：
+    - 1-5, '1'-'5'
+    - P0-P4, p0-p4
+    - 优先级1-5
+    - 高、中、低
+    - High, Medium, Low
+    - Critical, Major, Minor, Trivial
+    - 映射文件中追加的词汇
+    """
+    if value is None:
+        return DEFAULT_PRIORITY
+    raw = str(value)
+    level = _memo.get(raw)
+    if level is None:
+        level = _resolve(raw)
+        if len(_memo) >= _MEMO_SIZE:
+            _memo.clear()
+        _memo[raw] = level
+    return level
+
+
+def from_topic(tree, index: int) -> str:
+    """
+    从XMind主题中提取优先级信息（tree 为 xmind_reader.TopicTree，index 为主题编号）。
+    优先级可能存在于：
+    1. 标题中的P0-P4标记
+    2. 标签(markers)中的优先级标识
+    3. 备注(notes)中的优先级信息
+    """
+    # 1. 检查标题中的优先级标记
+    title = tree.titles[index]
+    if title:
+        priority_match = _TITLE_PRIORITY.search(title)
+        if priority_match:
+            token = priority_match.group(1)
+            return token if token[0] == "P" else NUMBER_TO_PRIORITY[token]
+
+    # 2. 检查标签(markers)中的优先级（构建主题树时已统一为字符串ID）
+    for marker_id in tree.markers[index]:
+        lowered = marker_id.lower()
+        if 'priority' in lowered or 'importance' in lowered:
+            num_match = _DIGITS.search(marker_id)
+            if num_match:
+                return normalize_priority(num_match.group(1))
+
+    # 3. 检查备注中的优先级信息
+    notes = tree.notes[index]
+    if notes:
+        notes = str(notes)
+        if "P" in notes or "优先级" in notes:
+            priority_in_notes = _NOTES_PRIORITY.search(notes)
+            if priority_in_notes:
+                if priority_in_notes.group(1).startswith('P'):
+                    return priority_in_notes.group(1)
+                return NUMBER_TO_PRIORITY[priority_in_notes.group(2)]
+
+    # 默认返回P2
+    return DEFAULT_PRIORITY
+
+
+_env_mapping = os.environ.get("XMIND_PRIORITY_MAP")
+if _env_mapping:
+    try:
+        configure(_env_mapping)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ 优先级映射文件加载失败，仅使用内置词汇: {e}")
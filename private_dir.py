@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+当前用户私有目录的检查（解析缓存、导出缓存、转换结果登记表、转换任务目录共用）
+
+这些目录默认位于系统临时目录下，其中的文件会被反序列化、作为导出结果返回或按记录中的路径删除。
+其他本地用户若能预先创建同名目录或在其中放置文件，就能让 Web 进程读取、返回或删除任意文件，因此：
+- 默认目录按用户区分（<临时目录>/<名称>-<uid>），以 0700 权限创建
+- 每次使用前检查目录不是符号链接、属于当前用户且组和其他用户无任何权限；
+  检查不通过（例如他人预先创建了同名目录）时调用方不读写该目录
+"""
+
+import getpass
+import os
+import stat
+import tempfile
+
+# 已提示过权限不安全的目录（每个目录只提示一次）
+_insecure_dirs = set()
+
+
+def default_dir(name: str) -> str:
+    """按用户区分的默认目录 <临时目录>/<name>-<uid>（无 getuid 的平台使用用户名）"""
+    owner = os.getuid() if hasattr(os, "getuid") else getpass.getuser()
+    return os.path.join(tempfile.gettempdir(), f"{name}-{owner}")
+
+
+def is_private(directory: str, create: bool = False, label: str = "目录") -> bool:
+    """
+    directory 是否只有当前用户可访问（不是符号链接、属于当前用户、组和其他用户无权限）。
+    create 为真时目录不存在则以 0700 权限创建；label 用于不安全时的提示。
+    """
+    try:
+        if create:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        info = os.lstat(directory)
+    except OSError:
+        return False
+    private = stat.S_ISDIR(info.st_mode) and (
+        not hasattr(os, "getuid") or (info.st_uid == os.getuid() and not info.st_mode & 0o077))
+    if not private and directory not in _insecure_dirs:
+        _insecure_dirs.add(directory)
+        print(f"⚠️ {label} {directory} 不是当前用户私有的目录（须为 0700 且属于当前用户），已跳过")
+    return private
+
+
+def contains(directory: str, path) -> bool:
+    """path 解析符号链接后是否位于 directory 之内（不含 directory 本身）"""
+    if not isinstance(path, str) or not path:
+        return False
+    root = os.path.realpath(directory)
+    real = os.path.realpath(path)
+    try:
+        return real != root and os.path.commonpath([real, root]) == root
+    except ValueError:
+        # Windows 上位于不同驱动器
+        return False
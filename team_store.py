@@ -0,0 +1,264 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+团队文件元数据存储（SQLite，供 Web 界面使用，不依赖 Flask）
+
+原先的 files_db.json 在每次页面访问、上传、导出、删除时整体读取或重写，按 ID 查找为线性扫描；
+多个 gunicorn worker 同时上传时没有加锁，后写入的进程会覆盖其他进程新增的记录。改为 SQLite：
+- WAL 模式：读不阻塞写、写不阻塞读；写事务由 SQLite 文件锁串行化，多进程并发上传不丢记录
+- 主键 id（B 树索引）按 ID 查找、删除，不随文件数量线性变慢；upload_time、(uploader, upload_time) 建索引，
+  列表与按上传者筛选直接走索引排序
+- 每个线程（及 fork 后的每个进程）各自持有连接，首次使用时自动建表（gunicorn 下无需调用初始化）
+- 一次性迁移：数据库为空版本时导入旧 files_db.json 的全部记录（同一事务内完成），
+  之后将 JSON 文件改名为 files_db.json.migrated 保留备份；多个 worker 同时启动时只有一个执行迁移
+- 进程内缓存：每个进程在内存中保存完整的文件列表快照（含按 ID、按上传者的索引），查询直接读快照。
+  每次写事务在同一事务内递增代数（store_meta.generation），提交后写入临时文件再 os.replace 为 <数据库>.generation；
+  查询时只读取该文件中的代数（几个字节），与快照记录的代数不同时才重新读取数据库
+  （不使用 inode/mtime：os.replace 释放的 inode 可能被下一个同样大小的临时文件复用，mtime 精度也可能不足），
+  因此任一 worker 的写入都会使所有 worker 的快照在下一次查询时刷新，无变化时查询不读数据库
+  （绕过本模块直接修改数据库不会刷新快照）
+
+记录字段与原 JSON 一致：id、filename、original_name、uploader、description、upload_time、file_size。
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import uuid
+from typing import Dict, Iterable, List, Optional
+
+DB_PATH = os.path.join(tempfile.gettempdir(), "xmind_team_files", "files.db")
+# 旧版 JSON 文件列表，首次打开数据库时迁移；None 表示不迁移
+LEGACY_JSON = None
+
+# 数据库结构版本（PRAGMA user_version）：0 为未初始化，2 增加 store_meta（写入代数）
+SCHEMA_VERSION = 2
+
+FILE_FIELDS = ("id", "filename", "original_name", "uploader", "description", "upload_time", "file_size")
+
+# 其他进程持有写锁时的等待时间（秒）
+_BUSY_TIMEOUT = 10.0
+_MIGRATED_SUFFIX = ".migrated"
+_GENERATION_SUFFIX = ".generation"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS team_files (
+    id            TEXT PRIMARY KEY,
+    filename      TEXT NOT NULL,
+    original_name TEXT NOT NULL,
+    uploader      TEXT NOT NULL DEFAULT '',
+    description   TEXT NOT NULL DEFAULT '',
+    upload_time   TEXT NOT NULL,
+    file_size     INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_team_files_upload_time ON team_files (upload_time);
+CREATE INDEX IF NOT EXISTS idx_team_files_uploader ON team_files (uploader, upload_time);
+CREATE TABLE IF NOT EXISTS store_meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO store_meta (key, value) VALUES ('generation', 0);
+"""
+
+_INSERT = f"INSERT INTO team_files ({', '.join(FILE_FIELDS)}) VALUES ({', '.join('?' * len(FILE_FIELDS))})"
+
+_local = threading.local()
+
+# 进程内快照：(变更标记, 按上传时间排序的记录, {ID: 记录}, {上传者: [记录]})
+_snapshot = None
+_snapshot_lock = threading.Lock()
+
+
+def configure(db_path: Optional[str] = None, legacy_json: Optional[str] = None):
+    """修改数据库路径或待迁移的旧 JSON 文件路径（已打开的连接在下次使用时按新路径重新打开）"""
+    global DB_PATH, LEGACY_JSON
+    if db_path is not None:
+        DB_PATH = db_path
+    if legacy_json is not None:
+        LEGACY_JSON = legacy_json
+
+
+def _open() -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(os.path.abspath(DB_PATH)), exist_ok=True)
+    # isolation_level=None：自动提交，写操作显式 BEGIN IMMEDIATE
+    conn = sqlite3.connect(DB_PATH, timeout=_BUSY_TIMEOUT, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL 模式下 NORMAL 仍保证数据库一致，只是掉电时可能丢失最后一次提交
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+        _initialize(conn)
+    return conn
+
+
+def _connection() -> sqlite3.Connection:
+    """当前线程的连接；fork 后的子进程或修改路径后重新打开"""
+    key = (os.getpid(), DB_PATH)
+    if getattr(_local, "key", None) != key:
+        _local.conn = _open()
+        _local.key = key
+    return _local.conn
+
+
+def _initialize(conn: sqlite3.Connection):
+    """建表（或升级结构）并迁移旧 JSON 记录；写锁内再次检查版本，多进程同时初始化时只执行一次"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            conn.execute("COMMIT")
+            return
+        for statement in _SCHEMA.split(";"):
+            if statement.strip():
+                conn.execute(statement)
+        migrated = _import_legacy(conn) if version == 0 else 0
+        generation = _bump_generation(conn)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    _publish_generation(generation)
+    if migrated:
+        os.replace(LEGACY_JSON, LEGACY_JSON + _MIGRATED_SUFFIX)
+        print(f"📦 已将 {migrated} 条团队文件记录从 {LEGACY_JSON} 迁移到 {DB_PATH}")
+
+
+def _import_legacy(conn: sqlite3.Connection) -> int:
+    """导入旧 JSON 文件列表中的记录（ID 重复时保留先出现的），返回导入条数"""
+    if not LEGACY_JSON or not os.path.exists(LEGACY_JSON):
+        return 0
+    try:
+        with open(LEGACY_JSON, "r", encoding="utf-8") as f:
+            records = json.load(f)
+    except (OSError, ValueError):
+        return 0
+    rows = [_row(record) for record in records if isinstance(record, dict) and record.get("id")]
+    return conn.executemany(_INSERT.replace("INSERT", "INSERT OR IGNORE", 1), rows).rowcount
+
+
+def _row(file_info: dict) -> tuple:
+    return (
+        str(file_info["id"]),
+        file_info.get("filename") or "",
+        file_info.get("original_name") or file_info.get("filename") or "",
+        file_info.get("uploader") or "",
+        file_info.get("description") or "",
+        file_info.get("upload_time") or "",
+        int(file_info.get("file_size") or 0),
+    )
+
+
+def _bump_generation(conn: sqlite3.Connection) -> int:
+    """在当前写事务内递增写入代数（写事务由 SQLite 跨进程串行化，代数严格递增）"""
+    conn.execute("UPDATE store_meta SET value = value + 1 WHERE key = 'generation'")
+    return conn.execute("SELECT value FROM store_meta WHERE key = 'generation'").fetchone()[0]
+
+
+def _generation_path() -> str:
+    return DB_PATH + _GENERATION_SUFFIX
+
+
+def _publish_generation(generation: int):
+    """提交后发布写入代数：写临时文件再原子替换（读取方不会读到写了一半的内容），各进程据此刷新快照"""
+    path = _generation_path()
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(str(generation))
+    os.replace(tmp_path, path)
+
+
+def _change_token():
+    """快照的变更标记：数据库路径 + 代数文件中的写入代数；代数文件不存在或无法读取时为 None"""
+    try:
+        with open(_generation_path(), "r", encoding="utf-8") as f:
+            generation = int(f.read())
+    except (OSError, ValueError):
+        return DB_PATH, None
+    return DB_PATH, generation
+
+
+def _current_snapshot():
+    """当前快照；变更标记与快照不一致时重新读取数据库（先取标记再读数据，读取期间的写入会在下次查询时刷新）"""
+    global _snapshot
+    token = _change_token()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot[0] == token:
+        return snapshot
+    with _snapshot_lock:
+        snapshot = _snapshot
+        if snapshot is not None and snapshot[0] == token:
+            return snapshot
+        records = tuple(dict(row) for row in
+                        _connection().execute("SELECT * FROM team_files ORDER BY upload_time, rowid"))
+        by_uploader = {}
+        for record in records:
+            by_uploader.setdefault(record["uploader"], []).append(record)
+        snapshot = (token, records, {record["id"]: record for record in records}, by_uploader)
+        _snapshot = snapshot
+        return snapshot
+
+
+def _write(statement: str, params: tuple):
+    """执行一条写语句并递增代数，返回受影响行数；有变化时提交后发布代数"""
+    conn = _connection()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        changed = conn.execute(statement, params).rowcount
+        generation = _bump_generation(conn) if changed else None
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    if generation is not None:
+        _publish_generation(generation)
+    return changed
+
+
+def add_file(file_info: dict):
+    """新增一条文件记录（字段见 FILE_FIELDS）；ID 已存在时抛出 ValueError"""
+    try:
+        _write(_INSERT, _row(file_info))
+    except sqlite3.IntegrityError:
+        raise ValueError(f"文件ID已存在: {file_info['id']}")
+
+
+def get_file(file_id: str) -> Optional[dict]:
+    """按 ID 查找文件记录（读进程内快照），不存在时返回 None"""
+    record = _current_snapshot()[2].get(file_id)
+    return dict(record) if record else None
+
+
+def get_files(file_ids: Iterable[str]) -> Dict[str, dict]:
+    """按 ID 批量查找，返回 {文件ID: 文件记录}（不存在的 ID 不出现在结果中）"""
+    by_id = _current_snapshot()[2]
+    return {file_id: dict(by_id[file_id]) for file_id in file_ids if file_id in by_id}
+
+
+def list_files(uploader: Optional[str] = None, limit: Optional[int] = None, offset: int = 0) -> List[dict]:
+    """
+    按上传时间从早到晚列出文件记录，可按上传者筛选、分页（limit=None 表示不限）。
+    返回的记录与进程内快照共享，调用方不得修改。
+    """
+    _, records, _, by_uploader = _current_snapshot()
+    if uploader is not None:
+        records = by_uploader.get(uploader, ())
+    end = None if limit is None else offset + limit
+    return list(records[offset:end])
+
+
+def count_files(uploader: Optional[str] = None) -> int:
+    """文件记录数（可按上传者筛选）"""
+    _, records, _, by_uploader = _current_snapshot()
+    return len(records if uploader is None else by_uploader.get(uploader, ()))
+
+
+def delete_file(file_id: str) -> Optional[dict]:
+    """删除文件记录并返回被删除的记录；不存在时返回 None（并发删除同一文件时只有一个调用方得到记录）"""
+    row = _connection().execute("SELECT * FROM team_files WHERE id = ?", (file_id,)).fetchone()
+    if row and _write("DELETE FROM team_files WHERE id = ?", (file_id,)):
+        return dict(row)
+    return None
@@ -10,13 +10,18 @@ XMind 转 CSV 团队协作Web界面 - 优化版本
 import os
 import tempfile
 import uuid
-import json
 import datetime
-import shutil
-from flask import Flask, render_template_string, request, send_file, jsonify, flash, redirect, url_for
+from flask import Flask, Response, render_template_string, request, send_file, jsonify, flash, redirect, url_for
 from werkzeug.utils import secure_filename
-from converter import convert_to_csv, get_structured_cases
-from module_converter_final import convert_to_module_csv, get_module_cases, get_module_export_filename
+import bundle_export
+import conversion_jobs
+import delta_export
+import export_cache
+import export_stream
+import team_store
+import xmind_reader
+from converter import convert_to_xlsx, stream_csv, stream_ndjson
+from module_converter_final import convert_to_module_xlsx, get_module_export_filename, stream_module_csv
 
 app = Flask(__name__)
 app.secret_key = 'xmind2csv_team_secret_key'
@@ -27,35 +32,30 @@ ALLOWED_EXTENSIONS = {'xmind'}
 
 # 团队文件存储目录
 TEAM_FILES_DIR = os.path.join(tempfile.gettempdir(), 'xmind_team_files')
+# 团队文件元数据（SQLite）；旧版 JSON 文件列表在首次打开数据库时自动迁移
+TEAM_FILES_SQLITE = os.environ.get('XMIND_TEAM_DB') or os.path.join(TEAM_FILES_DIR, 'files.db')
 TEAM_FILES_DB = os.path.join(TEAM_FILES_DIR, 'files_db.json')
+team_store.configure(TEAM_FILES_SQLITE, legacy_json=TEAM_FILES_DB)
+# Web 进程内多画布转换与打包导出串行执行：gunicorn 每个 worker 各自再启动进程池会超额占用 CPU，
+# 也避免在转换任务的调度线程运行期间 fork
+xmind_reader.configure(workers=1)
+bundle_export.configure(workers=1)
 
 def init_team_storage():
-    """初始化团队文件存储"""
+    """初始化团队文件存储（建表、迁移旧 JSON 文件列表；gunicorn 下首次访问时自动完成）"""
     if not os.path.exists(TEAM_FILES_DIR):
         os.makedirs(TEAM_FILES_DIR)
-    if not os.path.exists(TEAM_FILES_DB):
-        with open(TEAM_FILES_DB, 'w', encoding='utf-8') as f:
-            json.dump([], f)
+    team_store.count_files()
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 def load_team_files():
-    """加载团队文件列表"""
-    try:
-        with open(TEAM_FILES_DB, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except:
-        return []
-
-def save_team_files(files_data):
-    """保存团队文件列表"""
-    with open(TEAM_FILES_DB, 'w', encoding='utf-8') as f:
-        json.dump(files_data, f, ensure_ascii=False, indent=2)
+    """加载团队文件列表（按上传时间排序）"""
+    return team_store.list_files()
 
 def add_team_file(filename, original_name, uploader, description):
     """添加文件到团队列表"""
-    files_data = load_team_files()
     file_info = {
         'id': str(uuid.uuid4()),
         'filename': filename,
@@ -65,8 +65,7 @@ def add_team_file(filename, original_name, uploader, description):
         'upload_time': datetime.datetime.now().isoformat(),
         'file_size': os.path.getsize(os.path.join(TEAM_FILES_DIR, filename))
     }
-    files_data.append(file_info)
-    save_team_files(files_data)
+    team_store.add_file(file_info)
     return file_info['id']
 
 # HTML 模板 - 按照参考图设计
@@ -325,6 +324,11 @@ HTML_TEMPLATE = '''
             color: white;
         }
         
+        .export-btn.xlsx {
+            background: #217346;
+            color: white;
+        }
+        
         .export-btn.delete {
             background: #f44336;
             color: white;
@@ -488,17 +492,20 @@ HTML_TEMPLATE = '''
                         </button>
                     </form>
                     
-                    {% if result %}
-                    <div class="alert alert-success">
-                        <h4>✅ 转换成功！</h4>
-                        <p><strong>生成文件:</strong> {{ result.filename }}</p>
-                        <p><strong>文件大小:</strong> {{ result.size }} 字节</p>
-                        <p><strong>用例数量:</strong> {{ result.case_count }}</p>
-                        <p><strong>步骤数量:</strong> {{ result.step_count }}</p>
-                        <p><strong>导出格式:</strong> {{ result.export_type }}</p>
-                        
-                        <div style="margin-top: 15px;">
-                            <a href="{{ url_for('download_file', filename=result.filename) }}" class="btn">📥 下载 CSV 文件</a>
+                    {% if job %}
+                    <div class="alert alert-success" id="jobResult" data-status-url="{{ job.status_url }}">
+                        <h4 id="jobTitle"><span class="loading"></span>排队中...</h4>
+                        <p><strong>源文件:</strong> {{ job.source_name }}</p>
+                        <p><strong>导出格式:</strong> {{ job.export_type_name }}</p>
+                        <div id="jobDetails" style="display: none;">
+                            <p><strong>生成文件:</strong> <span id="jobFilename"></span></p>
+                            <p><strong>文件大小:</strong> <span id="jobSize"></span> 字节</p>
+                            <p><strong>用例数量:</strong> <span id="jobCaseCount"></span></p>
+                            <p><strong>步骤数量:</strong> <span id="jobStepCount"></span></p>
+                            
+                            <div style="margin-top: 15px;">
+                                <a id="jobDownload" href="#" class="btn">📥 下载 CSV 文件</a>
+                            </div>
                         </div>
                     </div>
                     {% endif %}
@@ -569,6 +576,12 @@ HTML_TEMPLATE = '''
                                     <button class="export-btn module" onclick="exportFile('{{ file.id }}', 'module')" title="导出模块化用例格式">
                                         📊 新表头CSV
                                     </button>
+                                    <button class="export-btn xlsx" onclick="exportFile('{{ file.id }}', 'module_xlsx')" title="导出模块化用例格式（Excel）">
+                                        📗 新表头Excel
+                                    </button>
+                                    <button class="export-btn xlsx" onclick="exportFile('{{ file.id }}', 'xlsx')" title="标准测试用例格式（Excel）">
+                                        📗 标准Excel
+                                    </button>
                                     <button class="export-btn delete" onclick="deleteFile('{{ file.id }}')" title="删除文件">
                                         🗑️ 删除
                                     </button>
@@ -689,15 +702,29 @@ HTML_TEMPLATE = '''
             button.innerHTML = '<span class="loading"></span>导出中...';
             button.disabled = true;
             
-            // 发送导出请求
-            fetch('/api/export', {
+            // 原始XMind文件直接下载；其余格式提交后台转换任务，完成后再下载结果
+            const request = exportType === 'xmind' ? downloadXmind(fileId) : runExportJob(fileId, exportType, button);
+            request
+            .catch(error => {
+                console.error('导出错误:', error);
+                alert('导出失败: ' + error.message);
+            })
+            .finally(() => {
+                // 恢复按钮状态
+                button.innerHTML = originalText;
+                button.disabled = false;
+            });
+        }
+        
+        function downloadXmind(fileId) {
+            return fetch('/api/export', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
                 },
                 body: JSON.stringify({
                     file_id: fileId,
-                    export_type: exportType
+                    export_type: 'xmind'
                 })
             })
             .then(response => {
@@ -709,28 +736,85 @@ HTML_TEMPLATE = '''
             .then(blob => {
                 // 创建下载链接
                 const url = window.URL.createObjectURL(blob);
-                const a = document.createElement('a');
-                a.href = url;
-                
-                if (exportType === 'xmind') {
-                    a.download = `${fileId.substring(0, 8)}.xmind`;
-                } else {
-                    a.download = `exported_${exportType}_${fileId.substring(0, 8)}.csv`;
-                }
-                
-                document.body.appendChild(a);
-                a.click();
-                document.body.removeChild(a);
+                triggerDownload(url, `${fileId.substring(0, 8)}.xmind`);
                 window.URL.revokeObjectURL(url);
+            });
+        }
+        
+        function triggerDownload(url, filename) {
+            const a = document.createElement('a');
+            a.href = url;
+            a.download = filename;
+            document.body.appendChild(a);
+            a.click();
+            document.body.removeChild(a);
+        }
+        
+        function readJson(response) {
+            return response.json().then(data => {
+                if (!response.ok) {
+                    throw new Error(data.error || `HTTP error! status: ${response.status}`);
+                }
+                return data;
+            });
+        }
+        
+        // 提交转换任务并轮询任务状态，完成后下载结果
+        function runExportJob(fileId, exportType, button) {
+            return fetch('/api/jobs', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({
+                    file_id: fileId,
+                    export_type: exportType
+                })
             })
-            .catch(error => {
-                console.error('导出错误:', error);
-                alert('导出失败: ' + error.message);
+            .then(readJson)
+            .then(job => waitForJob(job, button))
+            .then(job => triggerDownload(job.download_url, job.download_name));
+        }
+        
+        // 状态接口立即返回：按服务端建议的间隔（poll_interval 秒）重复查询，直到任务结束
+        function waitForJob(job, element) {
+            if (job.status === 'done') {
+                return Promise.resolve(job);
+            }
+            if (job.status === 'failed') {
+                return Promise.reject(new Error(job.error || '转换失败'));
+            }
+            element.innerHTML = job.status === 'queued'
+                ? '<span class="loading"></span>排队中...'
+                : '<span class="loading"></span>转换中...';
+            return new Promise(resolve => setTimeout(resolve, (job.poll_interval || 1) * 1000))
+                .then(() => fetch(job.status_url))
+                .then(readJson)
+                .then(next => waitForJob(next, element));
+        }
+        
+        // 直接转换下载：上传后页面轮询转换任务，完成后显示统计信息并自动下载
+        const jobResult = document.getElementById('jobResult');
+        if (jobResult) {
+            const jobTitle = document.getElementById('jobTitle');
+            fetch(jobResult.dataset.statusUrl)
+            .then(readJson)
+            .then(job => waitForJob(job, jobTitle))
+            .then(job => {
+                jobTitle.textContent = '✅ 转换成功！';
+                document.getElementById('jobFilename').textContent = job.download_name;
+                document.getElementById('jobSize').textContent = job.size;
+                document.getElementById('jobCaseCount').textContent = job.case_count ?? '-';
+                document.getElementById('jobStepCount').textContent = job.step_count ?? '-';
+                const link = document.getElementById('jobDownload');
+                link.href = job.download_url;
+                link.download = job.download_name;
+                document.getElementById('jobDetails').style.display = 'block';
+                triggerDownload(job.download_url, job.download_name);
             })
-            .finally(() => {
-                // 恢复按钮状态
-                button.innerHTML = originalText;
-                button.disabled = false;
+            .catch(error => {
+                jobResult.className = 'alert alert-error';
+                jobTitle.textContent = '❌ 转换失败: ' + error.message;
             });
         }
         
@@ -789,6 +873,9 @@ HTML_TEMPLATE = '''
 </html>
 '''
 
+# 首页“直接转换下载”的导出格式 -> 显示名称
+CONVERT_EXPORT_NAMES = {'module': '模块化用例', 'standard': '标准CSV', 'zentao': '禅道CSV'}
+
 @app.route('/', methods=['GET', 'POST'])
 def index():
     if request.method == 'POST':
@@ -812,53 +899,22 @@ def index():
         if file and allowed_file(file.filename):
             try:
                 if action_type == 'convert':
-                    # 直接转换并下载
+                    # 直接转换并下载：提交后台转换任务后立即返回页面，页面轮询任务状态，完成后自动下载
                     filename = secure_filename(file.filename or 'unknown.xmind')
-                    temp_dir = tempfile.gettempdir()
-                    input_path = os.path.join(temp_dir, f"{uuid.uuid4()}_{filename}")
-                    file.save(input_path)
+                    export_type = export_format if export_format in CONVERT_EXPORT_NAMES else 'standard'
                     
-                    # 根据导出格式执行转换
-                    if export_format == 'module':
-                        csv_path = convert_to_module_csv(input_path, parser='auto')
-                        cases = get_module_cases(input_path, parser='auto')
-                        export_type_name = '模块化用例'
-                    elif export_format == 'zentao':
-                        csv_path = convert_to_csv(input_path, parser='auto')
-                        cases = get_structured_cases(input_path, parser='auto')
-                        export_type_name = '禅道CSV'
-                    else:
-                        csv_path = convert_to_csv(input_path, parser='auto')
-                        cases = get_structured_cases(input_path, parser='auto')
-                        export_type_name = '标准CSV'
-                    
-                    # 获取统计信息
-                    case_count = len(cases)
-                    step_count = sum(len(case.get('steps', [])) for case in cases)
-                    file_size = os.path.getsize(csv_path)
-
                     # 将原始XMind文件保存到团队库，并加入团队列表，便于后续导出操作
-                    try:
-                        unique_filename = f"{uuid.uuid4()}_{filename}"
-                        team_file_path = os.path.join(TEAM_FILES_DIR, unique_filename)
-                        shutil.copyfile(input_path, team_file_path)
-                        add_team_file(unique_filename, filename, uploader or '未填', description or '')
-                    except Exception as _:
-                        pass
-                    
-                    # 清理临时输入文件
-                    os.remove(input_path)
+                    unique_filename = f"{uuid.uuid4()}_{filename}"
+                    team_file_path = os.path.join(TEAM_FILES_DIR, unique_filename)
+                    file.save(team_file_path)
+                    file_id = add_team_file(unique_filename, filename, uploader or '未填', description or '')
                     
-                    result = {
-                        'filename': os.path.basename(csv_path),
-                        'size': file_size,
-                        'case_count': case_count,
-                        'step_count': step_count,
-                        'export_type': export_type_name
-                    }
+                    job = conversion_jobs.submit(team_file_path, export_type, filename, file_id=file_id)
+                    job['status_url'] = url_for('api_job_status', job_id=job['id'])
+                    job['export_type_name'] = CONVERT_EXPORT_NAMES[export_type]
                     
                     team_files = load_team_files()
-                    return render_template_string(HTML_TEMPLATE, team_files=team_files, result=result)
+                    return render_template_string(HTML_TEMPLATE, team_files=team_files, job=job)
                     
                 else:
                     # 上传到团队列表
@@ -885,6 +941,37 @@ def index():
     team_files = load_team_files()
     return render_template_string(HTML_TEMPLATE, team_files=team_files)
 
+def _prepend(first, chunks):
+    """先产出已取出的首块再转发其余字节块；响应关闭（客户端断开）时 close 传递给 chunks"""
+    yield first
+    yield from chunks
+
+def stream_csv_response(chunks, download_name, mimetype='text/csv'):
+    """
+    将导出内容的字节块作为附件流式返回（不落临时文件）。
+    先取首块（CSV 为表头 + 第一批数据行，NDJSON 为第一条记录），解析失败时异常在此抛出，仍由调用方返回错误响应。
+    """
+    first = next(chunks, b'')
+    return Response(_prepend(first, chunks), mimetype=mimetype, headers={
+        'Content-Disposition': export_stream.content_disposition(download_name),
+        # 关闭 Nginx 反向代理的响应缓冲，使数据块到达即转发
+        'X-Accel-Buffering': 'no',
+    })
+
+@app.route('/api/files', methods=['GET'])
+def api_files():
+    """API接口：团队文件列表（按上传时间排序），?uploader= 按上传者筛选，?limit=&offset= 分页"""
+    uploader = request.args.get('uploader')
+    try:
+        limit = int(request.args['limit']) if 'limit' in request.args else None
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({'error': 'limit、offset 必须是整数'}), 400
+    return jsonify({
+        'total': team_store.count_files(uploader),
+        'files': team_store.list_files(uploader=uploader, limit=limit, offset=offset),
+    })
+
 @app.route('/api/export', methods=['POST'])
 def api_export():
     """API接口：导出文件"""
@@ -897,13 +984,7 @@ def api_export():
             return jsonify({'error': '缺少文件ID'}), 400
         
         # 查找文件
-        team_files = load_team_files()
-        target_file = None
-        for file_info in team_files:
-            if file_info['id'] == file_id:
-                target_file = file_info
-                break
-        
+        target_file = team_store.get_file(file_id)
         if not target_file:
             return jsonify({'error': '文件不存在'}), 404
         
@@ -912,24 +993,207 @@ def api_export():
         if not os.path.exists(file_path):
             return jsonify({'error': '文件已被删除'}), 404
         
-        # 根据导出类型执行转换
         if export_type == 'xmind':
             # 直接返回原始XMind文件
             return send_file(file_path, as_attachment=True, download_name=target_file['original_name'])
-        elif export_type == 'module':
-            # 模块化用例格式
-            csv_path = convert_to_module_csv(file_path, parser='auto')
-            download_name = get_module_export_filename(file_path)
+        
+        # 团队文件上传后不再变化：已导出过的结果直接发送缓存文件，不再转换
+        cached = export_cache.lookup(file_id, export_type, 'auto')
+        if cached:
+            cached_path, download_name, mimetype = cached
+            return send_file(cached_path, as_attachment=True, download_name=download_name, mimetype=mimetype)
+        
+        # 根据导出类型执行转换；流式导出边发送边写入缓存，文件导出生成后移入缓存
+        stem = target_file['original_name'].replace('.xmind', '')
+        if export_type == 'module':
+            # 模块化用例格式（流式写入响应）
+            chunks, download_name = stream_module_csv(file_path, parser='auto'), get_module_export_filename(file_path)
+            mimetype = 'text/csv'
+        elif export_type == 'module_xlsx':
+            # 模块化用例格式（Excel，流式写入，多行步骤为自动换行单元格）
+            export_path = convert_to_module_xlsx(file_path, parser='auto')
+            download_name = get_module_export_filename(file_path, ext='xlsx')
+        elif export_type == 'xlsx':
+            # 标准格式（Excel）
+            export_path = convert_to_xlsx(file_path, parser='auto')
+            download_name = f"{stem}_标准用例.xlsx"
+        elif export_type == 'ndjson':
+            # 结构化 NDJSON（每行一个用例，定期 flush，供下游流水线逐行读取）
+            chunks, download_name = stream_ndjson(file_path, parser='auto'), f"{stem}_用例.ndjson"
+            mimetype = 'application/x-ndjson'
         elif export_type == 'zentao':
-            # 禅道CSV格式
-            csv_path = convert_to_csv(file_path, parser='auto')
-            download_name = f"{target_file['original_name'].replace('.xmind', '')}_禅道CSV.csv"
+            # 禅道CSV格式（流式写入响应）
+            chunks, download_name = stream_csv(file_path, parser='auto'), f"{stem}_禅道CSV.csv"
+            mimetype = 'text/csv'
         else:
-            # 标准CSV格式
-            csv_path = convert_to_csv(file_path, parser='auto')
-            download_name = f"{target_file['original_name'].replace('.xmind', '')}_标准CSV.csv"
+            # 标准CSV格式（流式写入响应）
+            export_type = 'standard'
+            chunks, download_name = stream_csv(file_path, parser='auto'), f"{stem}_标准CSV.csv"
+            mimetype = 'text/csv'
+        
+        if export_type in ('xlsx', 'module_xlsx'):
+            mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            export_path = export_cache.store_file(file_id, export_type, 'auto', export_path, download_name, mimetype)
+            return send_file(export_path, as_attachment=True, download_name=download_name, mimetype=mimetype)
+        chunks = export_cache.tee(file_id, export_type, 'auto', chunks, download_name, mimetype)
+        return stream_csv_response(chunks, download_name, mimetype=mimetype)
         
-        return send_file(csv_path, as_attachment=True, download_name=download_name)
+    except Exception as e:
+        return jsonify({'error': f'导出失败: {str(e)}'}), 500
+
+def job_response(state, status=200):
+    """任务状态 JSON（含查询地址；完成时附带下载地址）"""
+    data = dict(state)
+    data['status_url'] = url_for('api_job_status', job_id=state['id'])
+    data['poll_interval'] = conversion_jobs.POLL_INTERVAL
+    if state['status'] == conversion_jobs.JOB_DONE:
+        data['download_url'] = url_for('api_job_download', job_id=state['id'])
+    return jsonify(data), status
+
+@app.route('/api/jobs', methods=['POST'])
+def api_submit_job():
+    """
+    API接口：提交异步转换任务，立即返回任务ID（202），转换在后台任务队列中执行
+    - JSON：{"file_id": 团队文件ID, "export_type": "standard" | "zentao" | "module" | "xlsx" | "module_xlsx" | "ndjson"}
+      与 /api/export 共用导出缓存，命中时返回的任务已完成（status=done，cached=true）
+    - 表单上传：file=XMind 文件，export_type=导出类型
+    之后每隔 poll_interval 秒查询 status_url（立即返回）轮询任务状态，完成后从 download_url 下载结果
+    """
+    try:
+        if 'file' in request.files:
+            file = request.files['file']
+            export_type = request.form.get('export_type', 'module')
+            if not file.filename or not allowed_file(file.filename):
+                return jsonify({'error': '请选择有效的 XMind 文件 (.xmind)'}), 400
+            filename = secure_filename(file.filename or 'unknown.xmind')
+            input_path = os.path.join(tempfile.gettempdir(), f"{uuid.uuid4()}_{filename}")
+            file.save(input_path)
+            try:
+                state = conversion_jobs.submit(input_path, export_type, os.path.basename(file.filename), move=True)
+            finally:
+                if os.path.exists(input_path):
+                    os.remove(input_path)
+        else:
+            data = request.get_json(silent=True) or {}
+            file_id = data.get('file_id')
+            export_type = data.get('export_type', 'standard')
+            if not file_id:
+                return jsonify({'error': '缺少文件ID'}), 400
+            target_file = team_store.get_file(file_id)
+            if not target_file:
+                return jsonify({'error': '文件不存在'}), 404
+            file_path = os.path.join(TEAM_FILES_DIR, target_file['filename'])
+            if not os.path.exists(file_path):
+                return jsonify({'error': '文件已被删除'}), 404
+            # 团队文件与 /api/export 共用导出缓存：已导出过的结果直接完成，不再排队转换
+            state = conversion_jobs.submit(file_path, export_type, target_file['original_name'], file_id=file_id)
+        return job_response(state, 202)
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except conversion_jobs.QueueFullError as e:
+        return jsonify({'error': str(e)}), 503
+    except Exception as e:
+        return jsonify({'error': f'提交失败: {str(e)}'}), 500
+
+@app.route('/api/jobs', methods=['GET'])
+def api_job_stats():
+    """API接口：任务队列深度（各状态任务数）与最近任务的排队、转换耗时（不含任务 ID）"""
+    return jsonify(conversion_jobs.queue_stats())
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def api_job_status(job_id):
+    """API接口：任务状态（只读取状态文件，立即返回；客户端按 poll_interval 间隔轮询）"""
+    state = conversion_jobs.get_job(job_id)
+    if state is None:
+        return jsonify({'error': '任务不存在或已过期'}), 404
+    return job_response(state)
+
+@app.route('/api/jobs/<job_id>/download', methods=['GET'])
+def api_job_download(job_id):
+    """API接口：下载已完成任务的结果文件"""
+    state = conversion_jobs.get_job(job_id)
+    if state is None:
+        return jsonify({'error': '任务不存在或已过期'}), 404
+    path = conversion_jobs.result_path(state)
+    if path is None:
+        return jsonify({'error': f"任务尚未完成（{state['status']}）", 'status': state['status']}), 409
+    return send_file(path, as_attachment=True, download_name=state['download_name'])
+
+@app.route('/api/export_bundle', methods=['POST'])
+def api_export_bundle():
+    """
+    API接口：多个团队文件 × 多种格式打包导出（ZIP）
+    请求体：{"file_ids": [...], "formats": ["standard", "zentao", "module"]}
+    各文件并发解析，ZIP 条目按转换完成顺序边生成边写入响应，不落临时文件
+    """
+    try:
+        data = request.get_json() or {}
+        file_ids = data.get('file_ids') or []
+        formats = data.get('formats') or ['standard']
+        
+        if not file_ids:
+            return jsonify({'error': '缺少文件ID'}), 400
+        
+        # 查找文件（保持请求顺序）
+        files_by_id = team_store.get_files(file_ids)
+        sources = []
+        for file_id in file_ids:
+            target_file = files_by_id.get(file_id)
+            if not target_file:
+                return jsonify({'error': f'文件不存在: {file_id}'}), 404
+            file_path = os.path.join(TEAM_FILES_DIR, target_file['filename'])
+            if not os.path.exists(file_path):
+                return jsonify({'error': f"文件已被删除: {target_file['original_name']}"}), 404
+            sources.append((file_path, target_file['original_name']))
+        
+        try:
+            chunks = bundle_export.iter_bundle_bytes(sources, formats, parser='auto')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        download_name = f"团队用例导出_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+        return Response(chunks, mimetype='application/zip', headers={
+            'Content-Disposition': export_stream.content_disposition(download_name),
+            'X-Accel-Buffering': 'no',
+        })
+        
+    except Exception as e:
+        return jsonify({'error': f'导出失败: {str(e)}'}), 500
+
+@app.route('/api/export_delta', methods=['POST'])
+def api_export_delta():
+    """
+    API接口：增量导出（同一导图的新旧两个版本）
+    请求体：{"old_file_id": ..., "new_file_id": ..., "export_type": "standard" | "zentao" | "module"}
+    只导出新增、修改、删除的用例，CSV 末列为变更类型，流式写入响应
+    """
+    try:
+        data = request.get_json() or {}
+        old_file_id = data.get('old_file_id')
+        new_file_id = data.get('new_file_id')
+        export_type = data.get('export_type', 'standard')
+        
+        if not old_file_id or not new_file_id:
+            return jsonify({'error': '缺少文件ID'}), 400
+        if export_type not in ('standard', 'zentao', 'module'):
+            return jsonify({'error': f'不支持的导出类型: {export_type}'}), 400
+        
+        files_by_id = team_store.get_files((old_file_id, new_file_id))
+        paths = []
+        for file_id in (old_file_id, new_file_id):
+            target_file = files_by_id.get(file_id)
+            if not target_file:
+                return jsonify({'error': f'文件不存在: {file_id}'}), 404
+            file_path = os.path.join(TEAM_FILES_DIR, target_file['filename'])
+            if not os.path.exists(file_path):
+                return jsonify({'error': f"文件已被删除: {target_file['original_name']}"}), 404
+            paths.append(file_path)
+        
+        kind = 'module' if export_type == 'module' else 'structured'
+        new_name = files_by_id[new_file_id]['original_name'].replace('.xmind', '')
+        return stream_csv_response(delta_export.stream_delta_csv(paths[0], paths[1], kind=kind, parser='auto'),
+                                   f"{new_name}_增量用例.csv")
         
     except Exception as e:
         return jsonify({'error': f'导出失败: {str(e)}'}), 500
@@ -944,51 +1208,22 @@ def api_delete():
         if not file_id:
             return jsonify({'error': '缺少文件ID', 'success': False}), 400
         
-        # 查找文件
-        team_files = load_team_files()
-        target_file = None
-        file_index = -1
-        for i, file_info in enumerate(team_files):
-            if file_info['id'] == file_id:
-                target_file = file_info
-                file_index = i
-                break
-        
+        # 从数据库中删除记录（并发删除同一文件时只有一个请求得到记录）
+        target_file = team_store.delete_file(file_id)
         if not target_file:
             return jsonify({'error': '文件不存在', 'success': False}), 404
         
-        # 删除物理文件
+        # 删除物理文件及其导出缓存
         file_path = os.path.join(TEAM_FILES_DIR, target_file['filename'])
         if os.path.exists(file_path):
             os.remove(file_path)
-        
-        # 从数据库中删除记录
-        team_files.pop(file_index)
-        save_team_files(team_files)
+        export_cache.invalidate(file_id)
         
         return jsonify({'success': True, 'message': '文件删除成功'})
         
     except Exception as e:
         return jsonify({'error': f'删除失败: {str(e)}', 'success': False}), 500
 
-@app.route('/download/<filename>')
-def download_file(filename):
-    """下载文件"""
-    temp_dir = tempfile.gettempdir()
-    file_path = None
-    
-    # 查找文件
-    for file in os.listdir(temp_dir):
-        if file.endswith(filename):
-            file_path = os.path.join(temp_dir, file)
-            break
-    
-    if file_path and os.path.exists(file_path):
-        return send_file(file_path, as_attachment=True, download_name=filename)
-    else:
-        flash('文件不存在或已过期')
-        return redirect(url_for('index'))
-
 if __name__ == '__main__':
     # 初始化团队文件存储
     init_team_storage()
@@ -998,11 +1233,13 @@ if __name__ == '__main__':
     print("📍 网络访问地址: http://0.0.0.0:5001")
     print("🔧 支持的功能:")
     print("   - 团队文件上传管理")
-    print("   - 多种导出格式 (标准CSV、禅道CSV、新表头CSV)")
+    print("   - 多种导出格式 (标准CSV、禅道CSV、新表头CSV、Excel)")
     print("   - XMind原文件下载")
+    print("   - 异步转换任务队列 (/api/jobs)")
     print("   - 文件列表和操作记录")
     print("   - 拖拽上传支持")
     print("   - 修复导出功能重复使用问题")
     print(f"📁 团队文件存储目录: {TEAM_FILES_DIR}")
+    print(f"🗄️ 团队文件数据库: {TEAM_FILES_SQLITE}")
     
     app.run(debug=True, host='0.0.0.0', port=5001)
\ No newline at end of file
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试转换结果登记表：登记与查找、非法 ID、过期删除与结果文件失效、
+不信任输出目录之外的路径与非私有的登记表目录
+
+python test_artifact_registry.py（或 pytest test_artifact_registry.py）
+每个测试使用 tmp_path 下各自的登记表目录（monkeypatch 修改 ARTIFACTS_DIR，测试结束后恢复）
+"""
+
+import json
+import os
+import pathlib
+import tempfile
+
+import pytest
+
+import artifact_registry
+
+
+def _use_directories(tmp_path: pathlib.Path, monkeypatch):
+    """登记表目录与转换结果目录都指向 tmp_path"""
+    monkeypatch.setattr(artifact_registry, "ARTIFACTS_DIR", str(tmp_path / "artifacts"))
+    monkeypatch.setattr(artifact_registry, "OUTPUT_DIR", str(tmp_path))
+
+
+def _artifact(directory: pathlib.Path, name: str, content: bytes = b"a,b\r\n") -> str:
+    path = str(directory / name)
+    with open(path, "wb") as f:
+        f.write(content)
+    return path
+
+
+def test_register_and_resolve(tmp_path, monkeypatch):
+    _use_directories(tmp_path, monkeypatch)
+    path = _artifact(tmp_path, "x_用例.csv")
+    artifact_id = artifact_registry.register(path, "用例.csv")
+    record = artifact_registry.resolve(artifact_id)
+    assert record["path"] == path and record["download_name"] == "用例.csv" and record["size"] == 5
+    assert artifact_registry.resolve(artifact_registry.register(path))["download_name"] == "x_用例.csv"
+    for bad_id in ("", "../x", "x_用例.csv", artifact_id.upper(), "0" * 32):
+        assert artifact_registry.resolve(bad_id) is None
+    print("✅ register / resolve: 正确")
+
+
+def test_expiry_and_invalid_files(tmp_path, monkeypatch):
+    _use_directories(tmp_path, monkeypatch)
+    expired_path = _artifact(tmp_path, "expired.csv")
+    expired_id = artifact_registry.register(expired_path, ttl=0)
+    assert artifact_registry.resolve(expired_id) is None
+    assert not os.path.exists(expired_path)
+
+    changed_path = _artifact(tmp_path, "changed.csv")
+    changed_id = artifact_registry.register(changed_path)
+    _artifact(tmp_path, "changed.csv", b"other content")
+    assert artifact_registry.resolve(changed_id) is None
+
+    stale_path = _artifact(tmp_path, "stale.csv")
+    artifact_registry.register(stale_path, ttl=0)
+    artifact_registry.purge_expired()
+    assert not os.path.exists(stale_path)
+    print("✅ 过期与失效: 记录及结果文件已删除")
+
+
+def _rewrite_path(artifact_id: str, path: str):
+    record_path = os.path.join(artifact_registry.ARTIFACTS_DIR, artifact_id + ".json")
+    with open(record_path, "r", encoding="utf-8") as f:
+        record = json.load(f)
+    record["path"] = path
+    with open(record_path, "w", encoding="utf-8") as f:
+        json.dump(record, f)
+
+
+def test_untrusted_paths_and_directory(tmp_path, monkeypatch):
+    _use_directories(tmp_path / "output", monkeypatch)
+    os.makedirs(artifact_registry.OUTPUT_DIR)
+    outside = _artifact(tmp_path, "secret.csv")
+    with pytest.raises(ValueError):
+        artifact_registry.register(outside)
+
+    # 记录被改为指向输出目录之外（直接指向或经由符号链接）：不返回，过期时也不删除该文件
+    link = str(tmp_path / "output" / "link.csv")
+    os.symlink(outside, link)
+    for target in (outside, link):
+        artifact_id = artifact_registry.register(_artifact(tmp_path / "output", "x.csv"))
+        _rewrite_path(artifact_id, target)
+        assert artifact_registry.resolve(artifact_id) is None
+        expired_id = artifact_registry.register(_artifact(tmp_path / "output", "y.csv"), ttl=0)
+        _rewrite_path(expired_id, target)
+        assert artifact_registry.resolve(expired_id) is None
+        artifact_registry.purge_expired()
+        assert os.path.exists(outside)
+
+    # 登记表目录不是当前用户私有的目录（例如他人预先创建）：不读取记录，也不登记
+    artifact_id = artifact_registry.register(_artifact(tmp_path / "output", "z.csv"))
+    os.chmod(artifact_registry.ARTIFACTS_DIR, 0o777)
+    assert artifact_registry.resolve(artifact_id) is None
+    with pytest.raises(PermissionError):
+        artifact_registry.register(_artifact(tmp_path / "output", "z.csv"))
+    print("✅ 不信任的记录: 输出目录之外的路径与非私有的登记表目录均被拒绝")
+
+
+if __name__ == "__main__":
+    # 直接运行时为每个测试创建临时目录与 MonkeyPatch（代替 pytest 的 tmp_path / monkeypatch）
+    for test in (test_register_and_resolve, test_expiry_and_invalid_files, test_untrusted_paths_and_directory):
+        with tempfile.TemporaryDirectory() as directory, pytest.MonkeyPatch.context() as monkeypatch:
+            test(pathlib.Path(directory), monkeypatch)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试列式导出：记录批次读回后与用例逐字段一致（未安装 pyarrow 时跳过）
+
+python test_columnar_export.py
+"""
+
+import os
+import tempfile
+
+import columnar_export
+
+if __name__ != "__main__":
+    # 由 pytest 收集时：未安装 pyarrow 则跳过整个模块（直接运行脚本时不依赖 pytest，见文件末尾）
+    import pytest
+
+    pytest.importorskip("pyarrow")
+
+STRUCTURED_CASES = [
+    {"title": "登录成功", "module": "账号/登录", "prio": "P1", "pre": "已注册",
+     "steps": [("输入账号", "显示账号"), ("点击登录", "进入首页\n提示欢迎")]},
+    {"title": "无步骤", "module": "/", "prio": "P2", "pre": "无", "steps": []},
+]
+
+MODULE_CASES = [
+    {"module": "支付", "custom_module": "下单/确认", "title": "提交订单", "priority": "P0",
+     "preconditions": "", "steps": [("提交", "")]},
+    {"module": "支付", "custom_module": "", "title": "取消", "priority": "P3", "preconditions": "有订单", "steps": []},
+]
+
+
+def test_round_trip():
+    with tempfile.TemporaryDirectory() as dataset_dir:
+        for index, (kind, cases) in enumerate((("structured", STRUCTURED_CASES), ("module", MODULE_CASES))):
+            table = columnar_export.pa.Table.from_batches(
+                list(columnar_export.iter_record_batches(cases, kind, "a.xmind", batch_size=1)))
+            columnar_export.pq.write_table(table, os.path.join(dataset_dir, f"part-{index}.parquet"))
+        # 临时分片被忽略
+        open(os.path.join(dataset_dir, ".tmp.parquet.tmp"), "wb").close()
+
+        table = columnar_export.read_dataset(dataset_dir)
+        assert table.schema == columnar_export.schema()
+        records = table.to_pylist()
+    assert len(records) == 4
+    assert records[0] == {
+        "source": "a.xmind", "kind": "structured", "module": "账号/登录", "custom_module": None,
+        "title": "登录成功", "priority": "P1", "preconditions": "已注册", "step_count": 2,
+        "steps": [{"step": "输入账号", "expected": "显示账号"}, {"step": "点击登录", "expected": "进入首页\n提示欢迎"}],
+    }
+    assert records[1]["steps"] == [] and records[1]["step_count"] == 0
+    assert records[2]["custom_module"] == "下单/确认" and records[2]["priority"] == "P0"
+    assert records[3]["custom_module"] is None and records[3]["preconditions"] == "有订单"
+    # 各分片字典统一后可直接分组统计
+    counts = table.group_by("priority").aggregate([("step_count", "sum")]).to_pylist()
+    assert {row["priority"]: row["step_count_sum"] for row in counts} == {"P1": 2, "P2": 0, "P0": 1, "P3": 0}
+    print("✅ columnar_export: 读回一致")
+
+
+if __name__ == "__main__":
+    if columnar_export.available():
+        test_round_trip()
+    else:
+        print("⏭️ 未安装 pyarrow，跳过列式导出测试")
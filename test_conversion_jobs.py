@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试转换任务队列：结果文件名不能指向任务目录之外、非私有的任务目录不读写、
+队列统计不包含任务 ID
+
+python test_conversion_jobs.py（或 pytest test_conversion_jobs.py）
+"""
+
+import json
+import os
+import pathlib
+import tempfile
+import time
+
+import pytest
+
+import conversion_jobs
+
+
+def _use_directory(tmp_path: pathlib.Path, monkeypatch):
+    monkeypatch.setattr(conversion_jobs, "JOBS_DIR", str(tmp_path / "jobs"))
+
+
+def _done_job(job_id: str, result_file: str) -> dict:
+    """直接写入一个已完成任务的状态文件（不经过转换子进程）"""
+    os.makedirs(os.path.join(conversion_jobs.JOBS_DIR, job_id), mode=0o700)
+    state = {"id": job_id, "export_type": "standard", "source_name": "a.xmind", "status": conversion_jobs.JOB_DONE,
+             "owner_pid": os.getpid(), "submitted_at": time.time(), "started_at": time.time(),
+             "finished_at": time.time(), "error": None, "result_file": result_file, "download_name": "a.csv"}
+    with open(os.path.join(conversion_jobs.JOBS_DIR, job_id, "job.json"), "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    return state
+
+
+def test_result_path(tmp_path, monkeypatch):
+    _use_directory(tmp_path, monkeypatch)
+    os.makedirs(conversion_jobs.JOBS_DIR, mode=0o700)
+    secret = tmp_path / "secret.txt"
+    secret.write_text("secret")
+    _done_job("a" * 32, "result.csv")
+    result = tmp_path / "jobs" / ("a" * 32) / "result.csv"
+    result.write_text("a,b")
+    assert conversion_jobs.result_path(conversion_jobs.get_job("a" * 32)) == str(result)
+    for index, result_file in enumerate((str(secret), "../../secret.txt", "..", ".", "")):
+        job_id = str(index) * 32
+        _done_job(job_id, result_file)
+        assert conversion_jobs.result_path(conversion_jobs.get_job(job_id)) is None, result_file
+    print("✅ 结果文件: 只接受任务目录下的文件名")
+
+
+def test_queue_stats_without_ids(tmp_path, monkeypatch):
+    _use_directory(tmp_path, monkeypatch)
+    os.makedirs(conversion_jobs.JOBS_DIR, mode=0o700)
+    _done_job("b" * 32, "result.csv")
+    stats = conversion_jobs.queue_stats()
+    assert stats["counts"][conversion_jobs.JOB_DONE] == 1
+    assert stats["recent"] and all("id" not in job for job in stats["recent"])
+    assert "b" * 32 not in json.dumps(stats)
+    print("✅ 队列统计: 不包含任务 ID")
+
+
+def test_shared_directory(tmp_path, monkeypatch):
+    # 任务目录不是当前用户私有的目录（例如他人预先创建）：不读取任务，也不提交
+    _use_directory(tmp_path, monkeypatch)
+    os.makedirs(conversion_jobs.JOBS_DIR, mode=0o700)
+    _done_job("c" * 32, "result.csv")
+    os.chmod(conversion_jobs.JOBS_DIR, 0o777)
+    assert conversion_jobs.get_job("c" * 32) is None and conversion_jobs.list_jobs() == []
+    source = tmp_path / "a.xmind"
+    source.write_bytes(b"")
+    with pytest.raises(PermissionError):
+        conversion_jobs.JobQueue(workers=1).submit(str(source), "standard", "a.xmind")
+    print("✅ 任务目录: 非私有目录不读写")
+
+
+if __name__ == "__main__":
+    # 直接运行时为每个测试创建临时目录与 MonkeyPatch（代替 pytest 的 tmp_path / monkeypatch）
+    for test in (test_result_path, test_queue_stats_without_ids, test_shared_directory):
+        with tempfile.TemporaryDirectory() as directory, pytest.MonkeyPatch.context() as monkeypatch:
+            test(pathlib.Path(directory), monkeypatch)
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试增量导出：新增 / 修改 / 删除的识别、重名用例与输出行
+
+python test_delta_export.py
+"""
+
+import delta_export
+
+OLD_CASES = [
+    {"title": "登录成功", "module": "账号/登录", "prio": "P1", "pre": "无", "steps": [("输入账号", "显示账号")]},
+    {"title": "登录失败", "module": "账号/登录", "prio": "P2", "pre": "无", "steps": [("输入错误密码", "提示错误")]},
+    {"title": "重名", "module": "支付", "prio": "P2", "pre": "无", "steps": [("步骤A", "")]},
+    {"title": "重名", "module": "支付", "prio": "P2", "pre": "无", "steps": [("步骤B", "")]},
+    {"title": "下线", "module": "支付", "prio": "P3", "pre": "无", "steps": []},
+]
+
+
+def test_case_delta():
+    new_cases = [
+        dict(OLD_CASES[0]),
+        dict(OLD_CASES[1], steps=[("输入错误密码", "提示密码错误")]),
+        dict(OLD_CASES[2]),
+        dict(OLD_CASES[3], prio="P0"),
+        {"title": "登录成功", "module": "账号/注册", "prio": "P1", "pre": "无", "steps": []},
+    ]
+    changes = [(tag, case["title"], case["module"]) for tag, case in delta_export.iter_case_delta(OLD_CASES, new_cases)]
+    assert changes == [
+        (delta_export.DELTA_CHANGED, "登录失败", "账号/登录"),
+        (delta_export.DELTA_CHANGED, "重名", "支付"),
+        (delta_export.DELTA_ADDED, "登录成功", "账号/注册"),
+        (delta_export.DELTA_REMOVED, "下线", "支付"),
+    ]
+    assert list(delta_export.iter_case_delta(OLD_CASES, list(OLD_CASES))) == []
+    print("✅ iter_case_delta: 识别正确")
+
+
+def test_delta_rows():
+    changes = delta_export.iter_case_delta(OLD_CASES[:1], OLD_CASES[1:2])
+    rows = [row for batch in delta_export.iter_delta_row_batches(changes, batch_size=1) for row in batch]
+    assert delta_export.delta_header()[-1] == delta_export.DELTA_COLUMN
+    assert rows == [
+        ["登录登录失败", "账号", "P2", "功能测试", "无", "输入错误密码", "提示错误", delta_export.DELTA_ADDED],
+        ["登录登录成功", "账号", "P1", "功能测试", "无", "输入账号", "显示账号", delta_export.DELTA_REMOVED],
+    ]
+    print("✅ iter_delta_row_batches: 一致")
+
+
+if __name__ == "__main__":
+    test_case_delta()
+    test_delta_rows()
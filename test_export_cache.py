@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试导出结果缓存：边发送边写入、中断丢弃、保留原文件存入、按文件失效与 LRU 淘汰、
+非私有的缓存目录不读写
+
+python test_export_cache.py
+"""
+
+import os
+import tempfile
+import time
+
+import export_cache
+
+
+def _entries(file_id: str):
+    return sorted(os.listdir(os.path.join(export_cache.CACHE_DIR, file_id)))
+
+
+def test_tee_and_lookup():
+    chunks = [b"\xef\xbb\xbfa,b\r\n", b"1,2\r\n"]
+    assert export_cache.lookup("f1", "standard", "auto") is None
+    assert list(export_cache.tee("f1", "standard", "auto", iter(chunks), "用例.csv", "text/csv")) == chunks
+    path, download_name, mimetype = export_cache.lookup("f1", "standard", "auto")
+    with open(path, "rb") as f:
+        assert f.read() == b"".join(chunks)
+    assert (download_name, mimetype) == ("用例.csv", "text/csv")
+    # 导出类型、解析器不同时不命中；非法文件 ID 不读写
+    assert export_cache.lookup("f1", "zentao", "auto") is None
+    assert export_cache.lookup("f1", "standard", "json") is None
+    assert export_cache.lookup("../f1", "standard", "auto") is None
+    print("✅ tee / lookup: 命中一致")
+
+
+def test_interrupted_stream():
+    def broken():
+        yield b"partial"
+        raise RuntimeError("解析失败")
+
+    stream = export_cache.tee("f2", "standard", "auto", broken(), "x.csv", "text/csv")
+    try:
+        list(stream)
+        raise AssertionError("应抛出解析异常")
+    except RuntimeError:
+        pass
+    # 客户端断开：生成器被关闭
+    stream = export_cache.tee("f2", "module", "auto", iter([b"a", b"b"]), "x.csv", "text/csv")
+    next(stream)
+    stream.close()
+    assert _entries("f2") == []
+    assert export_cache.lookup("f2", "standard", "auto") is None
+    print("✅ tee: 中断时不留下缓存")
+
+
+def test_store_file_keep():
+    # 后台任务的结果：保留原文件（硬链接），元数据附带统计字段
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "result.csv")
+        with open(path, "wb") as f:
+            f.write(b"a,b\r\n")
+        cached_path = export_cache.store_file("f5", "standard", "auto", path, "用例.csv", "text/csv",
+                                              extra={"case_count": 3, "step_count": 7}, keep=True)
+        assert cached_path != path and os.path.exists(path)
+    entry = export_cache.lookup_entry("f5", "standard", "auto")
+    assert entry == {"path": cached_path, "download_name": "用例.csv", "mimetype": "text/csv",
+                     "case_count": 3, "step_count": 7}
+    assert export_cache.lookup("f5", "standard", "auto") == (cached_path, "用例.csv", "text/csv")
+    with open(cached_path, "rb") as f:
+        assert f.read() == b"a,b\r\n"
+    export_cache.invalidate("f5")
+    print("✅ store_file(keep=True): 原文件保留，统计字段随元数据返回")
+
+
+def test_invalidate_and_evict():
+    for file_id in ("f3", "f4"):
+        for export_type in ("standard", "module"):
+            list(export_cache.tee(file_id, export_type, "auto", iter([b"x" * 1000]), "x.csv", "text/csv"))
+            time.sleep(0.01)
+    export_cache.invalidate("f3")
+    assert not os.path.exists(os.path.join(export_cache.CACHE_DIR, "f3"))
+    assert export_cache.lookup("f4", "standard", "auto")
+    # 命中刷新 mtime：超限时先淘汰最久未使用的 module
+    export_cache.evict(max_bytes=1500)
+    assert export_cache.lookup("f4", "standard", "auto") and export_cache.lookup("f4", "module", "auto") is None
+    assert len(_entries("f4")) == 2
+    print("✅ invalidate / evict: 正确")
+
+
+def test_evict_during_invalidate():
+    # 淘汰扫描期间某个文件的缓存目录被 invalidate 删除：跳过该目录，其余目录照常按上限淘汰
+    with tempfile.TemporaryDirectory() as directory:
+        previous = export_cache.CACHE_DIR
+        export_cache.configure(directory=directory)
+        scandir = os.scandir
+        gone = os.path.join(directory, "f8")
+
+        def scandir_after_invalidate(path):
+            if path == gone:
+                export_cache.invalidate("f8")
+            return scandir(path)
+
+        try:
+            for file_id in ("f8", "f9", "f10"):
+                list(export_cache.tee(file_id, "standard", "auto", iter([b"x" * 1000]), "x.csv", "text/csv"))
+                time.sleep(0.01)
+            os.scandir = scandir_after_invalidate
+            export_cache.evict(max_bytes=1500)
+        finally:
+            os.scandir = scandir
+            export_cache.configure(directory=previous)
+        assert not os.path.exists(gone) and not os.listdir(os.path.join(directory, "f9"))
+        assert len(os.listdir(os.path.join(directory, "f10"))) == 2
+    print("✅ evict: 扫描期间目录被删除时照常淘汰")
+
+
+def test_shared_directory():
+    # 他人预先创建的缓存目录（组和其他用户可写）：预置的条目不作为导出结果返回，也不写入
+    with tempfile.TemporaryDirectory() as directory:
+        previous = export_cache.CACHE_DIR
+        export_cache.configure(directory=directory)
+        try:
+            list(export_cache.tee("f6", "standard", "auto", iter([b"a"]), "x.csv", "text/csv"))
+            assert export_cache.lookup("f6", "standard", "auto")
+            os.chmod(directory, 0o777)
+            assert export_cache.lookup("f6", "standard", "auto") is None
+            assert list(export_cache.tee("f7", "standard", "auto", iter([b"a"]), "x.csv", "text/csv")) == [b"a"]
+            assert not os.path.exists(os.path.join(directory, "f7"))
+        finally:
+            export_cache.configure(directory=previous)
+    print("✅ 目录权限: 非私有的缓存目录不读写")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as cache_dir:
+        export_cache.configure(directory=cache_dir, max_bytes=1024 * 1024)
+        test_tee_and_lookup()
+        test_interrupted_stream()
+        test_store_file_keep()
+        test_invalidate_and_evict()
+        test_evict_during_invalidate()
+        test_shared_directory()
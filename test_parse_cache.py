@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试解析缓存：目录权限检查（非私有目录不读写 pickle）、模块化用例的缓存键包含文件名推导的模块名、
+解析中途出错时不缓存部分结果
+
+python test_parse_cache.py
+"""
+
+import json
+import os
+import tempfile
+import zipfile
+
+import module_converter_final
+import parse_cache
+
+
+def _configure(directory: str):
+    parse_cache.configure(directory=directory, max_bytes=1024 * 1024)
+
+
+def test_private_directory():
+    with tempfile.TemporaryDirectory() as directory:
+        cache_dir = os.path.join(directory, "cache")
+        _configure(cache_dir)
+        parse_cache.put("k", ["用例"])
+        assert os.stat(cache_dir).st_mode & 0o777 == 0o700
+        assert parse_cache.get("k") == ["用例"]
+
+        # 其他用户可写（或可读）的目录：既不读取已有条目，也不写入
+        os.chmod(cache_dir, 0o777)
+        assert parse_cache.get("k") is None
+        parse_cache.put("k2", ["用例"])
+        assert not os.path.exists(os.path.join(cache_dir, "k2.pkl"))
+
+        # 指向他处的符号链接同样视为不安全
+        os.chmod(cache_dir, 0o700)
+        link = os.path.join(directory, "link")
+        os.symlink(cache_dir, link)
+        _configure(link)
+        assert parse_cache.get("k") is None
+    print("✅ 目录权限: 仅当前用户私有的目录才读写缓存")
+
+
+UNTITLED_ROOT = {"id": "r", "title": "", "children": {"attached": [
+    {"id": "c", "title": "用例", "children": {"attached": [
+        {"id": "s", "title": "步骤", "children": {"attached": [{"id": "e", "title": "预期"}]}}]}}]}}
+
+
+def _write_sheets(path: str, sheets: list):
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("content.json", json.dumps(sheets, ensure_ascii=False))
+
+
+def _write_untitled(path: str):
+    """中心主题标题为空的导图：“模块”列取自文件名"""
+    _write_sheets(path, [{"id": "s", "title": "画布", "rootTopic": UNTITLED_ROOT}])
+
+
+def test_module_key_includes_filename():
+    with tempfile.TemporaryDirectory() as directory:
+        _configure(os.path.join(directory, "cache"))
+        first, second = os.path.join(directory, "支付.xmind"), os.path.join(directory, "退款.xmind")
+        _write_untitled(first)
+        _write_untitled(second)
+        for iterate in (False, True):
+            for path, module in ((first, "支付"), (second, "退款")):
+                if iterate:
+                    cases = list(module_converter_final.iter_module_cases(path, parser="json"))
+                else:
+                    cases = module_converter_final.get_module_cases(path, parser="json")
+                assert [case["module"] for case in cases] == [module], (path, iterate)
+    print("✅ 缓存键: 内容相同、文件名不同的导图“模块”列各自正确")
+
+
+def test_failure_after_first_case():
+    # 第二个画布损坏：逐个读取画布时第一个画布的用例已经产出，错误须向上抛出，不能得到截断的结果
+    with tempfile.TemporaryDirectory() as directory:
+        cache_dir = os.path.join(directory, "cache")
+        _configure(cache_dir)
+        path = os.path.join(directory, "损坏.xmind")
+        _write_sheets(path, [{"id": "s1", "title": "画布1", "rootTopic": UNTITLED_ROOT},
+                             {"id": "s2", "title": "画布2", "rootTopic": "损坏"}])
+        output = os.path.join(directory, "out.csv")
+        for convert in (lambda: list(module_converter_final.iter_module_cases(path, all_sheets=True)),
+                        lambda: module_converter_final.get_module_cases(path, all_sheets=True),
+                        lambda: module_converter_final.convert_to_module_csv(path, output, all_sheets=True)):
+            try:
+                convert()
+                raise AssertionError("应抛出解析错误")
+            except AttributeError:
+                pass
+        assert not os.path.exists(output)
+        assert not os.path.isdir(cache_dir) or not [name for name in os.listdir(cache_dir) if name.endswith(".pkl")]
+    print("✅ 中途出错: 错误向上抛出，不留下不完整的文件，不缓存部分结果")
+
+
+if __name__ == "__main__":
+    test_private_directory()
+    test_module_key_includes_filename()
+    test_failure_after_first_case()
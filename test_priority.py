@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试 priority 与原实现的等价性（随机生成取值，固定随机种子）及用户映射文件
+
+python test_priority.py
+"""
+
+import json
+import os
+import random
+import re
+import tempfile
+from types import SimpleNamespace
+
+import priority
+
+ROUNDS = 20000
+
+# 生成器字母表：覆盖编号、P 级别、"优先级" 前缀、中英文关键词与常见分隔符
+PRIORITY_ALPHABET = [
+    "0", "1", "2", "3", "5", "6", "03", "+", "-", "_", "１", "P", "p", "P1", "P4", "P5",
+    "优先级", "：", ":", " ", "\t", "高", "较高", "中", "低", "较低", "严重", "紧急", "重要", "普通",
+    "次要", "微小", "提示", "critical", "High", "MAJOR", "medium", "Normal", "minor", "low", "trivial",
+    "a", "用例", "priority", "importance", "-", "\n",
+]
+
+
+def _legacy_normalize_priority(value) -> str:
+    """原 _normalize_priority（五个转换器中的同一份逻辑，作为对照基准）"""
+    if value is None:
+        return "P2"
+
+    v = str(value).strip().upper()
+
+    # 直接是 P0-4
+    if re.fullmatch(r"P[0-4]", v):
+        return v
+
+    # 纯数字 1-5
+    if re.fullmatch(r"[1-5]", v):
+        priority_map = {"1": "P0", "2": "P1", "3": "P2", "4": "P3", "5": "P4"}
+        return priority_map.get(v, "P2")
+
+    # 可能是整数
+    try:
+        iv = int(v)
+        if 1 <= iv <= 5:
+            priority_map = {1: "P0", 2: "P1", 3: "P2", 4: "P3", 5: "P4"}
+            return priority_map.get(iv, "P2")
+    except Exception:
+        pass
+
+    # 处理"优先级X"格式
+    priority_match = re.search(r'优先级[：:\s]*([1-5])', v)
+    if priority_match:
+        priority_map = {"1": "P0", "2": "P1", "3": "P2", "4": "P3", "5": "P4"}
+        return priority_map.get(priority_match.group(1), "P2")
+
+    # 处理中文描述
+    if "高" in v or "严重" in v or "紧急" in v:
+        return "P0"
+    if "较高" in v or "重要" in v:
+        return "P1"
+    if "中" in v or "普通" in v:
+        return "P2"
+    if "较低" in v or "次要" in v:
+        return "P3"
+    if "低" in v or "微小" in v or "提示" in v:
+        return "P4"
+
+    # 处理英文描述
+    if "CRITICAL" in v or "HIGH" in v:
+        return "P0"
+    if "MAJOR" in v:
+        return "P1"
+    if "MEDIUM" in v or "NORMAL" in v:
+        return "P2"
+    if "MINOR" in v:
+        return "P3"
+    if "LOW" in v or "TRIVIAL" in v:
+        return "P4"
+
+    return "P2"
+
+
+def _legacy_extract_priority_from_topic(tree, index: int) -> str:
+    """原 _extract_priority_from_topic（作为对照基准）"""
+    title = tree.titles[index] or ""
+    priority_match = re.search(r'\b(P[0-4]|[1-5])\b', title)
+    if priority_match:
+        return _legacy_normalize_priority(priority_match.group(1))
+
+    for marker_id in tree.markers[index]:
+        if 'priority' in marker_id.lower() or 'importance' in marker_id.lower():
+            num_match = re.search(r'(\d+)', marker_id)
+            if num_match:
+                return _legacy_normalize_priority(num_match.group(1))
+
+    notes = tree.notes[index] or ""
+    priority_in_notes = re.search(r'\b(P[0-4]|优先级[：:]\s*([1-5]))\b', str(notes))
+    if priority_in_notes:
+        if priority_in_notes.group(1).startswith('P'):
+            return _legacy_normalize_priority(priority_in_notes.group(1))
+        else:
+            return _legacy_normalize_priority(priority_in_notes.group(2))
+
+    return "P2"
+
+
+def _random_values(seed: int, rounds: int = ROUNDS, max_tokens: int = 4):
+    rng = random.Random(seed)
+    yield from [None, 0, 1, 3, 5, 6, -1, 2.0, "", " ", "P0", "p3", "优先级：2", "较高", "Low"]
+    for _ in range(rounds):
+        yield "".join(rng.choice(PRIORITY_ALPHABET) for _ in range(rng.randint(1, max_tokens)))
+
+
+def _random_tree(seed: int, rounds: int = ROUNDS):
+    rng = random.Random(seed)
+    titles, markers, notes = [], [], []
+    for _ in range(rounds):
+        titles.append(rng.choice([None, ""]) if rng.random() < 0.1 else
+                      "".join(rng.choice(PRIORITY_ALPHABET) for _ in range(rng.randint(1, 6))))
+        markers.append([rng.choice(["priority-1", "priority-5", "Importance_3", "task-done", "flag-red", "priority"])
+                        for _ in range(rng.randint(0, 2))])
+        notes.append(rng.choice([None, ""]) if rng.random() < 0.3 else
+                     "".join(rng.choice(PRIORITY_ALPHABET) for _ in range(rng.randint(1, 8))))
+    return SimpleNamespace(titles=titles, markers=markers, notes=notes)
+
+
+def test_normalize_priority_equivalence():
+    values = list(_random_values(11))
+    # 两遍：第一遍填充记忆化缓存，第二遍走缓存命中路径
+    for _ in range(2):
+        mismatches = [(v, _legacy_normalize_priority(v), priority.normalize_priority(v))
+                      for v in values if _legacy_normalize_priority(v) != priority.normalize_priority(v)]
+        assert not mismatches, f"normalize_priority 输出不一致，示例: {mismatches[:3]!r}"
+    print("✅ normalize_priority: 一致")
+
+
+def test_from_topic_equivalence():
+    tree = _random_tree(22)
+    mismatches = [(i, _legacy_extract_priority_from_topic(tree, i), priority.from_topic(tree, i))
+                  for i in range(len(tree.titles))
+                  if _legacy_extract_priority_from_topic(tree, i) != priority.from_topic(tree, i)]
+    assert not mismatches, f"from_topic 输出不一致，示例: {mismatches[:3]!r}"
+    print("✅ from_topic: 一致")
+
+
+def test_mapping_file():
+    fd, path = tempfile.mkstemp(suffix=".json")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({"P0": ["阻塞", "blocker"], "P3": "建议"}, f, ensure_ascii=False)
+    try:
+        assert priority.normalize_priority("阻塞") == "P2"
+        priority.configure(path)
+        assert priority.vocabulary_tag()
+        assert os.environ.get("XMIND_PRIORITY_MAP") == path
+        assert priority.normalize_priority("阻塞") == "P0"
+        assert priority.normalize_priority("Blocker") == "P0"
+        assert priority.normalize_priority("优化建议") == "P3"
+        # 数字、P 级别与 "优先级X" 仍优先于关键词
+        assert priority.normalize_priority("3") == "P2"
+        assert priority.normalize_priority("阻塞 P1") == "P0"
+    finally:
+        priority.configure(None)
+        os.remove(path)
+    assert priority.vocabulary_tag() == ""
+    assert priority.normalize_priority("阻塞") == "P2"
+
+    bad = tempfile.mkstemp(suffix=".json")
+    with os.fdopen(bad[0], "w", encoding="utf-8") as f:
+        json.dump({"urgent": ["紧急"]}, f)
+    try:
+        priority.configure(bad[1])
+        raise AssertionError("非法映射文件应抛出 ValueError")
+    except ValueError:
+        pass
+    finally:
+        os.remove(bad[1])
+    print("✅ 映射文件: 通过")
+
+
+if __name__ == "__main__":
+    test_normalize_priority_equivalence()
+    test_from_topic_equivalence()
+    test_mapping_file()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试按列批量构建的 CSV 行与原逐用例实现的等价性（随机生成用例，固定随机种子）
+
+python test_row_builders.py
+"""
+
+import csv
+import io
+import json
+import os
+import random
+import tempfile
+import zipfile
+
+import converter
+import export_stream
+import module_converter_final
+
+ROUNDS = 5000
+
+# 生成器字母表：模块路径分隔符、空段、引号、编号、重复的前置条件/预期结果
+CASE_ALPHABET = ["登录", "支付", "/", "//", " ", "", "“", "\"", "1.", "2、", "\n", "无", "操作成功", "a, b", "（", "P1"]
+
+
+def _legacy_iter_rows(cases):
+    """原 converter.iter_rows（作为对照基准）"""
+    yield ["用例名称", "所属模块", "Priority等级", "用例类型", "前置条件", "用例步骤", "预期结果"]
+
+    for case in cases:
+        steps_lines = []
+        expected_lines = []
+        for action, expected in case.get("steps", []):
+            if action:
+                steps_lines.append(f"{action}")
+            if expected:
+                expected_lines.append(f"{expected}")
+        steps_text = "\n".join(steps_lines).strip()
+        expected_text = "\n".join(expected_lines).strip()
+        if not steps_text:
+            steps_text = "无"
+        if not expected_text:
+            expected_text = "无"
+
+        full_module_path = case.get("module", "/")
+        module_parts = full_module_path.split('/')
+        display_module = module_parts[0] if module_parts else "/"
+        display_title = case.get("title", "")
+        if len(module_parts) > 1:
+            display_title = f"{module_parts[1]}{display_title}"
+        if not display_module:
+            display_module = "/"
+
+        yield [display_title, display_module, case.get("prio", "P2"), converter.CASE_TYPE,
+               case.get("pre", ""), steps_text, expected_text]
+
+
+def _legacy_format_step_text(text: str) -> str:
+    """原 module_converter_final._format_step_text（逐行调用引号清理，作为对照基准）"""
+    if not text:
+        return ""
+    
+    # 使用专门的引号清理函数
+    text = module_converter_final._completely_remove_quotes(text)
+    
+    # 按换行符分割成多行
+    lines = text.split('\n')
+    formatted_lines = []
+    step_counter = 1
+    
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        
+        # 对每一行再次进行引号清理
+        line = module_converter_final._completely_remove_quotes(line)
+        
+        if not line:
+            continue
+        
+        # 检查是否已经有序号（数字+点号开头）
+        existing_number_match = module_converter_final._NUMBERED_LINE.match(line)
+        if existing_number_match:
+            # 已有序号，保留原序号但确保格式统一
+            num, content = existing_number_match.groups()
+            content = content.strip()
+            
+            # 对内容再次清理引号
+            content = module_converter_final._completely_remove_quotes(content)
+            
+            if content:
+                formatted_lines.append(f"{num}.{content}")
+        else:
+            # 没有序号，添加序号
+            if line:
+                formatted_lines.append(f"{step_counter}.{line}")
+                step_counter += 1
+    
+    # 最终结果再次清理
+    result = '\n'.join(formatted_lines)
+    result = module_converter_final._completely_remove_quotes(result)
+    
+    return result
+
+
+def _legacy_iter_module_csv_rows(cases):
+    """原 module_converter_final.iter_module_csv_rows（去掉未使用的 escape_csv_field，作为对照基准）"""
+    yield ["模块", "自定义分级模块", "用例名称", "priority", "前置条件", "用例步骤", "预期结果"]
+
+    format_step_text = _legacy_format_step_text
+    remove_quotes = module_converter_final._completely_remove_quotes
+    for case in cases:
+        steps_lines = []
+        expected_lines = []
+        for action, expected in case.get("steps", []):
+            if action:
+                steps_lines.append(action)
+            if expected:
+                expected_lines.append(expected)
+        steps_text = format_step_text("\n".join(steps_lines).strip())
+        expected_text = format_step_text("\n".join(expected_lines).strip())
+        if not steps_text:
+            steps_text = ""
+        if not expected_text:
+            expected_text = ""
+
+        preconditions = remove_quotes(str(case.get("preconditions", "") or "").strip())
+        custom_path = str(case.get("custom_module", "") or "").strip()
+        path_parts = [p for p in custom_path.split('/') if p]
+        first_level = path_parts[0] if path_parts else ""
+        title = str(case.get("title", "") or "").strip()
+        second_level = path_parts[1] if len(path_parts) > 1 else ""
+        if second_level:
+            title = f"{second_level}{title}"
+
+        yield [case.get("module", ""), first_level, title, case.get("priority", "P2"),
+               preconditions, steps_text, expected_text]
+
+
+def _text(rng, max_tokens: int = 5) -> str:
+    return "".join(rng.choice(CASE_ALPHABET) for _ in range(rng.randint(0, max_tokens)))
+
+
+def _random_cases(seed: int, rounds: int = ROUNDS):
+    rng = random.Random(seed)
+    for _ in range(rounds):
+        steps = [(_text(rng), _text(rng)) for _ in range(rng.randint(0, 4))]
+        yield {
+            "title": _text(rng), "module": _text(rng), "custom_module": rng.choice([None, "", _text(rng)]),
+            "prio": rng.choice(["P0", "P2"]), "priority": rng.choice(["P1", "P3"]),
+            "pre": _text(rng), "preconditions": rng.choice([None, "无", _text(rng)]), "steps": steps,
+        }
+
+
+def _check(name, legacy_rows, current_rows):
+    legacy_rows, current_rows = list(legacy_rows), list(current_rows)
+    assert legacy_rows == current_rows, f"{name} 输出不一致"
+    print(f"✅ {name}: 一致（{len(current_rows) - 1} 行）")
+
+
+def test_iter_rows_equivalence():
+    cases = list(_random_cases(11))
+    _check("iter_rows", _legacy_iter_rows(cases), converter.iter_rows(cases))
+    # 批边界：批大小不整除用例数
+    batches = list(converter.iter_row_batches(cases, batch_size=7))
+    assert [row for batch in batches for row in batch] == list(_legacy_iter_rows(cases))[1:]
+
+
+def test_iter_module_csv_rows_equivalence():
+    cases = list(_random_cases(22))
+    _check("iter_module_csv_rows", _legacy_iter_module_csv_rows(cases),
+           module_converter_final.iter_module_csv_rows(cases))
+    batches = list(module_converter_final.iter_module_csv_row_batches(cases, batch_size=7))
+    assert [row for batch in batches for row in batch] == list(_legacy_iter_module_csv_rows(cases))[1:]
+
+
+def test_write_rows():
+    cases = list(_random_cases(33, rounds=500))
+    for write, legacy in ((converter.write_rows, _legacy_iter_rows),
+                          (module_converter_final.write_module_csv_rows, _legacy_iter_module_csv_rows)):
+        expected, actual = io.StringIO(), io.StringIO()
+        csv.writer(expected).writerows(legacy(cases))
+        assert write(csv.writer(actual), cases) == len(cases)
+        assert actual.getvalue() == expected.getvalue()
+    print("✅ write_rows / write_module_csv_rows: 一致")
+
+
+def test_iter_csv_bytes():
+    # 流式字节块拼接后与 utf-8-sig 写文件的内容逐字节一致（含空批与仅表头）
+    cases = list(_random_cases(44, rounds=500))
+    for header, batches, write in (
+            (converter.CSV_HEADER, converter.iter_row_batches, converter.write_rows),
+            (module_converter_final.MODULE_CSV_HEADER, module_converter_final.iter_module_csv_row_batches,
+             module_converter_final.write_module_csv_rows)):
+        for subset in (cases, []):
+            expected = io.StringIO()
+            write(csv.writer(expected), subset)
+            chunks = list(export_stream.iter_csv_bytes(header, batches(subset, batch_size=64)))
+            assert b"".join(chunks) == ("\ufeff" + expected.getvalue()).encode("utf-8")
+    print("✅ iter_csv_bytes: 一致")
+
+
+def test_iter_zip_bytes():
+    # 条目按产出顺序流式写入；某个条目中途失败时保留已写出部分并追加 .error.txt
+    def broken():
+        yield b"partial"
+        raise RuntimeError("坏文件")
+
+    entries = [("a/标准.csv", iter([b"x" * 100000, b"y"])), ("b/坏.csv", broken()), ("c/空.csv", iter([]))]
+    chunks = list(export_stream.iter_zip_bytes(entries))
+    assert len(chunks) > 1
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as zf:
+        assert zf.testzip() is None
+        assert zf.namelist() == ["a/标准.csv", "b/坏.csv", "b/坏.csv.error.txt", "c/空.csv"]
+        assert zf.read("a/标准.csv") == b"x" * 100000 + b"y"
+        assert zf.read("b/坏.csv") == b"partial"
+        assert "坏文件" in zf.read("b/坏.csv.error.txt").decode("utf-8")
+    print("✅ iter_zip_bytes: 一致")
+
+
+def test_iter_ndjson_bytes():
+    # 每行一条记录（多行文本被转义，不会拆行），首条单独产出，之后按 flush_lines 分块
+    cases = list(_random_cases(55, rounds=50))
+    records = list(converter.iter_case_records(cases))
+    chunks = list(export_stream.iter_ndjson_bytes(records, flush_lines=16, flush_seconds=3600))
+    assert [chunk.count(b"\n") for chunk in chunks] == [1, 16, 16, 16, 1]
+    lines = b"".join(chunks).decode("utf-8").split("\n")
+    assert lines.pop() == ""
+    assert [json.loads(line) for line in lines] == records
+    for case, record in zip(cases, records):
+        assert record["module"] == [part for part in case["module"].split("/") if part]
+        assert [(step["step"], step["expected"]) for step in record["steps"]] == case["steps"]
+    assert list(export_stream.iter_ndjson_bytes([])) == []
+    print("✅ iter_ndjson_bytes: 一致")
+
+
+def test_write_csv_parts():
+    # 各分片都以表头开头、不超过行数/字节数上限，去掉重复表头后拼接与单文件一致；超长行单独成片
+    cases = list(_random_cases(66, rounds=300))
+    cases.append({"title": "超长" * 500, "module": "", "steps": []})
+    expected = io.StringIO()
+    converter.write_rows(csv.writer(expected), cases)
+    expected = ("\ufeff" + expected.getvalue()).encode("utf-8")
+    header = expected[:expected.index(b"\r\n") + 2]
+    with tempfile.TemporaryDirectory() as tmp:
+        name_part = export_stream.numbered_part_path(os.path.join(tmp, "out.csv"))
+        for max_rows, max_bytes in ((50, None), (None, 2000), (40, 3000)):
+            paths = export_stream.write_csv_parts(name_part, converter.CSV_HEADER,
+                                                  converter.iter_row_batches(cases, batch_size=64),
+                                                  max_rows=max_rows, max_bytes=max_bytes)
+            assert paths[0].endswith("out_part001.csv") and len(paths) > 1
+            body = b""
+            for path in paths:
+                with open(path, "rb") as f:
+                    data = f.read()
+                assert data.startswith(header)
+                rows = list(csv.reader(io.StringIO(data.decode("utf-8-sig"))))[1:]
+                assert rows
+                assert max_rows is None or len(rows) <= max_rows
+                assert max_bytes is None or len(data) <= max_bytes or len(rows) == 1
+                body += data[len(header):]
+                os.remove(path)
+            assert header + body == expected
+    print("✅ write_csv_parts: 一致")
+
+
+def test_count_cases():
+    # 原样产出用例并统计；提前停止消费时统计已产出的部分
+    cases = list(_random_cases(77, rounds=200))
+    stats = {}
+    assert list(export_stream.count_cases(cases, stats)) == cases
+    assert stats == {"case_count": len(cases), "step_count": sum(len(case["steps"]) for case in cases)}
+    stream = export_stream.count_cases(iter(cases), stats)
+    next(stream)
+    stream.close()
+    assert stats == {"case_count": 1, "step_count": len(cases[0]["steps"])}
+    print("✅ count_cases: 正确")
+
+
+if __name__ == "__main__":
+    test_iter_rows_equivalence()
+    test_iter_module_csv_rows_equivalence()
+    test_write_rows()
+    test_iter_csv_bytes()
+    test_iter_zip_bytes()
+    test_iter_ndjson_bytes()
+    test_write_csv_parts()
+    test_count_cases()
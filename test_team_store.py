@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试团队文件元数据存储：旧 JSON 迁移、增删查、按上传者筛选、进程内快照与多进程并发写入
+
+python test_team_store.py（或 pytest test_team_store.py）
+每个测试在 tmp_path 下使用各自的数据库，互不依赖执行顺序
+"""
+
+import json
+import multiprocessing
+import os
+import pathlib
+import sqlite3
+import tempfile
+
+import team_store
+
+
+def _info(file_id: str, uploader: str = "张三", upload_time: str = "2024-01-01T10:00:00") -> dict:
+    return {"id": file_id, "filename": f"{file_id}_a.xmind", "original_name": "a.xmind", "uploader": uploader,
+            "description": "", "upload_time": upload_time, "file_size": 1024}
+
+
+def _use_database(tmp_path: pathlib.Path, legacy_json: str = None) -> str:
+    """切换到 tmp_path 下的新数据库，返回数据库路径"""
+    db_path = str(tmp_path / "files.db")
+    team_store.configure(db_path)
+    team_store.LEGACY_JSON = legacy_json
+    return db_path
+
+
+def test_migration(tmp_path):
+    legacy = str(tmp_path / "files_db.json")
+    with open(legacy, "w", encoding="utf-8") as f:
+        json.dump([_info("old-2", upload_time="2024-01-02T00:00:00"), _info("old-1"), _info("old-1")], f)
+    _use_database(tmp_path, legacy_json=legacy)
+    assert [f["id"] for f in team_store.list_files()] == ["old-1", "old-2"]
+    assert team_store.get_file("old-1") == _info("old-1")
+    assert not os.path.exists(legacy) and os.path.exists(legacy + ".migrated")
+    print("✅ 迁移: 旧 JSON 记录已导入")
+
+
+def test_operations(tmp_path):
+    _use_database(tmp_path)
+    team_store.add_file(_info("old-1"))
+    team_store.add_file(_info("old-2", upload_time="2024-01-02T00:00:00"))
+    team_store.add_file(_info("new-1", uploader="李四", upload_time="2024-02-01T00:00:00"))
+    try:
+        team_store.add_file(_info("new-1"))
+        raise AssertionError("重复 ID 应抛出 ValueError")
+    except ValueError:
+        pass
+    assert team_store.get_file("missing") is None
+    assert set(team_store.get_files(["old-1", "new-1", "missing"])) == {"old-1", "new-1"}
+    assert [f["id"] for f in team_store.list_files(uploader="李四")] == ["new-1"]
+    assert [f["id"] for f in team_store.list_files(limit=1, offset=1)] == ["old-2"]
+    assert team_store.count_files() == 3 and team_store.count_files("张三") == 2
+    assert team_store.delete_file("old-2")["id"] == "old-2"
+    assert team_store.delete_file("old-2") is None
+    print("✅ 增删查: 正确")
+
+
+def test_snapshot_without_database(tmp_path):
+    _use_database(tmp_path)
+    team_store.add_file(_info("old-1"))
+    team_store.add_file(_info("new-1", uploader="李四", upload_time="2024-02-01T00:00:00"))
+    team_store.list_files()
+    connection = team_store._connection
+
+    def fail():
+        raise AssertionError("无变化时不应访问数据库")
+
+    team_store._connection = fail
+    try:
+        assert team_store.count_files() == 2 and team_store.get_file("new-1")["uploader"] == "李四"
+        assert [f["id"] for f in team_store.list_files(uploader="张三")] == ["old-1"]
+    finally:
+        team_store._connection = connection
+    print("✅ 进程内快照: 无变化时不读数据库")
+
+
+def _delete_in_child(db_path: str, file_id: str):
+    team_store.configure(db_path)
+    team_store.delete_file(file_id)
+
+
+def test_snapshot_refresh_after_other_process(tmp_path):
+    db_path = _use_database(tmp_path)
+    team_store.add_file(_info("a"))
+    team_store.add_file(_info("b", uploader="李四"))
+    assert team_store.count_files() == 2
+    # 其他进程（另一个 gunicorn worker）的写入使本进程的快照在下一次查询时刷新
+    process = multiprocessing.Process(target=_delete_in_child, args=(db_path, "a"))
+    process.start()
+    process.join()
+    assert process.exitcode == 0
+    assert team_store.count_files() == 1 and team_store.get_file("a") is None
+    assert [f["id"] for f in team_store.list_files(uploader="李四")] == ["b"]
+    print("✅ 进程内快照: 其他进程写入后刷新")
+
+
+def test_snapshot_refresh_same_file_metadata(tmp_path):
+    # 代数文件被替换后 inode、大小、mtime 都可能与之前相同（inode 复用、mtime 精度不足），快照须按代数值刷新
+    db_path = _use_database(tmp_path)
+    team_store.add_file(_info("a"))
+    assert team_store.count_files() == 1
+    generation_path = db_path + ".generation"
+    before = os.stat(generation_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("INSERT INTO team_files VALUES (?, ?, ?, ?, ?, ?, ?)", team_store._row(_info("b")))
+        conn.execute("UPDATE store_meta SET value = value + 1 WHERE key = 'generation'")
+        generation = conn.execute("SELECT value FROM store_meta WHERE key = 'generation'").fetchone()[0]
+    with open(generation_path, "r+", encoding="utf-8") as f:
+        f.write(str(generation))
+    os.utime(generation_path, ns=(before.st_atime_ns, before.st_mtime_ns))
+    after = os.stat(generation_path)
+    assert (after.st_ino, after.st_mtime_ns, after.st_size) == (before.st_ino, before.st_mtime_ns, before.st_size)
+    assert team_store.count_files() == 2 and team_store.get_file("b") is not None
+    print("✅ 进程内快照: 代数文件元数据不变时按代数值刷新")
+
+
+def _add_many(db_path: str, worker: int, count: int):
+    team_store.configure(db_path)
+    for i in range(count):
+        team_store.add_file(_info(f"w{worker}-{i}"))
+
+
+def test_concurrent_writers(tmp_path):
+    db_path = _use_database(tmp_path)
+    team_store.add_file(_info("existing"))
+    before = team_store.count_files()
+    processes = [multiprocessing.Process(target=_add_many, args=(db_path, worker, 50)) for worker in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+    assert team_store.count_files() == before + 200
+    print("✅ 并发写入: 4 个进程 200 条记录无丢失")
+
+
+if __name__ == "__main__":
+    # 直接运行时为每个测试创建临时目录（代替 pytest 的 tmp_path）
+    with tempfile.TemporaryDirectory() as directory:
+        test_migration(pathlib.Path(directory))
+    with tempfile.TemporaryDirectory() as directory:
+        test_operations(pathlib.Path(directory))
+    with tempfile.TemporaryDirectory() as directory:
+        test_snapshot_without_database(pathlib.Path(directory))
+    with tempfile.TemporaryDirectory() as directory:
+        test_snapshot_refresh_after_other_process(pathlib.Path(directory))
+    with tempfile.TemporaryDirectory() as directory:
+        test_snapshot_refresh_same_file_metadata(pathlib.Path(directory))
+    with tempfile.TemporaryDirectory() as directory:
+        test_concurrent_writers(pathlib.Path(directory))
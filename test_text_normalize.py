@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试 text_normalize 与原实现的等价性（基于随机生成的性质测试，固定随机种子）
+
+python test_text_normalize.py
+"""
+
+import random
+import re
+
+import text_normalize
+
+ROUNDS = 20000
+
+# 生成器字母表：覆盖全部引号字符、逗号/空格组合、各类空白、零宽字符、中文括号与编号格式
+QUOTE_ALPHABET = list(text_normalize.ASCII_QUOTES + text_normalize.OTHER_QUOTES + "“”‘’") + [
+    ",", " ", ", ", ",,", "  ", "\t", "\n", "\r", "\u3000", "\xa0",
+    "a", "中", "步骤", "1.", "2、", "10. ", "（", "）", "\u200b", "\ufeff",
+]
+
+
+def _legacy_remove_quotes(text: str) -> str:
+    """原 module_converter_final._completely_remove_quotes（逐字保留，作为对照基准）"""
+    if not text:
+        return ""
+    
+    # 最全面的引号字符列表
+    all_quote_chars = [
+        # 基本引号
+        '"', "'", '`',
+        # 中文引号
+        '"', '"', ''', ''',
+        # 其他语言引号
+        '«', '»', '‹', '›', '„', '‚', '‛', '‟', '´', '‵',
+        # 角括号类
+        '〈', '〉', '《', '》', '「', '」', '『', '』',
+        # 方括号类（可选，根据需要）
+        '【', '】', '〔', '〕',
+        # 其他特殊引号
+        '⌈', '⌉', '⌊', '⌋', '❝', '❞', '❮', '❯'
+    ]
+    
+    # 进行5轮彻底清理，确保完全去除
+    for round_num in range(5):
+        text = text.strip()
+        
+        # 去除首尾引号（多轮处理嵌套引号）
+        changed = True
+        while changed:
+            changed = False
+            original_text = text
+            for quote in all_quote_chars:
+                if len(text) > 1 and text.startswith(quote) and text.endswith(quote):
+                    text = text[1:-1].strip()
+                    changed = True
+                    break
+            if text == original_text:
+                break
+        
+        # 去除文本中间的所有引号
+        for quote in all_quote_chars:
+            text = text.replace(quote, '')
+        
+        text = text.strip()
+    
+    return text
+
+
+def _legacy_sanitize_text(text) -> str:
+    if not text:
+        return ""
+    text = re.sub(r"[\u200B-\u200D\uFEFF]", "", str(text))
+    text = re.sub(r"\s+", " ", text.strip())
+    return text
+
+
+def _legacy_sanitize_multiline_text(text) -> str:
+    if not text:
+        return ""
+    text = str(text)
+    text = re.sub(r"[\u200B-\u200D\uFEFF]", "", text)
+    lines = text.split('\n')
+    processed_lines = [re.sub(r'[ \t]+', ' ', line).strip() for line in lines]
+    processed_lines = [line for line in processed_lines if line]
+    return "\n".join(processed_lines)
+
+
+def _legacy_sanitize_module(module) -> str:
+    if not module:
+        return "/"
+    module = re.sub(r"[（）]", lambda m: {"（": "(", "）": ")"}.get(m.group(), m.group()), module)
+    return _legacy_sanitize_text(module)
+
+
+def _random_texts(seed: int, rounds: int = ROUNDS, max_tokens: int = 16):
+    rng = random.Random(seed)
+    for _ in range(rounds):
+        tokens = [rng.choice(QUOTE_ALPHABET) for _ in range(rng.randint(0, max_tokens))]
+        # 一部分样本用同一种引号包裹若干层，覆盖成对剥离逻辑
+        if tokens and rng.random() < 0.3:
+            quote = rng.choice(QUOTE_ALPHABET[:36])
+            depth = rng.randint(1, 3)
+            tokens = [quote + rng.choice(["", " "])] * depth + tokens + [rng.choice(["", " "]) + quote] * depth
+        yield "".join(tokens)
+
+
+def _check(name, legacy, current, texts):
+    mismatches = [(t, legacy(t), current(t)) for t in texts if legacy(t) != current(t)]
+    assert not mismatches, f"{name} 输出不一致，示例: {mismatches[:3]!r}"
+    print(f"✅ {name}: 一致")
+
+
+def test_remove_quotes_equivalence():
+    texts = list(_random_texts(11)) + ["", " ", ", ", ",,,,,,      ", '"', '""', '" "', "《“测试”》", "a, b, c"]
+    _check("remove_quotes", _legacy_remove_quotes, text_normalize.remove_quotes, texts)
+
+
+def test_sanitize_equivalence():
+    texts = list(_random_texts(22))
+    _check("sanitize_text", _legacy_sanitize_text, text_normalize.sanitize_text, texts)
+    _check("sanitize_multiline_text", _legacy_sanitize_multiline_text, text_normalize.sanitize_multiline_text, texts)
+    _check("sanitize_module", _legacy_sanitize_module, text_normalize.sanitize_module, texts)
+
+
+def test_format_step_text_equivalence():
+    # _format_step_text 多次调用引号清理（整段、每行、编号内容、结果），替换为原实现逐一对照
+    import module_converter_final
+
+    texts = list(_random_texts(33, rounds=ROUNDS // 4, max_tokens=40))
+    current = [module_converter_final._format_step_text(t) for t in texts]
+    saved = module_converter_final._completely_remove_quotes
+    module_converter_final._completely_remove_quotes = _legacy_remove_quotes
+    try:
+        legacy = [module_converter_final._format_step_text(t) for t in texts]
+    finally:
+        module_converter_final._completely_remove_quotes = saved
+    mismatches = [(t, l, c) for t, l, c in zip(texts, legacy, current) if l != c]
+    assert not mismatches, f"_format_step_text 输出不一致，示例: {mismatches[:3]!r}"
+    print("✅ _format_step_text: 一致")
+
+
+if __name__ == "__main__":
+    test_remove_quotes_equivalence()
+    test_sanitize_equivalence()
+    test_format_step_text_equivalence()
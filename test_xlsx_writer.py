@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试流式 XLSX 写入器：用标准库读回工作表，校验单元格内容、换行样式与表头
+
+python test_xlsx_writer.py
+"""
+
+import os
+import tempfile
+import zipfile
+import xml.etree.ElementTree as ET
+
+import xlsx_writer
+
+_NS = {"m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+def _read_sheet(path: str):
+    """返回 [(值列表, 样式列表), ...]，空单元格值为 None"""
+    with zipfile.ZipFile(path) as zf:
+        names = set(zf.namelist())
+        for required in ("[Content_Types].xml", "_rels/.rels", "xl/workbook.xml",
+                         "xl/_rels/workbook.xml.rels", "xl/styles.xml"):
+            assert required in names, f"缺少 {required}"
+        root = ET.fromstring(zf.read("xl/worksheets/sheet1.xml"))
+    rows = []
+    for row in root.find("m:sheetData", _NS):
+        values, styles = [], []
+        for cell in row:
+            text = cell.find("m:is/m:t", _NS)
+            values.append(None if text is None else (text.text or ""))
+            styles.append(cell.get("s"))
+        rows.append((values, styles))
+    return rows
+
+
+def test_round_trip():
+    header = ["用例名称", "用例步骤", "备注"]
+    batches = [
+        [["登录", "1.输入账号\n2.点击登录", "a < b & c > d"], ["空值", "", None]],
+        [],
+        [["控制字符\x01\x0b", "回车\r\n换行", " 首尾空格 "], ["数字", 3, "x" * (xlsx_writer.XLSX_MAX_CELL_CHARS + 10)]],
+    ]
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        count = xlsx_writer.write_xlsx(path, header, iter(batches), sheet_name="用例[1]/2", column_widths=(20, 60, 30))
+        assert count == 4
+        rows = _read_sheet(path)
+        assert [values for values, _ in rows] == [
+            header,
+            ["登录", "1.输入账号\n2.点击登录", "a < b & c > d"],
+            ["空值", None, None],
+            ["控制字符", "回车\r\n换行", " 首尾空格 "],
+            ["数字", "3", "x" * xlsx_writer.XLSX_MAX_CELL_CHARS],
+        ]
+        # 表头加粗，多行单元格自动换行，其余为默认样式
+        assert rows[0][1] == ["2", "2", "2"]
+        assert rows[1][1] == [None, "1", None]
+        with zipfile.ZipFile(path) as zf:
+            workbook = zf.read("xl/workbook.xml").decode("utf-8")
+        assert 'name="用例_1__2"' in workbook
+    finally:
+        os.remove(path)
+    print("✅ write_xlsx: 读回一致")
+
+
+def test_sheet_name_quotes():
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        xlsx_writer.write_xlsx(path, ["a"], iter([[["1"]]]), sheet_name='"登录" & <退出>')
+        with zipfile.ZipFile(path) as zf:
+            root = ET.fromstring(zf.read("xl/workbook.xml"))
+        assert root.find("m:sheets/m:sheet", _NS).get("name") == '"登录" & <退出>'
+    finally:
+        os.remove(path)
+    print("✅ 工作表名称: 引号等字符转义后 workbook.xml 合法")
+
+
+def test_row_limit():
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    saved = xlsx_writer.XLSX_MAX_ROWS
+    xlsx_writer.XLSX_MAX_ROWS = 3
+    try:
+        xlsx_writer.write_xlsx(path, ["a"], [[["1"], ["2"], ["3"]]])
+        raise AssertionError("超过行数上限应抛出 ValueError")
+    except ValueError:
+        pass
+    finally:
+        xlsx_writer.XLSX_MAX_ROWS = saved
+        os.remove(path)
+    print("✅ write_xlsx: 行数上限")
+
+
+if __name__ == "__main__":
+    test_round_trip()
+    test_sheet_name_quotes()
+    test_row_limit()
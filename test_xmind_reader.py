@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试 xmind_reader：
+- 数据源选择：同时含 content.json 与 content.xml 的文件，各解析器读取同一数据源
+- xmind 库主题的标记 ID（MarkerId 对象）转换为字符串，带标记的导图可正常提取优先级
+- 超深 content.json（超过标准库 json 的递归上限）改用不递归的解析器，不修改递归上限、不会栈溢出
+- map_sheets：画布少于 SHEET_PARALLEL_MIN 时串行，进程池在多次调用间复用，结果按画布顺序产出
+- 单画布转换只构建主画布的主题树（first_sheet），其余画布不解析
+
+python test_xmind_reader.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+import zipfile
+
+import converter
+import module_converter_final
+import xmind_reader
+
+# XMind Zen 的 content.xml 只是兼容旧版的占位内容，与 content.json 不同
+PLACEHOLDER_XML = (
+    "<?xml version='1.0' encoding='UTF-8'?>"
+    "<xmap-content xmlns='urn:xmind:xmap:xmlns:content:2.0'><sheet id='s'>"
+    "<topic id='r'><title>Warning</title><children><topics type='attached'>"
+    "<topic id='c'><title>占位用例</title><children><topics type='attached'>"
+    "<topic id='s1'><title>占位步骤</title></topic>"
+    "</topics></children></topic>"
+    "</topics></children></topic><title>Sheet 1</title></sheet></xmap-content>"
+)
+
+
+def _topic(title: str, children=(), markers=()) -> dict:
+    topic = {"id": title, "title": title}
+    if children:
+        topic["children"] = {"attached": list(children)}
+    if markers:
+        topic["markers"] = [{"markerId": marker} for marker in markers]
+    return topic
+
+
+def _case(title: str, steps: int, markers=()) -> dict:
+    return _topic(title, [_topic(f"{title}步骤{i}", [_topic(f"{title}预期{i}")]) for i in range(steps)], markers)
+
+
+ROOT = _topic("登录模块", [
+    _topic("账号", [_case("登录成功", 2, ["priority-1"]), _case("登录失败", 3)]),
+    _case("退出登录", 1, ["priority-3"]),
+])
+
+
+def write_xmind(path: str, root: dict, xml: str = None):
+    """写入 XMind Zen 格式文件；xml 不为 None 时同时写入 content.xml"""
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("content.json", json.dumps([{"id": "s", "title": "画布", "rootTopic": root}], ensure_ascii=False))
+        if xml is not None:
+            zf.writestr("content.xml", xml)
+
+
+def test_parsers_share_content_json():
+    with tempfile.TemporaryDirectory() as directory:
+        both = os.path.join(directory, "both.xmind")
+        json_only = os.path.join(directory, "json_only.xmind")
+        write_xmind(both, ROOT, PLACEHOLDER_XML)
+        write_xmind(json_only, ROOT)
+        for parser in ("auto", "xmind2", "xmindlib", "json"):
+            cases = converter.get_structured_cases(both, parser=parser)
+            assert cases == converter.get_structured_cases(json_only, parser=parser), parser
+            assert cases and all("占位" not in case["title"] for case in cases), parser
+        for parser in ("auto", "xmind", "xmind2testcase", "json"):
+            cases = module_converter_final.get_module_cases(both, parser=parser)
+            assert cases == module_converter_final.get_module_cases(json_only, parser=parser), parser
+            assert cases and {case["module"] for case in cases} == {"登录模块"}, parser
+    print("✅ 数据源: 各解析器均读取 content.json，忽略占位的 content.xml")
+
+
+class _MarkerId:
+    """模拟 xmind 库的 MarkerId：只有 name 属性，没有字符串方法"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+
+class _Marker:
+    def __init__(self, name: str):
+        self._marker_id = _MarkerId(name)
+
+    def getMarkerId(self):
+        return self._marker_id
+
+
+class _Topic:
+    """模拟 xmind 库的 TopicElement"""
+
+    def __init__(self, title: str, children=(), markers=(), notes=None):
+        self._title, self._children, self._notes = title, list(children), notes
+        self._markers = [_Marker(marker) for marker in markers]
+
+    def getTitle(self):
+        return self._title
+
+    def getNotes(self):
+        return self._notes
+
+    def getMarkers(self):
+        return self._markers
+
+    def getSubTopics(self):
+        return self._children
+
+
+def _library_topic(topic: dict) -> _Topic:
+    children = [_library_topic(child) for child in (topic.get("children") or {}).get("attached", [])]
+    return _Topic(topic["title"], children, [marker["markerId"] for marker in topic.get("markers", [])])
+
+
+def test_library_marker_ids():
+    # 原实现对 MarkerId 调用 lower() 抛出 AttributeError，auto 模式因此整体退回 xmind2testcase
+    tree = xmind_reader.tree_from_topic(_library_topic(ROOT))
+    assert tree.markers[tree.titles.index("登录成功")] == ("priority-1",)
+    cases = converter._cases_from_topic_tree(tree)
+    assert [(case["title"], case["prio"]) for case in cases] == [("登录成功", "P0"), ("登录失败", "P2"), ("退出登录", "P2")]
+    cases = module_converter_final._module_cases_from_topic_tree(tree, "登录模块")
+    assert [case["priority"] for case in cases] == ["P0", "P2", "P2"]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "markers.xmind")
+        write_xmind(path, ROOT)
+        json_tree = xmind_reader.load_sheets(path)[0].tree
+        assert json_tree.markers == tree.markers
+    print("✅ 标记: xmind 库的 MarkerId 转为字符串，优先级提取正常")
+
+
+# 超过原实现的崩溃深度（约 25000 层时 C 栈溢出）
+DEEP_LEVELS = 30000
+
+
+def _deep_content_json(levels: int) -> str:
+    """中心主题下嵌套 levels 层模块，用例位于最深处（json.dumps 本身也会递归，因此直接拼接文本）"""
+    case = json.dumps(_case("最深用例", 2), ensure_ascii=False)
+    head = "".join('{"id": "n%d", "title": "L%d", "children": {"attached": [' % (i, i) for i in range(levels))
+    return '[{"id": "s", "title": "S", "rootTopic": ' + head + case + "]}}" * levels + "}]"
+
+
+def test_loads_iterative():
+    documents = ['[{"a": [1, -2.5e3, "x\\"\\u4e2d", null, true, false, {}], "b": {"c": []}}]', "NaN",
+                 ' {"k" : [ 1 , 2 ] } ', '"\ud83d\ude00"']
+    for text in documents:
+        assert json.dumps(xmind_reader._loads_iterative(text)) == json.dumps(json.loads(text)), text
+    for text in ("[1,]", '{"a": 1,}', "[01]", "", '{"a" 1}', "[1] 2"):
+        try:
+            xmind_reader._loads_iterative(text)
+            raise AssertionError(f"应抛出 ValueError: {text}")
+        except ValueError:
+            pass
+    print("✅ _loads_iterative: 与标准库 json 一致")
+
+
+def test_deep_content_json():
+    limit = sys.getrecursionlimit()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "deep.xmind")
+        with zipfile.ZipFile(path, "w") as zf:
+            zf.writestr("content.json", _deep_content_json(DEEP_LEVELS))
+        cases = converter.get_structured_cases(path, parser="json")
+        assert [case["title"] for case in cases] == ["最深用例"]
+        # auto 模式按 xmind2testcase 规则（用例标题拼接各层主题）
+        cases = converter.get_structured_cases(path, parser="auto")
+        assert cases and cases == converter.get_structured_cases(path, parser="xmind2")
+        assert all(" 最深用例 " in case["title"] for case in cases)
+        cases = module_converter_final.get_module_cases(path, parser="json")
+        assert [case["title"] for case in cases] == ["最深用例"]
+        assert cases[0]["module"] == "L0" and cases[0]["custom_module"].endswith(f"/L{DEEP_LEVELS - 1}")
+    assert sys.getrecursionlimit() == limit
+    print(f"✅ 超深导图: {DEEP_LEVELS} 层 content.json 解析正常，递归上限未修改")
+
+
+def _sheet_label(sheet, index: int, prefix: str) -> tuple:
+    return prefix, index, sheet, os.getpid()
+
+
+def test_map_sheets_pool():
+    workers, parallel_min = xmind_reader.SHEET_WORKERS, xmind_reader.SHEET_PARALLEL_MIN
+    xmind_reader.configure(workers=2, parallel_min=3)
+    try:
+        results = list(xmind_reader.map_sheets(_sheet_label, ["a", "b"], "p"))
+        assert [result[:3] for result in results] == [("p", 0, "a"), ("p", 1, "b")]
+        assert {result[3] for result in results} == {os.getpid()}
+
+        sheets = [f"画布{i}" for i in range(10)]
+        results = list(xmind_reader.map_sheets(_sheet_label, sheets, "p"))
+        assert [result[:3] for result in results] == [("p", i, sheet) for i, sheet in enumerate(sheets)]
+        assert os.getpid() not in {result[3] for result in results}
+        pool = xmind_reader._sheet_pool
+        # 提前停止消费后进程池仍可复用
+        next(xmind_reader.map_sheets(_sheet_label, sheets, "q"))
+        assert len(list(xmind_reader.map_sheets(_sheet_label, sheets, "r"))) == 10
+        assert xmind_reader._sheet_pool is pool
+    finally:
+        xmind_reader.configure(workers=workers, parallel_min=parallel_min)
+    print("✅ map_sheets: 画布少时串行，进程池复用")
+
+
+def test_first_sheet_only():
+    # 第二个画布的 rootTopic 无法构建主题树：只转换主画布时不应受其影响
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "multi.xmind")
+        with zipfile.ZipFile(path, "w") as zf:
+            zf.writestr("content.json", json.dumps([{"id": "s1", "title": "画布", "rootTopic": ROOT},
+                                                    {"id": "s2", "title": "损坏", "rootTopic": "损坏"}],
+                                                   ensure_ascii=False))
+        assert xmind_reader.first_sheet(path).title == "画布"
+        for parser in ("xmindlib", "json"):
+            cases = converter.get_structured_cases(path, parser=parser)
+            assert [case["title"] for case in cases] == ["登录成功", "登录失败", "退出登录"], parser
+        for parser in ("xmind", "json"):
+            cases = module_converter_final.get_module_cases(path, parser=parser)
+            assert [case["title"] for case in cases] == ["登录成功", "登录失败", "退出登录"], parser
+    print("✅ first_sheet: 单画布转换只构建主画布")
+
+
+if __name__ == "__main__":
+    test_parsers_share_content_json()
+    test_library_marker_ids()
+    test_loads_iterative()
+    test_deep_content_json()
+    test_map_sheets_pool()
+    test_first_sheet_only()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+文本清洗（所有转换器共用）
+
+每个标题、备注、步骤、预期结果都要经过清洗，因此实现尽量减少遍历次数：
+- 纯 ASCII 文本（str.isascii 为常数时间）跳过零宽字符与中文括号处理
+- 零宽字符、中文括号先用子串查找判断是否存在，只有出现时才执行预编译正则 / replace
+  （绝大多数文本不含这些字符；逐字符查表的 str.translate 对中文文本反而更慢）
+- 空白折叠使用 str.split() + join（按 str.isspace 切分，与正则 \\s+ 等价）
+- 多行文本仅在行内出现制表符或连续空格时才调用预编译正则
+- 引号清理（remove_quotes）为线性时间的单遍实现，替代原 5 轮 × 36 次 replace 的循环
+
+输出与原实现逐字符一致。
+"""
+
+import re
+
+# 零宽空格 / 零宽非连接符 / 零宽连接符 / BOM
+ZERO_WIDTH_CHARS = "\u200b\u200c\u200d\ufeff"
+
+_ZERO_WIDTH = re.compile(f"[{ZERO_WIDTH_CHARS}]")
+_SPACE_TAB_RUN = re.compile(r"[ \t]+")
+
+
+def _remove_zero_width(text: str) -> str:
+    if "\u200b" in text or "\u200c" in text or "\u200d" in text or "\ufeff" in text:
+        return _ZERO_WIDTH.sub("", text)
+    return text
+
+
+def sanitize_text(text) -> str:
+    """基础清洗：去除 None、零宽字符、所有空白符合并为一个空格。适用于单行文本。"""
+    if not text:
+        return ""
+    text = str(text)
+    if not text.isascii():
+        text = _remove_zero_width(text)
+    return " ".join(text.split())
+
+
+def sanitize_multiline_text(text) -> str:
+    """多行文本清洗：删除零宽字符，保留换行符，每行合并空格/制表符并去除首尾空白，丢弃空行。"""
+    if not text:
+        return ""
+    text = str(text)
+    if not text.isascii():
+        text = _remove_zero_width(text)
+    lines = []
+    for line in text.split("\n"):
+        line = line.strip()
+        if not line:
+            continue
+        if "\t" in line or "  " in line:
+            line = _SPACE_TAB_RUN.sub(" ", line)
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def sanitize_module(module) -> str:
+    """模块清洗：统一中文括号为英文括号，并进行通用清洗。"""
+    if not module:
+        return "/"
+    module = str(module)
+    if not module.isascii():
+        if "（" in module or "）" in module:
+            module = module.replace("（", "(").replace("）", ")")
+        module = _remove_zero_width(module)
+    return " ".join(module.split())
+
+
+# ---------------------------------------------------------------------------
+# 引号清理：与 module_converter_final 原 _completely_remove_quotes（5 轮循环）输出一致
+# ---------------------------------------------------------------------------
+
+# 原引号列表按顺序为：ASCII 引号 " ' `，随后是字面量 ", "（原列表中的中文引号在编码转换中
+# 退化成了 ASCII 双引号与三引号字符串 ", "，因此原实现会删除所有“逗号+空格”，且不处理 “”‘’），
+# 最后是其余非 ASCII 引号/括号。为保持导出结果不变，这里按相同语义实现。
+ASCII_QUOTES = "\"'`"
+OTHER_QUOTES = "«»‹›„‚‛‟´‵〈〉《》「」『』【】〔〕⌈⌉⌊⌋❝❞❮❯"
+COMMA_SPACE = ", "
+
+_QUOTE_SET = frozenset(ASCII_QUOTES + OTHER_QUOTES)
+_OTHER_QUOTES_RE = re.compile(f"[{re.escape(OTHER_QUOTES)}]")
+# 原实现共 5 轮：第 1 轮删除全部引号字符；其后各轮只可能继续删除新拼接出的 ", "
+_COMMA_SPACE_ROUNDS = 5
+
+
+def remove_quotes(text: str) -> str:
+    """
+    完全去除文本中的引号（等价于原 5 轮 _completely_remove_quotes）：
+    1. 去除首尾空白后，成对剥离首尾相同的引号字符（每剥一层再去空白），用下标线性完成
+    2. 删除 ASCII 引号，再删除 ", "，再删除其余引号（预编译字符类）；
+       ASCII 引号只有 3 个，逐个判断后 replace 比对中文文本逐字符查表的 str.translate 快约 6 倍
+    3. 删除后可能拼接出新的 ", "，最多再重复 4 轮（与原实现的轮数一致），每轮后去首尾空白
+    不含任何引号字符与 ", " 的文本只做一次 strip。
+    """
+    if not text:
+        return ""
+    text = text.strip()
+
+    # 1. 剥离成对的首尾引号
+    start, end = 0, len(text)
+    while end - start > 1 and text[start] == text[end - 1] and text[start] in _QUOTE_SET:
+        start += 1
+        end -= 1
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+    if start or end != len(text):
+        text = text[start:end]
+
+    # 2. 删除引号字符（第 1 轮）
+    for quote in ASCII_QUOTES:
+        if quote in text:
+            text = text.replace(quote, "")
+    if COMMA_SPACE in text:
+        text = text.replace(COMMA_SPACE, "")
+    if not text.isascii():
+        text = _OTHER_QUOTES_RE.sub("", text)
+    text = text.strip()
+
+    # 3. 后续轮次只可能删除新拼接出的 ", "
+    for _ in range(_COMMA_SPACE_ROUNDS - 1):
+        if COMMA_SPACE not in text:
+            break
+        text = text.replace(COMMA_SPACE, "").strip()
+    return text
@@ -11,6 +11,7 @@ import tempfile
 import uuid
 from flask import Flask, render_template_string, request, send_file, jsonify, flash, redirect, url_for
 from werkzeug.utils import secure_filename
+import artifact_registry
 from converter import convert_to_csv, get_structured_cases
 from module_converter import convert_to_module_csv, get_module_cases, get_module_export_filename
 
@@ -375,7 +376,7 @@ HTML_TEMPLATE = '''
                 </div>
                 
                 <div class="export-buttons">
-                    <a href="{{ url_for('download_file', filename=result.filename) }}" class="btn">📥 下载 CSV 文件</a>
+                    <a href="{{ url_for('download_file', artifact_id=result.artifact_id) }}" class="btn">📥 下载 CSV 文件</a>
                     {% if result.export_type == 'module' %}
                     <span class="export-btn active tooltip">
                         新家头CSV
@@ -493,10 +494,12 @@ def index():
                         if not output_name.endswith('.csv'):
                             output_name += '.csv'
                         output_path = os.path.join(temp_dir, f"{uuid.uuid4()}_{output_name}")
+                        download_name = output_name
                     else:
                         # 使用默认的模块化文件名格式
                         default_name = get_module_export_filename(input_path)
                         output_path = os.path.join(temp_dir, f"{uuid.uuid4()}_{default_name}")
+                        download_name = default_name
                     
                     # 执行模块化转换
                     csv_path = convert_to_module_csv(input_path, output_path, parser=parser)
@@ -512,8 +515,10 @@ def index():
                         if not output_name.endswith('.csv'):
                             output_name += '.csv'
                         output_path = os.path.join(temp_dir, f"{uuid.uuid4()}_{output_name}")
+                        download_name = output_name
                     else:
                         output_path = None
+                        download_name = None
                     
                     # 执行标准转换
                     csv_path = convert_to_csv(input_path, output_path, parser=parser)
@@ -525,12 +530,15 @@ def index():
                     export_type = 'standard'
                 
                 file_size = os.path.getsize(csv_path)
+                # 登记转换结果，下载链接使用登记 ID
+                artifact_id = artifact_registry.register(csv_path, download_name)
                 
                 # 清理临时输入文件
                 os.remove(input_path)
                 
                 result = {
                     'filename': os.path.basename(csv_path),
+                    'artifact_id': artifact_id,
                     'size': file_size,
                     'case_count': case_count,
                     'step_count': step_count,
@@ -549,19 +557,12 @@ def index():
     
     return render_template_string(HTML_TEMPLATE)
 
-@app.route('/download/<filename>')
-def download_file(filename):
-    temp_dir = tempfile.gettempdir()
-    file_path = None
-    
-    # 查找文件
-    for file in os.listdir(temp_dir):
-        if file.endswith(filename):
-            file_path = os.path.join(temp_dir, file)
-            break
-    
-    if file_path and os.path.exists(file_path):
-        return send_file(file_path, as_attachment=True, download_name=filename)
+@app.route('/download/<artifact_id>')
+def download_file(artifact_id):
+    # 按转换时登记的 ID 查找结果文件（过期或不存在时提示）
+    artifact = artifact_registry.resolve(artifact_id)
+    if artifact:
+        return send_file(artifact['path'], as_attachment=True, download_name=artifact['download_name'])
     else:
         flash('文件不存在或已过期')
         return redirect(url_for('index'))
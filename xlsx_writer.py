@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+流式 XLSX 写入器（只写模式，不依赖第三方库）
+
+用例管理工具从 Excel 导入，直接生成 .xlsx 可省去“打开 UTF-8 BOM CSV 再另存”的步骤：
+- 工作表 XML 边生成边写入 zip 条目（zipfile 流式写入），按批编码后写出，内存占用不随行数增长
+- 单元格使用内联字符串（inlineStr），不需要在内存中维护共享字符串表
+- 含换行的单元格使用“自动换行”样式，在 Excel 中原样显示为多行
+- 表头加粗并冻结首行，列宽由调用方指定（流式写入无法预先统计内容宽度）
+- 去除 XML 1.0 不允许的控制字符；单元格超过 Excel 上限（32767 字符）时截断
+"""
+
+import re
+import zipfile
+from typing import Iterable, List, Optional, Sequence
+
+# Excel 单个工作表的行数上限与单元格字符数上限
+XLSX_MAX_ROWS = 1048576
+XLSX_MAX_CELL_CHARS = 32767
+
+# deflate 压缩级别：1 级比默认 6 级快约 40%，文件仍只有同内容 CSV 的 1/4 左右
+COMPRESS_LEVEL = 1
+
+# 单元格样式编号（对应 _STYLES 中 cellXfs 的顺序）
+_STYLE_WRAP = 1
+_STYLE_HEADER = 2
+
+# 需要转义或清理的字符：XML 特殊字符、回车（按原样保留为 &#13;）及 XML 1.0 不允许的控制字符
+_NEEDS_ESCAPE = re.compile(r"[&<>\r\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+_ILLEGAL_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+# 工作表名称不允许的字符
+_INVALID_SHEET_NAME_CHARS = re.compile(r"[\[\]:*?/\\]")
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+# 样式：0 默认；1 自动换行 + 顶端对齐（多行单元格）；2 加粗（表头）
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2">'
+    '<font><sz val="11"/><name val="Calibri"/><family val="2"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/><family val="2"/></font>'
+    '</fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0" applyAlignment="1">'
+    '<alignment wrapText="1" vertical="top"/></xf>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetViews><sheetView workbookViewId="0">'
+    '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+    '</sheetView></sheetViews>'
+)
+_SHEET_TAIL = '</sheetData></worksheet>'
+
+
+def _escape(text: str) -> str:
+    text = _ILLEGAL_XML_CHARS.sub("", text)
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace("\r", "&#13;")
+
+
+def _escape_attr(text: str) -> str:
+    """双引号包围的属性值：在 _escape 基础上转义引号"""
+    return _escape(text).replace('"', "&quot;")
+
+
+def _cell(value, style: int = 0) -> str:
+    """单元格 XML（内联字符串）；空值写成空单元格以保持列位置"""
+    if value is None:
+        return "<c/>"
+    text = value if isinstance(value, str) else str(value)
+    if not text:
+        return "<c/>"
+    if len(text) > XLSX_MAX_CELL_CHARS:
+        text = text[:XLSX_MAX_CELL_CHARS]
+    if not style and "\n" in text:
+        style = _STYLE_WRAP
+    if _NEEDS_ESCAPE.search(text):
+        text = _escape(text)
+    if style:
+        return f'<c t="inlineStr" s="{style}"><is><t xml:space="preserve">{text}</t></is></c>'
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _row(values: Sequence, style: int = 0) -> str:
+    return "<row>" + "".join([_cell(value, style) for value in values]) + "</row>"
+
+
+def sheet_title(name: str) -> str:
+    """转换为合法的工作表名称（去除非法字符，最长 31 个字符）"""
+    name = _INVALID_SHEET_NAME_CHARS.sub("_", name or "").strip("'").strip()
+    return name[:31] or "Sheet1"
+
+
+def write_xlsx(path: str, header: Sequence[str], row_batches: Iterable[List[Sequence]],
+               sheet_name: str = "Sheet1", column_widths: Optional[Sequence[float]] = None) -> int:
+    """
+    将表头与按批产出的数据行写入单工作表的 .xlsx 文件，返回数据行数。
+    row_batches: 可迭代的行列表（如 converter.iter_row_batches 的输出），每批编码后立即写入 zip 条目。
+    column_widths: 各列宽度（字符数），不提供时使用 Excel 默认列宽。
+    数据行超过 Excel 行数上限时抛出 ValueError（已写出的文件由调用方清理）。
+    """
+    count = 0
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED,
+                         compresslevel=COMPRESS_LEVEL) as zf:
+        zf.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        zf.writestr("_rels/.rels", _ROOT_RELS)
+        zf.writestr("xl/workbook.xml", _WORKBOOK.format(name=_escape_attr(sheet_title(sheet_name))))
+        zf.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        zf.writestr("xl/styles.xml", _STYLES)
+
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as out:
+            head = [_SHEET_HEAD]
+            if column_widths:
+                head.append("<cols>")
+                head.extend(f'<col min="{i}" max="{i}" width="{width}" customWidth="1"/>'
+                            for i, width in enumerate(column_widths, start=1))
+                head.append("</cols>")
+            head.append("<sheetData>")
+            head.append(_row(header, _STYLE_HEADER))
+            out.write("".join(head).encode("utf-8"))
+
+            for batch in row_batches:
+                if not batch:
+                    continue
+                count += len(batch)
+                if count >= XLSX_MAX_ROWS:
+                    raise ValueError(f"数据行数超过 Excel 单个工作表上限（{XLSX_MAX_ROWS - 1} 行）")
+                out.write("".join([_row(row) for row in batch]).encode("utf-8"))
+
+            out.write(_SHEET_TAIL.encode("utf-8"))
+    return count
@@ -0,0 +1,710 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+XMind 单次解析读取器
+
+目标：
+- 只打开一次 .xmind 压缩包，解析 content.json（XMind Zen/2020+）或 content.xml（XMind 8）
+- 构建一份紧凑的主题树中间表示（TopicTree），供 xmind2testcase 风格解析与递归启发式解析共同使用
+- xmind 库加载的 TopicElement 也可一次性转换为 TopicTree，后续遍历不再反复创建包装对象
+
+仅读取转换需要的字段：标题、备注（纯文本）、标记ID、附属(attached)子主题。
+
+TopicTree 结构（按先序遍历编号，根节点为 0）：
+- titles[i]   标题（可能为 None）
+- notes[i]    备注纯文本（可能为 None）
+- markers[i]  标记ID元组（无标记时共享同一个空元组）
+- parents[i]  父节点编号（根节点为 -1）
+- ends[i]     子树结束位置：节点 i 的子树占据 [i, ends[i])，i+1 为第一个子节点，
+              ends[child] 即下一个兄弟节点
+
+SubtreeShape 在 TopicTree 上一次后序遍历预计算各节点的高度、子节点数与简单子节点数，
+用例识别启发式因此变为常数时间查询。
+
+多画布：iter_sheets 逐个产出画布（已产出画布的原始数据随即释放），
+map_sheets 在进程池中按画布并行处理并按原顺序返回结果（画布较少时串行；进程池在进程内复用）。
+
+配置（环境变量，也可调用 configure() 覆盖）：
+- XMIND_SHEET_WORKERS         多画布并行处理的进程数，默认 min(CPU 核数, 4)；1 表示串行
+- XMIND_SHEET_PARALLEL_MIN    画布数达到该值才启用进程池，默认 4
+"""
+
+import json
+import os
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+CONTENT_JSON = "content.json"
+CONTENT_XML = "content.xml"
+
+_NO_MARKERS = ()
+
+# 不递归的 JSON 解析（_loads_iterative）使用的词法规则，与标准库 json 一致
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_JSON_CONSTANTS = (("null", None), ("true", True), ("false", False),
+                   ("NaN", float("nan")), ("Infinity", float("inf")), ("-Infinity", float("-inf")))
+
+# 多画布并行处理的默认进程数上限：画布任务需序列化主题树，进程再多收益有限且会挤占其他请求的 CPU
+SHEET_WORKERS_MAX = 4
+# 多画布并行处理的进程数，1 表示串行
+SHEET_WORKERS = int(os.environ.get("XMIND_SHEET_WORKERS", "0")) or min(os.cpu_count() or 1, SHEET_WORKERS_MAX)
+# 画布数达到该值才启用进程池（画布少时启动进程与序列化的开销大于并行收益）
+SHEET_PARALLEL_MIN = int(os.environ.get("XMIND_SHEET_PARALLEL_MIN", "4"))
+
+# 多画布共享进程池：(进程 ID, 进程数, 进程池)，按需创建，fork 后的子进程或进程数变化时重新创建
+_sheet_pool = None
+
+
+class TopicTree:
+    """扁平数组存储的主题树（并行列表，按先序编号）"""
+
+    __slots__ = ("titles", "notes", "markers", "parents", "ends")
+
+    def __init__(self):
+        self.titles = []
+        self.notes = []
+        self.markers = []
+        self.parents = []
+        self.ends = []
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def add(self, parent: int, title: Optional[str] = None, notes: Optional[str] = None,
+            markers: tuple = _NO_MARKERS) -> int:
+        """按先序追加节点，返回节点编号；子节点全部追加后需调用 close()"""
+        index = len(self.titles)
+        self.titles.append(title)
+        self.notes.append(notes)
+        self.markers.append(markers)
+        self.parents.append(parent)
+        self.ends.append(index + 1)
+        return index
+
+    def close(self, index: int):
+        """结束节点的子树"""
+        self.ends[index] = len(self.titles)
+
+    def children(self, index: int) -> List[int]:
+        """直接子节点编号列表"""
+        ends = self.ends
+        result = []
+        child = index + 1
+        end = ends[index]
+        while child < end:
+            result.append(child)
+            child = ends[child]
+        return result
+
+    def is_leaf(self, index: int) -> bool:
+        return self.ends[index] == index + 1
+
+
+class SubtreeShape:
+    """
+    子树形状（一次后序遍历预计算）：
+    - heights[i]        子树高度（叶子为 1；子节点全为叶子时为 2）
+    - child_counts[i]   直接子节点数
+    - simple_counts[i]  "简单"子节点数：有标题，且没有孙节点或孙节点全为叶子（即高度 <= 2）
+    """
+
+    __slots__ = ("heights", "child_counts", "simple_counts")
+
+    def __init__(self, tree: "TopicTree"):
+        size = len(tree)
+        heights = [1] * size
+        child_counts = [0] * size
+        simple_counts = [0] * size
+        titles = tree.titles
+        parents = tree.parents
+        # 先序编号中子节点编号总大于父节点，逆序遍历即为后序
+        for index in range(size - 1, 0, -1):
+            parent = parents[index]
+            height = heights[index]
+            child_counts[parent] += 1
+            if height >= heights[parent]:
+                heights[parent] = height + 1
+            if height <= 2 and titles[index]:
+                simple_counts[parent] += 1
+        self.heights = heights
+        self.child_counts = child_counts
+        self.simple_counts = simple_counts
+
+    def is_testcase(self, index: int, threshold: float) -> bool:
+        """简单子节点占比超过阈值时视为测试用例节点"""
+        count = self.child_counts[index]
+        return count > 0 and self.simple_counts[index] / count > threshold
+
+
+class SheetNode:
+    """画布：标题 + 主题树（中心主题编号为 0）"""
+
+    __slots__ = ("title", "tree")
+
+    def __init__(self, title: Optional[str], tree: TopicTree):
+        self.title = title
+        self.tree = tree
+
+
+def _local_name(tag: str) -> str:
+    """去掉 XML 命名空间前缀"""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _tree_from_json(data: dict) -> TopicTree:
+    """将 content.json 中的中心主题字典转换为 TopicTree（显式栈，避免深层递归）"""
+    tree = TopicTree()
+    stack = [(data, -1)]
+    while stack:
+        item, parent = stack.pop()
+        if item is None:
+            tree.close(parent)
+            continue
+        notes = (item.get("notes") or {}).get("plain") or {}
+        markers = tuple(m["markerId"] for m in (item.get("markers") or []) if m.get("markerId"))
+        index = tree.add(parent, item.get("title"), notes.get("content"), markers or _NO_MARKERS)
+        stack.append((None, index))
+        attached = (item.get("children") or {}).get("attached") or []
+        for child in reversed(attached):
+            stack.append((child, index))
+    return tree
+
+
+def tree_from_topic(root) -> TopicTree:
+    """
+    将 xmind 库的 TopicElement 一次性转换为 TopicTree。
+    每个主题的 getTitle/getNotes/getMarkers/getSubTopics 只调用一次。
+    标记 ID 统一转为字符串：xmind 库的 getMarkerId() 返回 MarkerId 对象（没有 lower()），
+    原 converter 在提取优先级时因此抛出 AttributeError，带标记的导图在 auto 模式下整体退回 xmind2testcase；
+    现在 xmindlib 解析正常参与择优，带标记导图的 auto 输出可能与原先不同。
+    """
+    tree = TopicTree()
+    stack = [(root, -1)]
+    while stack:
+        topic, parent = stack.pop()
+        if topic is None:
+            tree.close(parent)
+            continue
+        markers = []
+        for marker in (topic.getMarkers() or []):
+            try:
+                marker_id = marker.getMarkerId() if hasattr(marker, "getMarkerId") else marker
+                marker_id = str(getattr(marker_id, "name", marker_id) or "")
+            except Exception:
+                continue
+            if marker_id:
+                markers.append(marker_id)
+        notes = topic.getNotes()
+        index = tree.add(parent, topic.getTitle(), str(notes) if notes else None,
+                         tuple(markers) or _NO_MARKERS)
+        stack.append((None, index))
+        for child in reversed(topic.getSubTopics() or []):
+            if child:
+                stack.append((child, index))
+    return tree
+
+
+def _read_json_key(text: str, pos: int) -> Tuple[str, int]:
+    """读取对象的键与其后的冒号，返回 (键, 冒号之后的位置)"""
+    if text[pos:pos + 1] != '"':
+        raise json.JSONDecodeError("Expecting property name enclosed in double quotes", text, pos)
+    key, pos = json.decoder.scanstring(text, pos + 1)
+    pos = _JSON_WHITESPACE.match(text, pos).end()
+    if text[pos:pos + 1] != ":":
+        raise json.JSONDecodeError("Expecting ':' delimiter", text, pos)
+    return key, pos + 1
+
+
+def _loads_iterative(text: str):
+    """
+    不递归的 JSON 解析：未闭合的容器保存在显式栈中，嵌套深度只受内存限制。
+    标准库 json 按嵌套层级递归（C 实现同样受递归上限约束），仅在其抛出 RecursionError 时使用。
+    """
+    skip = _JSON_WHITESPACE.match
+    end = len(text)
+    stack = []  # 未闭合的容器：[容器, 当前键（数组为 None）]
+    pos = 0
+    while True:
+        # 读取一个值：容器开始时入栈并继续读取其第一个元素
+        pos = skip(text, pos).end()
+        char = text[pos:pos + 1]
+        if char == "{":
+            pos = skip(text, pos + 1).end()
+            if text[pos:pos + 1] == "}":
+                value, pos = {}, pos + 1
+            else:
+                key, pos = _read_json_key(text, pos)
+                stack.append([{}, key])
+                continue
+        elif char == "[":
+            pos = skip(text, pos + 1).end()
+            if text[pos:pos + 1] == "]":
+                value, pos = [], pos + 1
+            else:
+                stack.append([[], None])
+                continue
+        elif char == '"':
+            value, pos = json.decoder.scanstring(text, pos + 1)
+        else:
+            match = json.scanner.NUMBER_RE.match(text, pos)
+            if match:
+                integer, frac, exp = match.groups()
+                value = float(integer + (frac or "") + (exp or "")) if frac or exp else int(integer)
+                pos = match.end()
+            else:
+                for literal, value in _JSON_CONSTANTS:
+                    if text.startswith(literal, pos):
+                        pos += len(literal)
+                        break
+                else:
+                    raise json.JSONDecodeError("Expecting value", text, pos)
+
+        # 值读取完毕：放入所属容器；容器闭合时作为值继续放入上一层
+        while True:
+            if not stack:
+                pos = skip(text, pos).end()
+                if pos != end:
+                    raise json.JSONDecodeError("Extra data", text, pos)
+                return value
+            top = stack[-1]
+            container = top[0]
+            if top[1] is None:
+                container.append(value)
+            else:
+                container[top[1]] = value
+            pos = skip(text, pos).end()
+            char = text[pos:pos + 1]
+            if char == ",":
+                if top[1] is not None:
+                    top[1], pos = _read_json_key(text, skip(text, pos + 1).end())
+                else:
+                    pos += 1
+                break
+            if char != ("]" if top[1] is None else "}"):
+                raise json.JSONDecodeError("Expecting ',' delimiter", text, pos)
+            pos += 1
+            stack.pop()
+            value = container
+
+
+def _load_json(zf: zipfile.ZipFile):
+    with zf.open(CONTENT_JSON) as f:
+        data = f.read()
+    try:
+        return json.loads(data)
+    except RecursionError:
+        # 超过递归上限的超深导图改用不递归的解析器（不修改进程级的递归上限）
+        return _loads_iterative(data.decode(json.detect_encoding(data), "surrogatepass"))
+
+
+def _iter_json_sheets(zf: zipfile.ZipFile) -> Iterator[SheetNode]:
+    """逐个画布构建主题树；已转换画布的原始字典从列表中移除，可被及时回收"""
+    content = _load_json(zf) or []
+    for i, sheet in enumerate(content):
+        content[i] = None
+        root_data = sheet.get("rootTopic")
+        if not root_data:
+            continue
+        node = SheetNode(sheet.get("title"), _tree_from_json(root_data))
+        # 产出期间不再引用原始字典
+        sheet = root_data = None
+        yield node
+
+
+def _read_json_sheets(zf: zipfile.ZipFile) -> List[SheetNode]:
+    return list(_iter_json_sheets(zf))
+
+
+def _iter_xml_sheets(zf: zipfile.ZipFile) -> Iterator[SheetNode]:
+    """
+    以 iterparse 流式解析 content.xml：元素读取后立即 clear，避免同时持有完整 DOM 与主题树。
+    只保留 type="attached" 的子主题，与 xmind 库 getSubTopics() 默认行为一致。
+    每个画布读取完毕即产出，不同时持有后续画布的主题树。
+    """
+    path = []          # 当前元素的本地标签路径
+    topic_stack = []   # 与 path 中已收录 topic 元素对应的节点编号
+    topics_types = []  # 与 path 中 topics 元素对应的 type 属性
+    skip = 0           # 正在跳过的非 attached 子树深度
+    tree = None
+    sheet_title = None
+
+    with zf.open(CONTENT_XML) as f:
+        for event, elem in ET.iterparse(f, events=("start", "end")):
+            tag = _local_name(elem.tag)
+            if event == "start":
+                parent = path[-1] if path else None
+                path.append(tag)
+                if skip:
+                    if tag == "topic":
+                        skip += 1
+                elif tag == "sheet":
+                    tree, sheet_title = TopicTree(), None
+                elif tag == "topic":
+                    if parent == "sheet":
+                        topic_stack.append(tree.add(-1))
+                    elif parent == "topics" and topics_types[-1] == "attached" and topic_stack:
+                        topic_stack.append(tree.add(topic_stack[-1]))
+                    else:
+                        skip = 1
+                elif tag == "topics":
+                    topics_types.append(elem.get("type"))
+                elif tag == "marker-ref" and parent == "marker-refs" and path[-3] == "topic":
+                    marker_id = elem.get("marker-id")
+                    if marker_id:
+                        index = topic_stack[-1]
+                        tree.markers[index] = tree.markers[index] + (marker_id,)
+                continue
+
+            # end
+            path.pop()
+            if skip:
+                if tag == "topic":
+                    skip -= 1
+                elem.clear()
+                continue
+            parent = path[-1] if path else None
+            if tag == "title":
+                if parent == "topic":
+                    tree.titles[topic_stack[-1]] = elem.text
+                elif parent == "sheet":
+                    sheet_title = elem.text
+            elif tag == "plain" and parent == "notes" and path[-2] == "topic":
+                tree.notes[topic_stack[-1]] = elem.text
+            elif tag == "topic":
+                tree.close(topic_stack.pop())
+            elif tag == "topics":
+                topics_types.pop()
+            elif tag == "sheet":
+                elem.clear()
+                if len(tree):
+                    yield SheetNode(sheet_title, tree)
+                tree = None
+                continue
+            elem.clear()
+
+
+def _read_xml_sheets(zf: zipfile.ZipFile) -> List[SheetNode]:
+    return list(_iter_xml_sheets(zf))
+
+
+def iter_sheets(xmind_file: str) -> Iterator[SheetNode]:
+    """
+    逐个读取 XMind 文件的画布（第一个即为主画布）。
+    优先使用 content.json；仅当其不存在时读取 content.xml。
+    XMind Zen/2020+ 同时写入两者（content.xml 仅为兼容旧版的占位内容），
+    converter / module_converter_final 的各解析器都遵循同一规则，同一文件不会因解析器不同而读取不同数据源。
+    """
+    with zipfile.ZipFile(xmind_file) as zf:
+        names = set(zf.namelist())
+        if CONTENT_JSON in names:
+            yield from _iter_json_sheets(zf)
+            return
+        if CONTENT_XML in names:
+            yield from _iter_xml_sheets(zf)
+            return
+    raise ValueError(f"无法识别的 XMind 文件（缺少 {CONTENT_JSON}/{CONTENT_XML}）：{xmind_file}")
+
+
+def load_sheets(xmind_file: str) -> List[SheetNode]:
+    """读取 XMind 文件的全部画布（第一个即为主画布）"""
+    return list(iter_sheets(xmind_file))
+
+
+def first_sheet(xmind_file: str) -> Optional[SheetNode]:
+    """只读取主画布（其余画布不构建主题树），文件没有画布时返回 None；数据源选择同 iter_sheets"""
+    sheets = iter_sheets(xmind_file)
+    try:
+        return next(sheets, None)
+    finally:
+        sheets.close()
+
+
+def configure(workers: Optional[int] = None, parallel_min: Optional[int] = None):
+    """修改多画布并行处理的进程数（1 表示串行）或启用进程池的最少画布数"""
+    global SHEET_WORKERS, SHEET_PARALLEL_MIN
+    if workers is not None:
+        SHEET_WORKERS = max(1, workers)
+    if parallel_min is not None:
+        SHEET_PARALLEL_MIN = parallel_min
+
+
+def _get_sheet_pool(workers: int) -> ProcessPoolExecutor:
+    """共享进程池（同一进程内多次调用 map_sheets 复用，不再每次启动子进程）"""
+    global _sheet_pool
+    if _sheet_pool is None or _sheet_pool[:2] != (os.getpid(), workers):
+        if _sheet_pool is not None and _sheet_pool[0] == os.getpid():
+            _sheet_pool[2].shutdown(wait=False, cancel_futures=True)
+        _sheet_pool = (os.getpid(), workers, ProcessPoolExecutor(max_workers=workers))
+    return _sheet_pool[2]
+
+
+def _release_head(head: List[SheetNode], rest: Iterator[SheetNode]) -> Iterator[SheetNode]:
+    """先产出已预读的画布（产出即从列表移除），再继续读取剩余画布"""
+    while head:
+        yield head.pop(0)
+    yield from rest
+
+
+def map_sheets(func: Callable[..., Any], sheets: Iterable[SheetNode], *args,
+               workers: Optional[int] = None) -> Iterator[Any]:
+    """
+    对每个画布执行 func(sheet, index, *args)，按画布顺序产出结果。
+    - workers（默认 SHEET_WORKERS）> 1 且画布数不少于 SHEET_PARALLEL_MIN（至少 2）时在进程池中并行，
+      func 必须是模块级函数；进程池在进程内复用（_get_sheet_pool）
+    - 在途画布不超过 2 * workers 个；画布提交后父进程即不再引用其主题树，
+      配合 iter_sheets 逐个读取，峰值内存取决于在途画布而非画布总数
+    - 进程池无法创建（如受限环境）时退回串行；子进程异常退出时丢弃进程池，下次调用重新创建
+    """
+    if workers is None:
+        workers = SHEET_WORKERS
+    sheets = iter(sheets)
+    head = []
+    if workers > 1:
+        for sheet in sheets:
+            head.append(sheet)
+            if len(head) >= max(SHEET_PARALLEL_MIN, 2):
+                break
+    if len(head) < max(SHEET_PARALLEL_MIN, 2):
+        for index, sheet in enumerate(_release_head(head, sheets)):
+            yield func(sheet, index, *args)
+            sheet = None
+        return
+
+    try:
+        pool = _get_sheet_pool(workers)
+    except (OSError, NotImplementedError):
+        for index, sheet in enumerate(_release_head(head, sheets)):
+            yield func(sheet, index, *args)
+            sheet = None
+        return
+
+    global _sheet_pool
+    in_flight = deque()
+    try:
+        for index, sheet in enumerate(_release_head(head, sheets)):
+            in_flight.append(pool.submit(func, sheet, index, *args))
+            sheet = None
+            if len(in_flight) >= workers * 2:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+    except BrokenProcessPool:
+        _sheet_pool = None
+        raise
+    finally:
+        # 调用方提前停止（或出错）时取消尚未开始的画布任务
+        for future in in_flight:
+            future.cancel()
+
+
+def has_content_json(xmind_file: str) -> bool:
+    """文件是否含 content.json（含则所有解析器都读取 content.json，见 iter_sheets）"""
+    with zipfile.ZipFile(xmind_file) as zf:
+        return CONTENT_JSON in zf.namelist()
+
+
+def load_json_sheets(xmind_file: str) -> Optional[List[SheetNode]]:
+    """
+    仅读取 content.json（XMind Zen/2020+）。
+    旧版 XMind 8 文件没有 content.json，此时返回 None，由调用方回退到原有解析路径。
+    """
+    with zipfile.ZipFile(xmind_file) as zf:
+        if CONTENT_JSON not in zf.namelist():
+            return None
+        return _read_json_sheets(zf)
+
+
+# ---------------------------------------------------------------------------
+# 遍历引擎：显式栈 + 路径驻留表，任意深度不触发 RecursionError，路径内存与节点数线性相关
+# ---------------------------------------------------------------------------
+
+ROOT_PATH = -1
+
+
+class PathTable:
+    """
+    路径驻留表：每条路径只存 (父路径编号, 末段值)，子路径共享父路径前缀，
+    不再为每一层复制整条路径列表。ROOT_PATH 表示空路径。
+    """
+
+    __slots__ = ("parents", "values", "_joined")
+
+    def __init__(self):
+        self.parents = []
+        self.values = []
+        self._joined = {}
+
+    def child(self, path: int, value) -> int:
+        """在 path 末尾追加一段，返回新路径编号"""
+        self.parents.append(path)
+        self.values.append(value)
+        return len(self.values) - 1
+
+    def parts(self, path: int) -> list:
+        """从根到末段的值列表"""
+        result = []
+        parents, values = self.parents, self.values
+        while path != ROOT_PATH:
+            result.append(values[path])
+            path = parents[path]
+        result.reverse()
+        return result
+
+    def join(self, path: int, sep: str = "/") -> str:
+        """拼接路径字符串（按路径编号缓存，同一模块下的多个用例只拼接一次）"""
+        key = (path, sep)
+        joined = self._joined.get(key)
+        if joined is None:
+            joined = sep.join(self.parts(path))
+            self._joined[key] = joined
+        return joined
+
+
+def walk_testcases(tree: TopicTree, clean_title: Callable[[Optional[str]], str], threshold: float,
+                   paths: PathTable, shape: Optional[SubtreeShape] = None) -> Iterator[Tuple[int, str, int]]:
+    """
+    启发式用例遍历（先序，从中心主题的子节点开始）：
+    - clean_title 清洗后为空的主题及其子树被跳过
+    - 满足 SubtreeShape.is_testcase 的主题作为用例产出，不再向下遍历
+    - 其余主题作为模块，其清洗后的标题追加到模块路径
+    产出 (主题编号, 清洗后标题, 模块路径编号)，路径编号由 paths 解析。
+    """
+    if shape is None:
+        shape = SubtreeShape(tree)
+    titles = tree.titles
+    stack = [(child, ROOT_PATH) for child in reversed(tree.children(0))]
+    while stack:
+        topic, path = stack.pop()
+        title = clean_title(titles[topic] or "")
+        if not title:
+            continue
+        if shape.is_testcase(topic, threshold):
+            yield topic, title, path
+            continue
+        module_path = paths.child(path, title)
+        for child in reversed(tree.children(topic)):
+            stack.append((child, module_path))
+
+
+# ---------------------------------------------------------------------------
+# xmind2testcase 兼容解析：在共享主题树上复现 get_xmind_testcase_list 的输出
+# ---------------------------------------------------------------------------
+
+_VALID_SEP = "&>+/-"
+_IGNORE_CHAR = "#!！"
+_PRECONDITION_SEP = "\n----\n"
+
+
+def _is_kept_title(title: Optional[str]) -> bool:
+    return not (title is None or title.strip() == "" or title[0] in _IGNORE_CHAR)
+
+
+def _filter_elements(values) -> List[str]:
+    return [v.strip() for v in values
+            if isinstance(v, str) and v.strip() != "" and v[0] not in _IGNORE_CHAR]
+
+
+def _kept_children(tree: TopicTree, index: int) -> List[int]:
+    titles = tree.titles
+    return [c for c in tree.children(index) if _is_kept_title(titles[c])]
+
+
+def _get_priority(tree: TopicTree, index: int) -> Optional[int]:
+    for marker in tree.markers[index]:
+        if marker.startswith("priority"):
+            return int(marker[-1])
+    return None
+
+
+def _parse_testcase(tree: TopicTree, topics: List[int], sep: str) -> dict:
+    case_topic = topics[-1]
+    titles = _filter_elements(tree.titles[t] for t in topics)
+    joiner = sep if sep == " " else f" {sep} "
+    preconditions = _PRECONDITION_SEP.join(_filter_elements(tree.notes[t] for t in topics))
+    steps = []
+    for number, step in enumerate(_kept_children(tree, case_topic), 1):
+        expected_topics = _kept_children(tree, step)
+        steps.append({
+            "step_number": number,
+            "actions": tree.titles[step],
+            "expectedresults": tree.titles[expected_topics[0]] if expected_topics else "",
+        })
+    return {
+        "name": joiner.join(titles),
+        "preconditions": preconditions if preconditions else "无",
+        "importance": _get_priority(tree, case_topic) or 2,
+        "steps": steps,
+    }
+
+
+def get_testcase_list(sheets: List[SheetNode]) -> List[dict]:
+    """
+    等价于 xmind2testcase.utils.get_xmind_testcase_list，但直接基于已读取的主题树。
+    返回的字典包含 name / suite / product / preconditions / importance / steps 字段。
+    """
+    return list(iter_testcase_list(sheets))
+
+
+def iter_testcase_list(sheets: List[SheetNode]) -> Iterator[dict]:
+    """get_testcase_list 的生成器版本：按相同顺序逐个产出用例字典"""
+    for sheet in sheets:
+        tree = sheet.tree
+        suites = _kept_children(tree, 0)
+        if not suites:
+            continue
+
+        root_title = tree.titles[0] or ""
+        sep = " "
+        product = root_title
+        if root_title and root_title[-1] in _VALID_SEP:
+            sep = root_title[-1]
+            product = root_title[:-1]
+
+        paths = PathTable()
+        for suite in suites:
+            # 深度优先；非用例节点作为标题前缀（不含测试集节点本身）
+            stack = [(child, ROOT_PATH) for child in reversed(_kept_children(tree, suite))]
+            while stack:
+                topic, path = stack.pop()
+                children = _kept_children(tree, topic)
+                if _get_priority(tree, topic) or not children:
+                    case = _parse_testcase(tree, paths.parts(path) + [topic], sep)
+                    case["product"] = product
+                    case["suite"] = tree.titles[suite]
+                    yield case
+                    continue
+                path = paths.child(path, topic)
+                for child in reversed(children):
+                    stack.append((child, path))
+
+
+def count_testcase_list(sheets: List[SheetNode]) -> int:
+    """
+    get_testcase_list 产出的用例数：遍历规则相同，但只计数、不构建用例字典。
+    用于 auto 模式的结构预扫描。
+    """
+    count = 0
+    for sheet in sheets:
+        tree = sheet.tree
+        for suite in _kept_children(tree, 0):
+            stack = _kept_children(tree, suite)
+            while stack:
+                topic = stack.pop()
+                children = _kept_children(tree, topic)
+                if _get_priority(tree, topic) or not children:
+                    count += 1
+                else:
+                    stack.extend(children)
+    return count
+
+
+def count_testcases(tree: TopicTree, clean_title: Callable[[Optional[str]], str], threshold: float,
+                    shape: Optional[SubtreeShape] = None) -> int:
+    """walk_testcases 产出的用例数（只计数），用于 auto 模式的结构预扫描"""
+    return sum(1 for _ in walk_testcases(tree, clean_title, threshold, PathTable(), shape))